@@ -1,10 +1,35 @@
-from flask import Flask, jsonify, render_template
+from flask import Flask, g, has_request_context, jsonify, render_template, request
 from flask_cors import CORS
 import psycopg2
 import psycopg2.extras
 import os
+import base64
+import contextvars
+import hashlib
+from datetime import date
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from datetime import datetime
+from functools import partial, wraps
+from urllib.parse import parse_qsl, urlsplit
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+from db_pool import ManagedConnectionPool
+from result_cache import DataWatermark, ResultCache
+from singleflight import SingleFlight
+from statements import StatementRegistry, escape_like
+from prewarm import CachePrewarmer
+from query_parts import QueryPartRunner
+from slow_queries import SlowQueryLog
+from memory_index import CompanyNameIndex, UserTopKIndex
+from table_window import TableWindow
+from metric_registry import MetricRegistry
+import compression
+import metrics
+import serialization
 
 load_dotenv()
 
@@ -17,7 +42,7 @@ CORS(app)
 
 def get_db_connection():
     """Connect to analytics database (localhost or Kubernetes)"""
-    return psycopg2.connect(
+    conn = psycopg2.connect(
         host=os.getenv('ANALYTICS_DB_HOST', 'localhost'),
         port=int(os.getenv('ANALYTICS_DB_PORT', '5432')),
         database=os.getenv('ANALYTICS_DB_NAME', 'chemlink_analytics'),
@@ -25,27 +50,521 @@ def get_db_connection():
         password=os.getenv('ANALYTICS_DB_PASSWORD', 'postgres'),
         cursor_factory=psycopg2.extras.RealDictCursor
     )
+    # Dates/timestamps arrive as ISO strings and NUMERIC as floats, so rows
+    # are JSON-ready without a conversion pass (see serialization.py)
+    return serialization.register_json_typecasters(conn)
+
+# One pool per worker process; routes check connections out of it instead of
+# opening a new connection for every query.
+db_pool = ManagedConnectionPool.from_env(
+    get_db_connection, on_checkout=partial(metrics.observe_phase, 'pool_wait'))
+
+# Concurrent callers running the same statement with the same parameters share
+# one execution instead of each sending a copy to Postgres.
+query_flights = SingleFlight()
+
+# Queries slower than SLOW_QUERY_MS, with sampled EXPLAIN plans captured on a
+# separate connection (see slow_queries.py)
+slow_queries = SlowQueryLog.from_env(get_db_connection)
+
+def record_query_time(statement, params, started, endpoint=None, **explain):
+    if endpoint is None and has_request_context():
+        endpoint = request.endpoint
+    slow_queries.observe(statement, params, time.perf_counter() - started,
+                         endpoint=endpoint, **explain)
+
+# Parameterized lookups that each pooled connection prepares once and then
+# re-executes without parsing and planning them again.
+statements = StatementRegistry()
+
+def execute_query(query, params=None, columnar=False):
+    """Execute query and return results as list of dicts.
+
+    With columnar=True the result is instead a dict of column name -> list of
+    values, built straight from the cursor's tuples. Identical concurrent
+    calls are coalesced; the returned rows may be shared between callers and
+    must be treated as read-only.
+    """
+    key = (query, flight_params(params), columnar)
+    return query_flights.do(key, lambda: _run_query(query, params, columnar))
+
+def flight_params(params):
+    """params as part of a query_flights key: array parameters are lists, so
+    they (and a list of parameters) are frozen into tuples"""
+    if not isinstance(params, (list, tuple)):
+        return params
+    return tuple(tuple(param) if isinstance(param, list) else param for param in params)
+
+def _run_query(query, params=None, columnar=False):
+    """Run query on a pooled connection"""
+    with db_pool.connection() as conn:
+        if not columnar:
+            with conn.cursor() as cursor:
+                started = time.perf_counter()
+                with metrics.timed('sql'):
+                    cursor.execute(query, params)
+                with metrics.timed('fetch'):
+                    rows = cursor.fetchall()
+                record_query_time(query, params, started)
+                metrics.add_rows(len(rows))
+                return rows
+
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            started = time.perf_counter()
+            with metrics.timed('sql'):
+                cursor.execute(query, params)
+            with metrics.timed('fetch'):
+                rows = cursor.fetchall()
+            record_query_time(query, params, started)
+            metrics.add_rows(len(rows))
+            names = [column.name for column in cursor.description]
+            if not rows:
+                return {name: [] for name in names}
+            return dict(zip(names, map(list, zip(*rows))))
+
+def execute_prepared(statement, params=()):
+    """Execute a registered prepared statement; same contract as execute_query"""
+    key = (statement.name, flight_params(params), False)
+    return query_flights.do(key, lambda: _run_prepared(statement, params))
+
+def _run_prepared(statement, params):
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            started = time.perf_counter()
+            with metrics.timed('sql'):
+                statements.execute(cursor, statement, params)
+            with metrics.timed('fetch'):
+                rows = cursor.fetchall()
+            record_query_time(statement.sql, params, started,
+                              explain_sql=statement.execute_sql,
+                              setup_sql=statement.prepare_sql)
+            metrics.add_rows(len(rows))
+            return rows
+
+def json_response(data):
+    """Serialize query results with the fast path in serialization.py"""
+    with metrics.timed('serialize'):
+        body = serialization.dumps(data)
+    return app.response_class(body, mimetype='application/json')
+
+# Rows fetched per round trip from a server-side cursor when streaming
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '2000'))
+
+def stream_query(query, params=None, endpoint=None):
+    """Yield the result of query as JSON array chunks.
+
+    Uses a named (server-side) cursor so Postgres hands rows over
+    STREAM_BATCH_SIZE at a time; only one batch and its JSON are ever held in
+    worker memory, however large the table grows. The pooled connection stays
+    checked out until the client has received the last chunk.
+    """
+    with db_pool.connection() as conn:
+        with conn.cursor(name=f'stream_{uuid.uuid4().hex}') as cursor:
+            cursor.itersize = STREAM_BATCH_SIZE
+            started = time.perf_counter()
+            with metrics.timed('sql'):
+                cursor.execute(query, params)
+            yield b'['
+            first = True
+            while True:
+                with metrics.timed('fetch'):
+                    rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if first:
+                    # The query runs on the first fetch. Explain it as a
+                    # cursor, which Postgres plans for fast first rows.
+                    explain_sql = f'DECLARE explain_stream NO SCROLL CURSOR FOR {query}'
+                    record_query_time(query, params, started, endpoint=endpoint,
+                                      explain_sql=explain_sql)
+                if not rows:
+                    break
+                metrics.add_rows(len(rows))
+                # Encode the batch as an array and drop its brackets
+                with metrics.timed('serialize'):
+                    chunk = serialization.dumps(rows)[1:-1]
+                yield chunk if first else b',' + chunk
+                first = False
+            yield b']'
+
+def stream_response(query, params=None):
+    """Streamed JSON response for unbounded result sets"""
+    # The body is generated after the request context is gone
+    return app.response_class(stream_query(query, params, endpoint=request.endpoint),
+                              mimetype='application/json')
+
+GRAPH_PAGE_DEFAULT = int(os.getenv('GRAPH_PAGE_DEFAULT', '100'))
+GRAPH_PAGE_MAX = int(os.getenv('GRAPH_PAGE_MAX', '1000'))
+
+# The first page the graph page's tables request, kept warm by the pre-warmer
+GRAPH_PAGE_VARIANTS = (f'limit={GRAPH_PAGE_DEFAULT}',)
+
+def encode_page_cursor(values):
+    """Opaque continuation token for the sort-key values of a page's last row.
+
+    Values are kept as text (NULL as null), so NUMERIC keys come back exactly
+    rather than as rounded floats.
+    """
+    raw = json.dumps([None if v is None else str(v) for v in values],
+                     separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
 
-def execute_query(query):
-    """Execute query and return results as list of dicts"""
-    conn = get_db_connection()
+def decode_page_cursor(token, size):
+    """Sort-key values (text or None) from a continuation token; ValueError if malformed"""
     try:
-        with conn.cursor() as cursor:
-            cursor.execute(query)
-            results = cursor.fetchall()
-            # Convert datetime objects to ISO format strings
-            for row in results:
-                for key, value in row.items():
-                    if isinstance(value, datetime):
-                        row[key] = value.isoformat()
-            return results
-    finally:
-        conn.close()
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != size or not all(
+            v is None or isinstance(v, str) for v in values):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_seek(keys, values):
+    """WHERE condition and params for the rows after values in `keys DESC` order.
+
+    Postgres sorts NULLs first in descending order, and a row comparison with
+    a NULL is never true, so NULL cursor values are spelled out key by key.
+    The text params take the type of the column they are compared with.
+    """
+    if not keys:
+        return 'FALSE', []
+    if None not in values:
+        return (f"({', '.join(keys)}) < ({', '.join(['%s'] * len(keys))})", list(values))
+    rest, rest_params = keyset_seek(keys[1:], values[1:])
+    if values[0] is None:
+        return f'(({keys[0]} IS NULL AND {rest}) OR {keys[0]} IS NOT NULL)', rest_params
+    return (f'({keys[0]} < %s OR ({keys[0]} = %s AND {rest}))',
+            [values[0], values[0]] + rest_params)
+
+def is_paginated_request():
+    return 'limit' in request.args or 'cursor' in request.args
+
+def keyset_page_response(select, keys):
+    """One keyset-paginated page of select, ordered by keys descending.
+
+    Returns {"data": [...], "next_cursor": token or null}. The cursor carries
+    the last row's key values, so the next page is a `(keys) < (values)` seek
+    on the sort order instead of an OFFSET scan: deep pages cost the same as
+    the first. keys must be columns of select and end in a unique column
+    combination so the order is total.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', GRAPH_PAGE_DEFAULT)), 1), GRAPH_PAGE_MAX)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    where, params = '', []
+    token = request.args.get('cursor')
+    if token:
+        try:
+            condition, params = keyset_seek(keys, decode_page_cursor(token, len(keys)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        where = f'WHERE {condition}'
+
+    order = ', '.join(f'{key} DESC' for key in keys)
+    query = f'{select}\n{where}\nORDER BY {order}\nLIMIT %s;'
+    rows = execute_query(query, params + [limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_page_cursor([rows[limit - 1][key] for key in keys])
+    return json_response({'data': rows[:limit], 'next_cursor': next_cursor})
+
+def series_response(query, params=None):
+    """Time-series rows as JSON.
+
+    ?format=columnar returns {"columns": {name: [values, ...]}} instead of a
+    list of row objects, so key names are not repeated in every row.
+    """
+    if request.args.get('format') == 'columnar':
+        return json_response({'columns': execute_query(query, params, columnar=True)})
+    return json_response(execute_query(query, params))
+
+def columns_response(columns):
+    """series_response for columns already in memory ({name: [values, ...]})"""
+    if request.args.get('format') == 'columnar':
+        return json_response({'columns': columns})
+    names = list(columns)
+    return json_response([dict(zip(names, row)) for row in zip(*columns.values())])
+
+def database_today():
+    """The database's CURRENT_DATE (ISO), for date filters applied in Python"""
+    return data_watermark.current_date() or date.today().isoformat()
+
+# ============================================================================
+# INSTRUMENTATION - per-endpoint latency by phase, exported at /metrics
+# ============================================================================
+
+request_metrics = metrics.RequestMetrics()
+
+# Not counted: the scrape itself and static assets
+UNINSTRUMENTED_ENDPOINTS = ('prometheus_metrics', 'static')
+
+@app.before_request
+def _begin_request_timings():
+    metrics.begin_request()
+
+# Registered before the HTTP caching hook, so it runs after it and sees the
+# final (possibly compressed) body
+@app.after_request
+def _record_request_metrics(response):
+    timings = metrics.current_timings()
+    if timings is None or request.endpoint in UNINSTRUMENTED_ENDPOINTS:
+        return response
+
+    endpoint = request.endpoint or 'unmatched'
+    method, status = request.method, response.status_code
+    handler_done = time.perf_counter()
+    with timings.lock:
+        busy = sum(timings.phases.values())
+
+    if response.is_streamed:
+        sent = [0]
+        def counted(chunks):
+            for chunk in chunks:
+                sent[0] += len(chunk)
+                yield chunk
+        response.response = counted(response.response)
+    else:
+        sent = [response.content_length or 0]
+
+    def finish():
+        # Streamed bodies run queries and serialization while being written;
+        # those phases are already counted, the rest is write time
+        with timings.lock:
+            streamed_work = sum(timings.phases.values()) - busy
+        timings.add('write', max(time.perf_counter() - handler_done - streamed_work, 0.0))
+        request_metrics.finish(timings, endpoint, method, status, sent[0])
+
+    response.call_on_close(finish)
+    return response
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+# Serialized /api responses, invalidated when the watermark of any source
+# table moves (see result_cache.py) or after RESULT_CACHE_TTL seconds.
+result_cache = ResultCache.from_env()
+data_watermark = DataWatermark.from_env(execute_query)
+
+def cache_key(req):
+    """Cache key for a request: endpoint path plus its sorted query arguments"""
+    return (req.path, tuple(sorted(req.args.items(multi=True))))
+
+CACHE_MAX_STALE = float(os.getenv('CACHE_MAX_STALE', '600'))
+
+def cache_would_serve(path, query_string, view):
+    """Whether view, a cached_endpoint, would answer path?query_string from the cache"""
+    key = (path, tuple(sorted(parse_qsl(query_string, keep_blank_values=True))))
+    entry = result_cache.get(key)
+    if entry is None:
+        return False
+    return (entry.is_fresh(data_watermark.current(view.cache_sources))
+            or entry.staleness() <= view.cache_max_stale)
+
+# Set in the environ of internal requests that must rebuild their cache entry
+CACHE_REFRESH_ENVIRON_KEY = 'analytics.cache_refresh'
+
+# Set by views whose response includes values older than the current data
+STALE_DATA_AGE_ENVIRON_KEY = 'analytics.stale_data_age'
+
+def mark_stale_data(age):
+    """Keep this response out of the result cache: part of it is age seconds old"""
+    if age:
+        request.environ[STALE_DATA_AGE_ENVIRON_KEY] = age
+
+# Background workers that re-run views whose cached entry went stale
+cache_refresh_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('CACHE_REFRESH_WORKERS', '2')),
+    thread_name_prefix='cache-refresh',
+)
+_refreshing_keys = set()
+_refreshing_lock = threading.Lock()
+
+def schedule_cache_refresh(key, full_path):
+    """Rebuild a cache entry in the background unless a refresh is already queued"""
+    with _refreshing_lock:
+        if key in _refreshing_keys:
+            return
+        _refreshing_keys.add(key)
+
+    def refresh():
+        try:
+            dispatch_internal(full_path[len('/api/'):],
+                              environ_overrides={CACHE_REFRESH_ENVIRON_KEY: True})
+        except Exception:
+            app.logger.exception('Background cache refresh failed: %s', full_path)
+        finally:
+            with _refreshing_lock:
+                _refreshing_keys.discard(key)
+
+    cache_refresh_executor.submit(refresh)
+
+def cached_response(entry, status):
+    """Build a response from a cache entry"""
+    response = app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    # Lets the compression step reuse the entry's pre-compressed bodies
+    g.cache_entry = entry
+    response.headers['X-Cache'] = status
+    response.headers['X-Data-Age'] = str(int(entry.age()))
+    return response
+
+def _tee_into_cache(chunks, key, version, ttl):
+    """Pass streamed chunks through, caching the body if it turns out small.
+
+    Bodies that outgrow RESULT_CACHE_MAX_ENTRY_MB stop being buffered, so
+    streaming keeps its flat memory profile for large results.
+    """
+    buffered, size = [], 0
+    for chunk in chunks:
+        if buffered is not None:
+            size += len(chunk)
+            if size <= result_cache.max_entry_bytes:
+                buffered.append(chunk)
+            else:
+                buffered = None
+        yield chunk
+    if buffered is not None:
+        result_cache.put(key, b''.join(buffered), version, ttl=ttl)
+
+def cached_endpoint(*sources, ttl=None, max_stale=None, variants=()):
+    """Serve a JSON route from the result cache, keyed by path and arguments.
+
+    sources are the tables the route reads; a change to any of them (as seen
+    by the data watermark) invalidates the cached response. Invalidated or
+    expired entries are still served for up to max_stale seconds
+    (CACHE_MAX_STALE by default) while a background worker rebuilds them.
+    variants are extra query strings the pages request (e.g.
+    'format=columnar') that the pre-warmer keeps warm as well.
+    """
+    stale_bound = CACHE_MAX_STALE if max_stale is None else max_stale
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if not result_cache.enabled:
+                return view(**kwargs)
+
+            version = data_watermark.current(sources)
+            if not data_watermark.known:
+                # The versions could not be read yet; don't tag entries with None
+                return view(**kwargs)
+
+            key = cache_key(request)
+            if not request.environ.get(CACHE_REFRESH_ENVIRON_KEY):
+                entry = result_cache.get(key)
+                if entry is not None:
+                    if entry.is_fresh(version):
+                        result_cache.record('hits')
+                        return cached_response(entry, 'HIT')
+                    if entry.staleness() <= stale_bound:
+                        result_cache.record('stale_hits')
+                        schedule_cache_refresh(key, request.full_path)
+                        return cached_response(entry, 'STALE')
+                result_cache.record('misses')
+
+            response = app.make_response(view(**kwargs))
+            stale_age = request.environ.get(STALE_DATA_AGE_ENVIRON_KEY)
+            if stale_age is not None:
+                # Not stored under the current version; sent with its true age
+                if response.status_code == 200:
+                    response.headers['X-Data-Age'] = str(int(stale_age))
+                return response
+            if response.status_code != 200:
+                return response
+            if response.is_streamed:
+                response.response = _tee_into_cache(response.response, key, version, ttl)
+            else:
+                entry = result_cache.put(key, response.get_data(), version, ttl=ttl)
+                if entry is None:
+                    return response
+                response.set_etag(entry.etag)
+                g.cache_entry = entry
+            response.headers['X-Cache'] = 'MISS'
+            response.headers['X-Data-Age'] = '0'
+            return response
+
+        wrapper.cache_sources = sources
+        wrapper.cache_max_stale = stale_bound
+        wrapper.cache_variants = variants
+        return wrapper
+    return decorator
 
 # ============================================================================
-# DASHBOARD HOME
+# HTTP CACHING - ETag / If-None-Match, Content-Encoding
 # ============================================================================
 
+# Bodies smaller than this are sent uncompressed
+API_COMPRESS_MIN_BYTES = int(os.getenv('API_COMPRESS_MIN_BYTES', '1024'))
+
+# Browsers may reuse a response for max-age seconds, then revalidate it with
+# If-None-Match; unchanged data is answered with an empty 304.
+API_CLIENT_MAX_AGE = int(os.getenv('API_CLIENT_MAX_AGE', '60'))
+API_CACHE_CONTROL = f'private, max-age={API_CLIENT_MAX_AGE}, must-revalidate'
+
+@app.after_request
+def conditional_api_response(response):
+    """Add ETag/Cache-Control to /api GET responses and answer conditional GETs"""
+    if not request.path.startswith('/api/'):
+        return response
+    if request.path.startswith('/api/admin/'):
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    if response.is_streamed:
+        # No ETag without the full body; still compress on the fly
+        response.vary.add('Accept-Encoding')
+        compress_stream_response(response)
+        return response
+
+    if response.get_etag() == (None, None):
+        # Not served from the result cache (e.g. batch, or cache disabled)
+        response.add_etag()
+    response.headers['Cache-Control'] = API_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    response = response.make_conditional(request)
+    if response.status_code == 200:
+        compress_response(response)
+    return response
+
+def compress_stream_response(response):
+    """Compress a streamed body incrementally, chunk by chunk"""
+    encoding = compression.negotiate(request.accept_encodings)
+    if encoding is None or response.content_encoding:
+        return
+    response.response = compression.compress_stream(response.response, encoding)
+    response.content_encoding = encoding
+
+def compress_response(response):
+    """Apply the client's preferred Content-Encoding to a JSON body.
+
+    Bodies served from the result cache use that entry's pre-compressed copy,
+    so each payload is compressed once per data version, not per request.
+    """
+    if response.content_encoding or response.content_length is None \
+            or response.content_length < API_COMPRESS_MIN_BYTES:
+        return
+    encoding = compression.negotiate(request.accept_encodings)
+    if encoding is None:
+        return
+
+    entry = g.get('cache_entry')
+    if entry is not None:
+        body = result_cache.encoded_body(entry, encoding)
+    else:
+        body = compression.compress(response.get_data(), encoding)
+    etag, _ = response.get_etag()
+    response.set_data(body)
+    response.content_encoding = encoding
+    # The compressed bytes are a different representation of the same data:
+    # a weak ETag still matches If-None-Match, which uses weak comparison
+    response.set_etag(etag, weak=True)
+
+
 @app.route('/')
 def dashboard():
     """Render main dashboard"""
@@ -57,469 +576,677 @@ def graph_analytics():
     return render_template('graph-analytics.html')
 
 # ============================================================================
-# GROWTH METRICS - FROM AGGREGATES
+# IN-MEMORY INDEXES - rebuilt when their aggregates tables refresh
 # ============================================================================
 
-@app.route('/api/new-users/daily')
-def new_users_daily():
-    """Get daily new signups from aggregates.daily_metrics"""
-    query = """
-        SELECT 
-            metric_date as date,
-            new_signups,
-            new_finder_signups,
-            new_standard_signups,
-            total_users_cumulative
-        FROM aggregates.daily_metrics
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
+def execute_columnar(query, params=None):
+    return execute_query(query, params, columnar=True)
+
+company_names = CompanyNameIndex(execute_columnar, data_watermark)
+
+# Per-user rows pre-sorted by score, so a profile view is a dict lookup
+user_recommendations = UserTopKIndex(
+    execute_columnar, data_watermark, 'connection_recommendations',
+    'aggregates.connection_recommendations',
+    ('user_id', 'recommended_user_id', 'recommendation_score', 'common_companies',
+     'common_roles', 'common_schools', 'recommendation_reason'),
+    'recommendation_score', top_k=50,
+)
+user_skills = UserTopKIndex(
+    execute_columnar, data_watermark, 'skills_matching',
+    'aggregates.skills_matching_scores',
+    ('user_id', 'role_id', 'role_title', 'experience_years', 'proficiency_score',
+     'similar_user_count'),
+    'proficiency_score',
+)
+
+# Recent rows of the time-series tables, loaded once per data version and
+# shared by every chart and summary card that reads them (table_window.py).
+# The window must cover the longest range a route reads (12 weeks).
+TABLE_WINDOW_DAYS = int(os.getenv('TABLE_WINDOW_DAYS', '400'))
+
+daily_metrics_window = TableWindow(
+    execute_columnar, data_watermark, 'aggregates.daily_metrics', 'metric_date',
+    ('new_signups', 'new_finder_signups', 'new_standard_signups', 'total_users_cumulative',
+     'dau', 'active_posters', 'active_commenters', 'active_voters', 'active_collectors',
+     'posts_created', 'comments_created', 'votes_cast', 'collections_created', 'views_given',
+     'engagement_rate', 'social_engagement_rate'),
+    days=TABLE_WINDOW_DAYS,
+)
+monthly_metrics_window = TableWindow(
+    execute_columnar, data_watermark, 'aggregates.monthly_metrics', 'metric_month',
+    ('new_signups', 'total_users_end_of_month', 'growth_rate_pct', 'mau', 'avg_dau',
+     'finder_mau', 'standard_mau', 'activation_rate', 'total_posts', 'total_comments',
+     'total_votes', 'total_collections', 'avg_activities_per_user', 'avg_engagement_score'),
+)
+post_metrics_window = TableWindow(
+    execute_columnar, data_watermark, 'aggregates.post_metrics', 'metric_date',
+    ('posts_created', 'unique_posters', 'avg_posts_per_poster', 'comments_created',
+     'total_votes', 'avg_comments_per_post', 'avg_votes_per_post',
+     'engagement_rate_comments_pct', 'engagement_rate_votes_pct', 'text_posts',
+     'link_posts', 'media_posts'),
+)
+kratos_daily_logins_window = TableWindow(
+    execute_columnar, data_watermark, 'aggregates.kratos_daily_logins', 'metric_date',
+    ('unique_users_logged_in', 'total_sessions', 'mfa_sessions', 'password_only_sessions',
+     'mfa_session_rate', 'avg_session_minutes', 'mobile_users', 'desktop_users'),
+    days=TABLE_WINDOW_DAYS,
+)
+
+memory_indexes = (company_names, user_recommendations, user_skills, daily_metrics_window,
+                  monthly_metrics_window, post_metrics_window, kratos_daily_logins_window)
+for index in memory_indexes:
+    data_watermark.add_listener(index.on_watermark_change)
 
-@app.route('/api/new-users/monthly')
-def new_users_monthly():
-    """Get monthly new signups from aggregates.monthly_metrics"""
-    query = """
-        SELECT 
-            metric_month as month,
-            new_signups,
-            total_users_end_of_month,
-            growth_rate_pct
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
+# ============================================================================
+# METRIC ROUTES - single-table routes declared once (see metric_registry.py)
+# ============================================================================
+
+# Fused queries of one batch or pre-warm run execute concurrently
+metric_executor = ThreadPoolExecutor(
+    max_workers=db_pool.max_size,
+    thread_name_prefix='metric-prefetch',
+)
+metric_registry = MetricRegistry(execute_columnar, data_watermark, metric_executor,
+                                 database=os.getenv('ANALYTICS_DB_NAME', 'chemlink_analytics'))
+
+# Longest trailing window ?rolling= accepts, in rows
+ROLLING_MAX_PERIODS = 366
+# Most rows a time series returns; longer ones are downsampled (LTTB)
+SERIES_MAX_POINTS = int(os.getenv('SERIES_MAX_POINTS', '1000'))
+# Rows older than a client's newest one that ?since= deltas send again, so
+# rows restated by the ETL (e.g. the partial current day) are refreshed
+SERIES_DELTA_OVERLAP = int(os.getenv('SERIES_DELTA_OVERLAP', '1'))
+# Arguments that change which rows of a time series are read
+SERIES_RANGE_ARGS = ('from', 'to', 'grain')
+SERIES_ARGS = SERIES_RANGE_ARGS + ('points', 'rolling', 'deltas', 'since')
+
+def _int_arg(name, low, high):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer') from None
+    if not low <= value <= high:
+        raise ValueError(f'{name} must be between {low} and {high}')
+    return value
+
+def _date_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)') from None
+
+def _since_arg():
+    """(date, digest) of ?since=, a date or a version token from series_version()"""
+    value = request.args.get('since')
+    if value is None:
+        return None
+    newest, _, digest = value.partition('~')
+    if not newest and digest:
+        # Token of an empty series
+        return None, digest
+    try:
+        return date.fromisoformat(newest).isoformat(), digest or None
+    except ValueError:
+        raise ValueError('since must be a date (YYYY-MM-DD) or a version token') from None
+
+def series_options(metric):
+    """Validated time series arguments of the request; ValueError if invalid.
+
+    None for other routes. Otherwise a dict of bounds (the (start, end) date
+    range of ?from= and ?to=, or None for the route's default rows), since
+    (see _since_arg), points (?points=, default SERIES_MAX_POINTS) and the
+    metric.reshape arguments: ?grain=, ?rolling=N and ?deltas=1.
     """
-    return jsonify(execute_query(query))
+    if not metric.is_time_series:
+        given = [name for name in SERIES_ARGS if name in request.args]
+        if given:
+            raise ValueError(f'{", ".join(given)}: only supported on time-series routes')
+        return None
+
+    grain = request.args.get('grain')
+    if grain is not None:
+        metric.check_grain(grain)
+    start, end = _date_arg('from'), _date_arg('to')
+    bounds = None
+    if start is not None or end is not None:
+        bounds = metric.date_range(start, end, grain, database_today())
+
+    deltas = request.args.get('deltas', '0')
+    if deltas not in ('0', '1'):
+        raise ValueError('deltas must be 0 or 1')
+    since = _since_arg()
+    points = _int_arg('points', 3, SERIES_MAX_POINTS)
+    if since is not None and points is not None:
+        raise ValueError('since cannot be combined with points')
+    return {
+        'bounds': bounds,
+        'since': since,
+        'points': SERIES_MAX_POINTS if points is None else points,
+        'grain': grain,
+        'rolling': _int_arg('rolling', 1, ROLLING_MAX_PERIODS),
+        'deltas': deltas == '1',
+    }
 
-@app.route('/api/growth-rate/monthly')
-def growth_rate_monthly():
-    """Get monthly growth rate"""
-    query = """
-        SELECT 
-            metric_month as month,
-            new_signups,
-            growth_rate_pct
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
+def series_version(metric, columns):
+    """Version token of a time series: its newest date and a digest of the
+    data version it was read at, e.g. '2024-05-06~3fa9c2e1b0d4'"""
+    dates = columns[metric.date_alias]
+    version = repr(data_watermark.current(metric.sources)).encode()
+    digest = hashlib.blake2b(version, digest_size=6).hexdigest()
+    return f'{dates[0] if dates else ""}~{digest}'
+
+def time_series_response(metric, columns, points, since=None):
+    """A time series response.
+
+    ?format=columnar responses carry the series' version token. With
+    ?since= (a date, or a version token from an earlier response) only the
+    rows new or changed since then are returned, as {"version", "key" (the
+    date column), "start" (the oldest date of the whole series, older rows
+    are dropped), "columns" or "rows"}; an unchanged series returns no rows.
+    Downsampled series carry no version, since deltas can't be merged
+    into them.
     """
-    return jsonify(execute_query(query))
+    if since is None:
+        if len(columns[metric.date_alias]) > points:
+            with metrics.timed('compute'):
+                columns = metric.downsample(columns, points)
+            return columns_response(columns)
+        if request.args.get('format') != 'columnar':
+            return columns_response(columns)
+        return json_response({'columns': columns, 'version': series_version(metric, columns)})
+
+    version = series_version(metric, columns)
+    dates = columns[metric.date_alias]
+    newest, digest = since
+    if digest is not None and version.endswith(f'~{digest}'):
+        delta = {name: [] for name in columns}
+    elif newest is None:
+        delta = columns
+    else:
+        delta = metric.rows_since(columns, newest,
+                                  SERIES_DELTA_OVERLAP if digest is not None else 0)
+    body = {'version': version, 'key': metric.date_alias, 'start': dates[-1] if dates else None}
+    if request.args.get('format') == 'columnar':
+        body['columns'] = delta
+    else:
+        body['rows'] = [dict(zip(delta, row)) for row in zip(*delta.values())]
+    return json_response(body)
+
+def serve_metric(metric):
+    """Response for a declared metric: prefetched, from its table window, or queried"""
+    try:
+        series = series_options(metric)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    bounds = series['bounds'] if series else None
+    grain = series['grain'] if series else None
+    # Prefetches read the route's default rows only
+    columns = None
+    if bounds is None and grain is None:
+        columns = metric_registry.take_prefetched(metric)
+    if columns is None and metric.window is not None:
+        window = metric.window.current_snapshot()
+        if window is not None:
+            with metrics.timed('compute'):
+                columns = metric.from_window(window, database_today(), bounds, grain)
+
+    if columns is None:
+        if metric.response == 'stream':
+            return stream_response(metric.sql)
+        if series is None:
+            if metric.response == 'series':
+                return series_response(metric.sql)
+            rows = execute_query(metric.sql)
+            return json_response(rows[0] if metric.response == 'row' else rows)
+        columns = execute_query(*metric.query(bounds, grain), columnar=True)
+
+    if series is not None:
+        with metrics.timed('compute'):
+            columns = metric.reshape(columns, grain, series['rolling'], series['deltas'])
+        return time_series_response(metric, columns, series['points'], series['since'])
+    if metric.response == 'series':
+        return columns_response(columns)
+    rows = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    return json_response(rows[0] if metric.response == 'row' else rows)
+
+def metric_route(name, path, source, columns, **options):
+    """Declare a metric and serve it at path through the result cache"""
+    metric = metric_registry.register(name, path, source, columns, **options)
+
+    def view():
+        return serve_metric(metric)
+    view.__name__ = name
+    view.__doc__ = metric.description
+    app.add_url_rule(path, name, cached_endpoint(source, variants=metric.variants)(view))
+    return metric
+
+def prefetch_metrics(endpoints, refresh=False):
+    """Fetch the metrics behind endpoints with one fused query per shared row set.
+
+    endpoints are as for dispatch_internal. Unless refresh is set, endpoints
+    the result cache will answer are left out.
+    """
+    metrics = []
+    for endpoint in endpoints:
+        parts = urlsplit('/api/' + endpoint.lstrip('/'))
+        metric = metric_registry.for_path(parts.path)
+        if metric is None or any(name in SERIES_RANGE_ARGS for name, _ in parse_qsl(parts.query)):
+            # Only the route's default rows are fused
+            continue
+        if refresh or not cache_would_serve(parts.path, parts.query,
+                                            app.view_functions[metric.name]):
+            metrics.append(metric)
+    try:
+        metric_registry.prefetch(metrics)
+    except Exception:
+        # Every route still runs its own query
+        app.logger.exception('Prefetching %d metrics failed', len(metrics))
 
 # ============================================================================
-# ACTIVE USERS - FROM AGGREGATES
+# GROWTH METRICS - FROM AGGREGATES
 # ============================================================================
 
-@app.route('/api/active-users/daily')
-def active_users_daily():
-    """Get daily active users (DAU) from aggregates"""
-    query = """
-        SELECT 
-            metric_date as date,
-            dau,
-            active_posters,
-            active_commenters,
-            active_voters,
-            active_collectors,
-            engagement_rate
-        FROM aggregates.daily_metrics
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
+metric_route(
+    'new_users_daily', '/api/new-users/daily', 'aggregates.daily_metrics',
+    ('metric_date AS date', 'new_signups', 'new_finder_signups', 'new_standard_signups',
+     'total_users_cumulative'),
+    description='Get daily new signups from aggregates.daily_metrics',
+    date_column='metric_date', grain='day', days=30,
+    resample={'sum': ('new_signups', 'new_finder_signups', 'new_standard_signups'),
+              'max': ('total_users_cumulative',)},
+    window=daily_metrics_window,
+)
+
+metric_route(
+    'new_users_monthly', '/api/new-users/monthly', 'aggregates.monthly_metrics',
+    ('metric_month AS month', 'new_signups', 'total_users_end_of_month', 'growth_rate_pct'),
+    description='Get monthly new signups from aggregates.monthly_metrics',
+    date_column='metric_month', grain='month',
+    resample={'sum': ('new_signups',), 'max': ('total_users_end_of_month',)},
+    variants=('format=columnar',), window=monthly_metrics_window,
+    modal={'new_users_monthly': 'New Users Monthly'},
+)
+
+metric_route(
+    'growth_rate_monthly', '/api/growth-rate/monthly', 'aggregates.monthly_metrics',
+    ('metric_month AS month', 'new_signups', 'growth_rate_pct'),
+    description='Get monthly growth rate',
+    date_column='metric_month', grain='month',
+    resample={'sum': ('new_signups',)},
+    variants=('format=columnar',), window=monthly_metrics_window,
+    modal={'growth_rate': 'Monthly Growth Rate'},
+)
 
-@app.route('/api/active-users/monthly')
-def active_users_monthly():
-    """Get monthly active users (MAU) from aggregates"""
-    query = """
-        SELECT 
-            metric_month as month,
-            mau,
-            avg_dau,
-            finder_mau,
-            standard_mau,
-            activation_rate
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
-    """
-    return jsonify(execute_query(query))
+# ============================================================================
+# ACTIVE USERS - FROM AGGREGATES
+# ============================================================================
+
+metric_route(
+    'active_users_daily', '/api/active-users/daily', 'aggregates.daily_metrics',
+    ('metric_date AS date', 'dau', 'active_posters', 'active_commenters', 'active_voters',
+     'active_collectors', 'engagement_rate'),
+    description='Get daily active users (DAU) from aggregates',
+    date_column='metric_date', grain='day', days=30,
+    variants=('format=columnar',), window=daily_metrics_window,
+    modal={'dau': 'Daily Active Users'},
+)
+
+metric_route(
+    'active_users_monthly', '/api/active-users/monthly', 'aggregates.monthly_metrics',
+    ('metric_month AS month', 'mau', 'avg_dau', 'finder_mau', 'standard_mau', 'activation_rate'),
+    description='Get monthly active users (MAU) from aggregates',
+    date_column='metric_month', grain='month',
+    variants=('format=columnar',), window=monthly_metrics_window,
+    modal={'mau': 'Monthly Active Users', 'mau_by_type': 'MAU by User Type'},
+)
 
 # ============================================================================
 # ENGAGEMENT METRICS - FROM AGGREGATES
 # ============================================================================
 
-@app.route('/api/engagement/daily')
-def engagement_daily():
-    """Get daily engagement metrics"""
-    query = """
-        SELECT 
-            metric_date as date,
-            posts_created,
-            comments_created,
-            votes_cast,
-            collections_created,
-            views_given,
-            engagement_rate,
-            social_engagement_rate
-        FROM aggregates.daily_metrics
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/engagement/monthly')
-def engagement_monthly():
-    """Get monthly engagement metrics"""
-    query = """
-        SELECT 
-            metric_month as month,
-            total_posts,
-            total_comments,
-            total_votes,
-            total_collections,
-            avg_activities_per_user,
-            avg_engagement_score,
-            activation_rate
-        FROM aggregates.monthly_metrics
-        ORDER BY metric_month DESC;
-    """
-    return jsonify(execute_query(query))
+metric_route(
+    'engagement_daily', '/api/engagement/daily', 'aggregates.daily_metrics',
+    ('metric_date AS date', 'posts_created', 'comments_created', 'votes_cast',
+     'collections_created', 'views_given', 'engagement_rate', 'social_engagement_rate'),
+    description='Get daily engagement metrics',
+    date_column='metric_date', grain='day', days=30,
+    resample={'sum': ('posts_created', 'comments_created', 'votes_cast',
+                      'collections_created', 'views_given')},
+    variants=('format=columnar',), window=daily_metrics_window,
+    modal={'engagement_daily': 'Daily Engagement Activities'},
+)
+
+metric_route(
+    'engagement_monthly', '/api/engagement/monthly', 'aggregates.monthly_metrics',
+    ('metric_month AS month', 'total_posts', 'total_comments', 'total_votes',
+     'total_collections', 'avg_activities_per_user', 'avg_engagement_score', 'activation_rate'),
+    description='Get monthly engagement metrics',
+    date_column='metric_month', grain='month',
+    resample={'sum': ('total_posts', 'total_comments', 'total_votes',
+                      'total_collections')},
+    variants=('format=columnar',), window=monthly_metrics_window,
+    modal={'engagement_monthly': 'Monthly Engagement Activities'},
+)
 
 # ============================================================================
 # USER SEGMENTATION - FROM AGGREGATES
 # ============================================================================
 
-@app.route('/api/users/segmentation')
-def user_segmentation():
-    """Get user engagement level distribution"""
-    query = """
-        SELECT 
-            engagement_level,
-            COUNT(*) as user_count,
-            ROUND(AVG(engagement_score), 2) as avg_score,
-            ROUND(AVG(total_activities), 2) as avg_activities
-        FROM aggregates.user_engagement_levels
-        GROUP BY engagement_level
-        ORDER BY 
-            CASE engagement_level
-                WHEN 'POWER_USER' THEN 1
-                WHEN 'ACTIVE' THEN 2
-                WHEN 'CASUAL' THEN 3
-                WHEN 'LURKER' THEN 4
-                ELSE 5
-            END;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/users/power-users')
-def power_users():
-    """Get list of power users"""
-    query = """
-        SELECT 
-            user_id,
-            email,
-            first_name,
-            last_name,
-            engagement_score,
-            total_activities,
-            posts_created,
-            votes_cast,
-            collections_created,
-            days_since_last_activity
-        FROM aggregates.user_engagement_levels
-        WHERE engagement_level IN ('POWER_USER', 'ACTIVE')
-        ORDER BY engagement_score DESC
-        LIMIT 50;
-    """
-    return jsonify(execute_query(query))
+metric_route(
+    'user_segmentation', '/api/users/segmentation', 'aggregates.user_engagement_levels',
+    ('engagement_level', 'COUNT(*) AS user_count',
+     'ROUND(AVG(engagement_score), 2) AS avg_score',
+     'ROUND(AVG(total_activities), 2) AS avg_activities'),
+    description='Get user engagement level distribution',
+    group_by='engagement_level',
+    order_by="""
+        CASE engagement_level
+            WHEN 'POWER_USER' THEN 1
+            WHEN 'ACTIVE' THEN 2
+            WHEN 'CASUAL' THEN 3
+            WHEN 'LURKER' THEN 4
+            ELSE 5
+        END
+    """,
+    response='rows',
+    modal={'user_segmentation': 'User Segmentation by Engagement Level',
+           'power_users': 'Power Users Distribution'},
+)
+
+# The filter must stay identical to the predicate of the partial index in
+# migrations/002_user_indexes.sql for the planner to use it
+metric_route(
+    'power_users', '/api/users/power-users', 'aggregates.user_engagement_levels',
+    ('user_id', 'email', 'first_name', 'last_name', 'engagement_score', 'total_activities',
+     'posts_created', 'votes_cast', 'collections_created', 'days_since_last_activity'),
+    description='Get list of power users',
+    where="engagement_level IN ('POWER_USER', 'ACTIVE')",
+    order_by='engagement_score DESC', limit=50,
+    response='rows',
+)
 
 # ============================================================================
 # COHORT RETENTION - FROM AGGREGATES
 # ============================================================================
 
-@app.route('/api/retention/cohorts')
-def retention_cohorts():
-    """Get cohort retention data"""
-    query = """
-        SELECT 
-            cohort_month,
-            weeks_since_signup,
-            total_users,
-            retained_users,
-            retention_rate,
-            cumulative_retention
-        FROM aggregates.cohort_retention
-        WHERE cohort_month >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '6 months')
-        ORDER BY cohort_month DESC, weeks_since_signup ASC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/retention/summary')
-def retention_summary():
-    """Get retention summary from core.user_cohorts"""
-    query = """
-        SELECT 
-            cohort_month,
-            total_users,
-            finder_users,
-            standard_users,
-            activation_rate,
-            retention_rate_30d,
-            retention_rate_60d,
-            retention_rate_90d
-        FROM core.user_cohorts
-        ORDER BY cohort_month DESC;
-    """
-    return jsonify(execute_query(query))
+metric_route(
+    'retention_cohorts', '/api/retention/cohorts', 'aggregates.cohort_retention',
+    ('cohort_month', 'weeks_since_signup', 'total_users', 'retained_users', 'retention_rate',
+     'cumulative_retention'),
+    description='Get cohort retention data',
+    date_column='cohort_month', grain='month',
+    where="cohort_month >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '6 months')",
+    order_by='cohort_month DESC, weeks_since_signup ASC',
+)
+
+metric_route(
+    'retention_summary', '/api/retention/summary', 'core.user_cohorts',
+    ('cohort_month', 'total_users', 'finder_users', 'standard_users', 'activation_rate',
+     'retention_rate_30d', 'retention_rate_60d', 'retention_rate_90d'),
+    description='Get retention summary from core.user_cohorts',
+    date_column='cohort_month', grain='month',
+    resample={'sum': ('total_users', 'finder_users', 'standard_users')},
+    variants=('format=columnar',),
+    modal={'retention_summary': 'Cohort Retention Rates',
+           'activation_rate': 'Activation Rate by Cohort'},
+)
 
 # ============================================================================
 # SUMMARY STATS
 # ============================================================================
 
+# Each group of summary cards is its own query with its own cadence; the
+# groups run concurrently on separate connections and are merged per request
+# (see query_parts.py), so the COUNT(*) over core.unified_users no longer
+# holds up the cards that read small aggregates tables.
+summary_executor = ThreadPoolExecutor(
+    max_workers=db_pool.max_size,
+    thread_name_prefix='summary-part',
+)
+summary_parts = QueryPartRunner(execute_query, data_watermark, summary_executor,
+                                max_stale=CACHE_MAX_STALE)
+
+# The merged response is cheap to rebuild from cached parts, so it is only
+# kept briefly; each part refreshes on its own ttl below.
+SUMMARY_RESPONSE_TTL = float(os.getenv('SUMMARY_RESPONSE_TTL', '60'))
+
+SUMMARY_STATS_PARTS = (
+    summary_parts.register('summary.total_users', """
+        SELECT COUNT(*) as total_users
+        FROM core.unified_users
+        WHERE deleted_at IS NULL AND is_test_account = FALSE;
+    """, ('core.unified_users',), ttl=3600),
+    summary_parts.register('summary.active_users', """
+        SELECT COUNT(*) as active_users
+        FROM aggregates.user_engagement_levels
+        WHERE engagement_level IN ('POWER_USER', 'ACTIVE');
+    """, ('aggregates.user_engagement_levels',), ttl=3600),
+)
+
+# The daily and monthly cards are normally computed from the table windows;
+# these parts only run while a window is unavailable.
+SUMMARY_DAILY_PART = summary_parts.register('summary.daily', """
+        SELECT 
+            (SELECT dau FROM aggregates.daily_metrics ORDER BY metric_date DESC LIMIT 1) as current_dau,
+            SUM(posts_created) as posts_30d,
+            SUM(votes_cast) as votes_30d,
+            ROUND(AVG(engagement_rate), 2) as avg_engagement_rate
+        FROM aggregates.daily_metrics
+        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days';
+    """, ('aggregates.daily_metrics',), ttl=600)
+SUMMARY_CURRENT_MAU_PART = summary_parts.register('summary.current_mau', """
+        SELECT mau as current_mau
+        FROM aggregates.monthly_metrics
+        ORDER BY metric_month DESC
+        LIMIT 1;
+    """, ('aggregates.monthly_metrics',), ttl=3600)
+
+def daily_summary(window):
+    """The summary.daily columns, from the daily_metrics window"""
+    rows = window.since(30, database_today())
+    engagement_rate = window.aggregate('avg', 'engagement_rate', rows)
+    return {
+        'current_dau': window.latest('dau'),
+        'posts_30d': window.aggregate('sum', 'posts_created', rows),
+        'votes_30d': window.aggregate('sum', 'votes_cast', rows),
+        'avg_engagement_rate': None if engagement_rate is None else round(engagement_rate, 2),
+    }
+
 @app.route('/api/summary/stats')
+@cached_endpoint('core.unified_users', 'aggregates.daily_metrics',
+                 'aggregates.monthly_metrics', 'aggregates.user_engagement_levels',
+                 ttl=SUMMARY_RESPONSE_TTL, max_stale=1800)
 def summary_stats():
     """Get key summary statistics"""
-    query = """
-        SELECT 
-            (SELECT COUNT(*) FROM core.unified_users WHERE deleted_at IS NULL AND is_test_account = FALSE) as total_users,
-            (SELECT dau FROM aggregates.daily_metrics ORDER BY metric_date DESC LIMIT 1) as current_dau,
-            (SELECT mau FROM aggregates.monthly_metrics ORDER BY metric_month DESC LIMIT 1) as current_mau,
-            (SELECT COUNT(*) FROM aggregates.user_engagement_levels WHERE engagement_level IN ('POWER_USER', 'ACTIVE')) as active_users,
-            (SELECT SUM(posts_created) FROM aggregates.daily_metrics WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days') as posts_30d,
-            (SELECT SUM(votes_cast) FROM aggregates.daily_metrics WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days') as votes_30d,
-            (SELECT ROUND(AVG(engagement_rate), 2) FROM aggregates.daily_metrics WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days') as avg_engagement_rate;
-    """
-    return jsonify(execute_query(query)[0])
+    daily = daily_metrics_window.current_snapshot()
+    monthly = monthly_metrics_window.current_snapshot()
+    parts = SUMMARY_STATS_PARTS
+    if daily is None:
+        parts += (SUMMARY_DAILY_PART,)
+    if monthly is None:
+        parts += (SUMMARY_CURRENT_MAU_PART,)
+    stats, stale_age = summary_parts.merged(parts)
+    mark_stale_data(stale_age)
+    if daily is not None:
+        stats.update(daily_summary(daily))
+    if monthly is not None:
+        stats['current_mau'] = monthly.latest('mau')
+    return json_response(stats)
 
 # ============================================================================
 # POST/ENGAGEMENT METRICS
 # ============================================================================
 
-@app.route('/api/engagement/post-frequency')
-def post_frequency():
-    """Get daily post frequency metrics"""
-    query = """
-        SELECT 
-            metric_date as date,
-            posts_created,
-            unique_posters,
-            avg_posts_per_poster
-        FROM aggregates.post_metrics
-        ORDER BY metric_date DESC
-        LIMIT 30;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/engagement/post-engagement-rate')
-def post_engagement_rate():
-    """Get post engagement rates (both comment and vote based)"""
-    query = """
-        SELECT 
-            metric_date as date,
-            posts_created,
-            comments_created,
-            total_votes,
-            avg_comments_per_post,
-            avg_votes_per_post,
-            engagement_rate_comments_pct,
-            engagement_rate_votes_pct
-        FROM aggregates.post_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/engagement/content-analysis')
-def content_analysis():
-    """Get content type breakdown"""
-    query = """
-        SELECT 
-            metric_date as date,
-            text_posts,
-            link_posts,
-            media_posts,
-            posts_created as total_posts
-        FROM aggregates.post_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
+metric_route(
+    'post_frequency', '/api/engagement/post-frequency', 'aggregates.post_metrics',
+    ('metric_date AS date', 'posts_created', 'unique_posters', 'avg_posts_per_poster'),
+    description='Get daily post frequency metrics',
+    date_column='metric_date', grain='day', limit=30,
+    resample={'sum': ('posts_created',)},
+    variants=('format=columnar',), window=post_metrics_window,
+    modal={'post_frequency': 'Post Frequency'},
+)
+
+metric_route(
+    'post_engagement_rate', '/api/engagement/post-engagement-rate', 'aggregates.post_metrics',
+    ('metric_date AS date', 'posts_created', 'comments_created', 'total_votes',
+     'avg_comments_per_post', 'avg_votes_per_post', 'engagement_rate_comments_pct',
+     'engagement_rate_votes_pct'),
+    description='Get post engagement rates (both comment and vote based)',
+    date_column='metric_date', grain='day',
+    resample={'sum': ('posts_created', 'comments_created', 'total_votes')},
+    variants=('format=columnar',), window=post_metrics_window,
+    modal={'post_engagement': 'Post Engagement Rate (Votes & Comments)'},
+)
+
+metric_route(
+    'content_analysis', '/api/engagement/content-analysis', 'aggregates.post_metrics',
+    ('metric_date AS date', 'text_posts', 'link_posts', 'media_posts',
+     'posts_created AS total_posts'),
+    description='Get content type breakdown',
+    date_column='metric_date', grain='day',
+    resample={'sum': ('text_posts', 'link_posts', 'media_posts', 'total_posts')},
+    window=post_metrics_window,
+)
 
 # ============================================================================
 # FINDER ANALYTICS
 # ============================================================================
 
-@app.route('/api/finder/searches')
-def finder_searches():
-    """Get finder search activity"""
-    query = """
-        SELECT 
-            metric_date as date,
-            total_votes as searches,
-            unique_voters as unique_searchers,
-            profiles_viewed
-        FROM aggregates.finder_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/finder/engagement')
-def finder_engagement():
-    """Get finder engagement summary"""
-    query = """
-        SELECT 
-            SUM(total_votes) as total_searches,
-            SUM(profiles_viewed) as total_views,
-            COUNT(DISTINCT unique_voters) as active_searchers
-        FROM aggregates.finder_metrics;
-    """
-    return jsonify(execute_query(query)[0])
+metric_route(
+    'finder_searches', '/api/finder/searches', 'aggregates.finder_metrics',
+    ('metric_date AS date', 'total_votes AS searches', 'unique_voters AS unique_searchers',
+     'profiles_viewed'),
+    description='Get finder search activity',
+    date_column='metric_date', grain='day',
+    resample={'sum': ('searches', 'profiles_viewed')},
+    variants=('format=columnar',),
+    modal={'finder_searches': 'Finder Searches & Profile Views'},
+)
+
+metric_route(
+    'finder_engagement', '/api/finder/engagement', 'aggregates.finder_metrics',
+    ('SUM(total_votes) AS total_searches', 'SUM(profiles_viewed) AS total_views',
+     'COUNT(DISTINCT unique_voters) AS active_searchers'),
+    description='Get finder engagement summary',
+    response='row',
+)
 
 # ============================================================================
 # COLLECTIONS ANALYTICS
 # ============================================================================
 
-@app.route('/api/collections/created')
-def collections_created():
-    """Get collections created over time"""
-    query = """
-        SELECT 
-            metric_date as date,
-            total_collections_created,
-            unique_collectors
-        FROM aggregates.collection_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/collections/created-by-privacy')
-def collections_by_privacy():
-    """Get collections breakdown by privacy"""
-    query = """
-        SELECT 
-            metric_date as date,
-            public_collections,
-            private_collections,
-            total_collections_created
-        FROM aggregates.collection_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/collections/summary')
-def collections_summary():
-    """Get collections summary stats"""
-    query = """
-        SELECT 
-            SUM(total_collections_created) as total_collections,
-            SUM(public_collections) as public_count,
-            SUM(private_collections) as private_count,
-            COUNT(DISTINCT unique_collectors) as total_collectors
-        FROM aggregates.collection_metrics;
-    """
-    return jsonify(execute_query(query)[0])
+metric_route(
+    'collections_created', '/api/collections/created', 'aggregates.collection_metrics',
+    ('metric_date AS date', 'total_collections_created', 'unique_collectors'),
+    description='Get collections created over time',
+    date_column='metric_date', grain='day',
+    resample={'sum': ('total_collections_created',)},
+)
+
+metric_route(
+    'collections_by_privacy', '/api/collections/created-by-privacy',
+    'aggregates.collection_metrics',
+    ('metric_date AS date', 'public_collections', 'private_collections',
+     'total_collections_created'),
+    description='Get collections breakdown by privacy',
+    date_column='metric_date', grain='day',
+    resample={'sum': ('public_collections', 'private_collections',
+                      'total_collections_created')},
+    variants=('format=columnar',),
+    modal={'collections': 'Collections Created by Privacy Type'},
+)
+
+metric_route(
+    'collections_summary', '/api/collections/summary', 'aggregates.collection_metrics',
+    ('SUM(total_collections_created) AS total_collections',
+     'SUM(public_collections) AS public_count', 'SUM(private_collections) AS private_count',
+     'COUNT(DISTINCT unique_collectors) AS total_collectors'),
+    description='Get collections summary stats',
+    response='row',
+)
 
 # ============================================================================
 # PROFILE METRICS
 # ============================================================================
 
-@app.route('/api/profile/completion-rate')
-def profile_completion():
-    """Get profile completion statistics"""
-    query = """
-        SELECT 
-            metric_date as date,
-            avg_profile_completion_score,
-            profiles_with_headline,
-            profiles_with_linkedin,
-            profiles_with_location,
-            profiles_with_experience,
-            profiles_with_education
-        FROM aggregates.profile_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/profile/update-frequency')
-def profile_updates():
-    """Get profile update activity"""
-    query = """
-        SELECT 
-            metric_date as date,
-            profiles_updated,
-            experiences_added,
-            education_added
-        FROM aggregates.profile_metrics
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
+metric_route(
+    'profile_completion', '/api/profile/completion-rate', 'aggregates.profile_metrics',
+    ('metric_date AS date', 'avg_profile_completion_score', 'profiles_with_headline',
+     'profiles_with_linkedin', 'profiles_with_location', 'profiles_with_experience',
+     'profiles_with_education'),
+    description='Get profile completion statistics',
+    date_column='metric_date', grain='day',
+    modal={'profile_completion': 'Profile Completion Breakdown'},
+)
+
+metric_route(
+    'profile_updates', '/api/profile/update-frequency', 'aggregates.profile_metrics',
+    ('metric_date AS date', 'profiles_updated', 'experiences_added', 'education_added'),
+    description='Get profile update activity',
+    date_column='metric_date', grain='day',
+    resample={'sum': ('profiles_updated', 'experiences_added', 'education_added')},
+)
 
 # ============================================================================
 # FUNNEL METRICS
 # ============================================================================
 
-@app.route('/api/funnel/account-creation')
-def account_funnel():
-    """Get account creation funnel"""
-    query = """
-        SELECT 
-            total_signups,
-            profiles_with_basic_info,
-            profiles_with_experience,
-            profiles_with_education,
-            profiles_completed,
-            profiles_activated,
-            basic_info_rate,
-            experience_rate,
-            education_rate,
-            completion_rate,
-            activation_rate
-        FROM aggregates.funnel_metrics
-        ORDER BY metric_date DESC
-        LIMIT 1;
-    """
-    return jsonify(execute_query(query)[0])
+metric_route(
+    'account_funnel', '/api/funnel/account-creation', 'aggregates.funnel_metrics',
+    ('total_signups', 'profiles_with_basic_info', 'profiles_with_experience',
+     'profiles_with_education', 'profiles_completed', 'profiles_activated', 'basic_info_rate',
+     'experience_rate', 'education_rate', 'completion_rate', 'activation_rate'),
+    description='Get account creation funnel',
+    date_column='metric_date', grain='day', limit=1,
+    response='row',
+    modal={'account_funnel': 'Account Creation Funnel',
+           'account_funnel_pyramid': 'Account Creation Funnel (Pyramid)'},
+)
 
 # ============================================================================
 # WEEKLY METRICS
 # ============================================================================
 
-@app.route('/api/new-users/weekly')
-def new_users_weekly():
-    """Get weekly new user signups"""
-    query = """
-        SELECT 
-            DATE_TRUNC('week', metric_date) as week,
-            SUM(new_signups) as new_users
-        FROM aggregates.daily_metrics
-        GROUP BY DATE_TRUNC('week', metric_date)
-        ORDER BY week DESC
-        LIMIT 12;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/active-users/weekly')
-def active_users_weekly():
-    """Get weekly active users"""
-    query = """
-        SELECT 
-            DATE_TRUNC('week', metric_date) as week,
-            MAX(dau) as peak_dau,
-            AVG(dau) as avg_dau
-        FROM aggregates.daily_metrics
-        GROUP BY DATE_TRUNC('week', metric_date)
-        ORDER BY week DESC
-        LIMIT 12;
-    """
-    return jsonify(execute_query(query))
-
-# ============================================================================
-# SQL QUERIES API - For SQL Modal Display
-# ============================================================================
+metric_route(
+    'new_users_weekly', '/api/new-users/weekly', 'aggregates.daily_metrics',
+    ('SUM(new_signups) AS new_users',),
+    description='Get weekly new user signups',
+    date_column='metric_date', grain='day', rollup='week', limit=12,
+    variants=('format=columnar',), window=daily_metrics_window,
+    modal={'new_users_weekly': 'New Users Weekly'},
+)
+
+metric_route(
+    'active_users_weekly', '/api/active-users/weekly', 'aggregates.daily_metrics',
+    ('MAX(dau) AS peak_dau', 'AVG(dau) AS avg_dau'),
+    description='Get weekly active users',
+    date_column='metric_date', grain='day', rollup='week', limit=12,
+    variants=('format=columnar',), window=daily_metrics_window,
+    modal={'active_users_weekly': 'Active Users Weekly'},
+)
 
 # ============================================================================
 # NEO4J GRAPH ANALYTICS - FROM AGGREGATES
 # ============================================================================
 
 @app.route('/api/graph/connection-recommendations')
+@cached_endpoint('aggregates.connection_recommendations', variants=GRAPH_PAGE_VARIANTS)
 def graph_connection_recommendations():
-    """Get connection recommendations (People You Should Know)"""
-    query = """
+    """Get connection recommendations (People You Should Know)
+
+    ?limit= / ?cursor= page through every recommendation by
+    (recommendation_score, user_id, recommended_user_id).
+    """
+    select = """
         SELECT 
             user_id,
             recommended_user_id,
@@ -529,15 +1256,18 @@ def graph_connection_recommendations():
             common_schools,
             recommendation_reason
         FROM aggregates.connection_recommendations
+    """
+    if is_paginated_request():
+        return keyset_page_response(
+            select, ('recommendation_score', 'user_id', 'recommended_user_id'))
+    query = select + """
         ORDER BY recommendation_score DESC
         LIMIT 500;
     """
-    return jsonify(execute_query(query))
+    return json_response(execute_query(query))
 
-@app.route('/api/graph/connection-recommendations/<int:user_id>')
-def graph_connection_recommendations_for_user(user_id):
-    """Get connection recommendations for specific user"""
-    query = f"""
+CONNECTION_RECOMMENDATIONS_FOR_USER = statements.register(
+    'connection_recommendations_for_user', """
         SELECT 
             user_id,
             recommended_user_id,
@@ -547,13 +1277,22 @@ def graph_connection_recommendations_for_user(user_id):
             common_schools,
             recommendation_reason
         FROM aggregates.connection_recommendations
-        WHERE user_id = {user_id}
+        WHERE user_id = $1
         ORDER BY recommendation_score DESC
-        LIMIT 50;
-    """
-    return jsonify(execute_query(query))
+        LIMIT 50
+    """, ('integer',))
+
+@app.route('/api/graph/connection-recommendations/<int:user_id>')
+@cached_endpoint('aggregates.connection_recommendations')
+def graph_connection_recommendations_for_user(user_id):
+    """Get connection recommendations for specific user"""
+    recommendations = user_recommendations.snapshot()
+    if recommendations is not None:
+        return json_response(recommendations.rows_for(user_id))
+    return json_response(execute_prepared(CONNECTION_RECOMMENDATIONS_FOR_USER, (user_id,)))
 
 @app.route('/api/graph/company-network')
+@cached_endpoint('aggregates.company_network_map')
 def graph_company_network():
     """Get company network map showing connections between companies"""
     query = """
@@ -568,12 +1307,10 @@ def graph_company_network():
         FROM aggregates.company_network_map
         ORDER BY shared_employee_count DESC;
     """
-    return jsonify(execute_query(query))
+    return stream_response(query)
 
-@app.route('/api/graph/company-network/<company_name>')
-def graph_company_network_for_company(company_name):
-    """Get company network connections for specific company"""
-    query = f"""
+COMPANY_NETWORK_FOR_COMPANY = statements.register(
+    'company_network_for_company', """
         SELECT 
             company_id_1,
             company_id_2,
@@ -582,17 +1319,68 @@ def graph_company_network_for_company(company_name):
             shared_employee_count,
             network_strength_score
         FROM aggregates.company_network_map
-        WHERE company_name_1 ILIKE '%{company_name}%' 
-           OR company_name_2 ILIKE '%{company_name}%'
+        WHERE company_name_1 ILIKE $1 
+           OR company_name_2 ILIKE $1
         ORDER BY shared_employee_count DESC
-        LIMIT 100;
-    """
-    return jsonify(execute_query(query))
+        LIMIT 100
+    """, ('text',))
+
+COMPANY_NETWORK_FOR_COMPANY_IDS = statements.register(
+    'company_network_for_company_ids', """
+        SELECT 
+            company_id_1,
+            company_id_2,
+            company_name_1,
+            company_name_2,
+            shared_employee_count,
+            network_strength_score
+        FROM aggregates.company_network_map
+        WHERE company_id_1 = ANY($1)
+           OR company_id_2 = ANY($1)
+        ORDER BY shared_employee_count DESC
+        LIMIT 100
+    """, ('text[]',))
+
+@app.route('/api/graph/company-network/<company_name>')
+@cached_endpoint('aggregates.company_network_map')
+def graph_company_network_for_company(company_name):
+    """Get company network connections for specific company"""
+    names = company_names.snapshot()
+    if names is None:
+        # Index disabled (table too large): substring match in Postgres, with
+        # % and _ in the name matched literally
+        pattern = f'%{escape_like(company_name)}%'
+        return json_response(execute_prepared(COMPANY_NETWORK_FOR_COMPANY, (pattern,)))
+
+    # Resolve the name to company ids in memory, then fetch only their edges
+    company_ids = names.matching_ids(company_name)
+    if not company_ids:
+        return json_response([])
+    return json_response(execute_prepared(COMPANY_NETWORK_FOR_COMPANY_IDS, (company_ids,)))
+
+@app.route('/api/graph/companies/autocomplete')
+def graph_company_autocomplete():
+    """Company name suggestions for ?q= from the in-memory name index"""
+    text = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    if not text:
+        return json_response([])
+    names = company_names.snapshot()
+    if names is None and not company_names.loaded:
+        return jsonify({'error': 'Company name index is loading'}), 503, {'Retry-After': '1'}
+    if names is None:
+        return jsonify({'error': 'Company name index is disabled'}), 503
+    return json_response(names.autocomplete(text, limit))
 
 @app.route('/api/graph/skills-matching')
+@cached_endpoint('aggregates.skills_matching_scores', variants=GRAPH_PAGE_VARIANTS)
 def graph_skills_matching():
-    """Get skills matching scores for all users and roles"""
-    query = """
+    """Get skills matching scores for all users and roles
+
+    ?limit= / ?cursor= page through every score by
+    (proficiency_score, user_id, role_id).
+    """
+    select = """
         SELECT 
             user_id,
             role_id,
@@ -601,15 +1389,17 @@ def graph_skills_matching():
             proficiency_score,
             similar_user_count
         FROM aggregates.skills_matching_scores
+    """
+    if is_paginated_request():
+        return keyset_page_response(select, ('proficiency_score', 'user_id', 'role_id'))
+    query = select + """
         ORDER BY proficiency_score DESC
         LIMIT 500;
     """
-    return jsonify(execute_query(query))
+    return json_response(execute_query(query))
 
-@app.route('/api/graph/skills-matching/<int:user_id>')
-def graph_skills_matching_for_user(user_id):
-    """Get skills matching scores for specific user"""
-    query = f"""
+SKILLS_MATCHING_FOR_USER = statements.register(
+    'skills_matching_for_user', """
         SELECT 
             user_id,
             role_id,
@@ -618,239 +1408,431 @@ def graph_skills_matching_for_user(user_id):
             proficiency_score,
             similar_user_count
         FROM aggregates.skills_matching_scores
-        WHERE user_id = {user_id}
-        ORDER BY proficiency_score DESC;
-    """
-    return jsonify(execute_query(query))
+        WHERE user_id = $1
+        ORDER BY proficiency_score DESC
+    """, ('integer',))
 
-@app.route('/api/graph/career-paths')
-def graph_career_paths():
-    """Get career path patterns showing common progressions"""
-    query = """
-        SELECT 
-            path_vector,
-            role_sequence,
-            user_count,
-            user_ids,
-            avg_years_per_role
-        FROM aggregates.career_path_patterns
-        ORDER BY user_count DESC;
-    """
-    return jsonify(execute_query(query))
+@app.route('/api/graph/skills-matching/<int:user_id>')
+@cached_endpoint('aggregates.skills_matching_scores')
+def graph_skills_matching_for_user(user_id):
+    """Get skills matching scores for specific user"""
+    skills = user_skills.snapshot()
+    if skills is not None:
+        return json_response(skills.rows_for(user_id))
+    return json_response(execute_prepared(SKILLS_MATCHING_FOR_USER, (user_id,)))
+
+metric_route(
+    'graph_career_paths', '/api/graph/career-paths', 'aggregates.career_path_patterns',
+    ('path_vector', 'role_sequence', 'user_count', 'user_ids', 'avg_years_per_role'),
+    description='Get career path patterns showing common progressions',
+    order_by='user_count DESC',
+    response='stream',
+)
+
+metric_route(
+    'graph_location_networks', '/api/graph/location-networks',
+    'aggregates.location_based_networks',
+    ('location_id', 'country', 'user_count', 'company_diversity_score', 'role_diversity_score',
+     'top_companies', 'top_roles'),
+    description='Get location-based professional networks',
+    order_by='user_count DESC',
+    response='rows',
+)
+
+metric_route(
+    'graph_alumni_networks', '/api/graph/alumni-networks', 'aggregates.alumni_networks',
+    ('school_id', 'school_name', 'degree_id', 'degree_name', 'alumni_count',
+     'graduation_year_min', 'graduation_year_max', 'current_companies', 'current_roles'),
+    description='Get alumni networks by school and degree',
+    where='alumni_count > 0', order_by='alumni_count DESC',
+    response='stream',
+)
+
+metric_route(
+    'graph_project_collaborations', '/api/graph/project-collaborations',
+    'aggregates.project_collaboration_graph',
+    ('project_id', 'project_name', 'company_id', 'company_name', 'user_count', 'role_ids',
+     'collaboration_strength'),
+    description='Get project collaboration networks',
+    where='user_count > 0', order_by='user_count DESC',
+    response='stream',
+)
 
-@app.route('/api/graph/location-networks')
-def graph_location_networks():
-    """Get location-based professional networks"""
-    query = """
-        SELECT 
-            location_id,
-            country,
-            user_count,
-            company_diversity_score,
-            role_diversity_score,
-            top_companies,
-            top_roles
-        FROM aggregates.location_based_networks
-        ORDER BY user_count DESC;
-    """
-    return jsonify(execute_query(query))
+# ============================================================================
+# KRATOS AUTHENTICATION & SECURITY ANALYTICS
+# ============================================================================
 
-@app.route('/api/graph/alumni-networks')
-def graph_alumni_networks():
-    """Get alumni networks by school and degree"""
-    query = """
+metric_route(
+    'kratos_daily_logins', '/api/kratos/daily-logins', 'aggregates.kratos_daily_logins',
+    ('metric_date', 'unique_users_logged_in', 'total_sessions', 'mfa_sessions',
+     'password_only_sessions', 'mfa_session_rate', 'avg_session_minutes', 'mobile_users',
+     'desktop_users'),
+    description='Get daily login activity metrics',
+    date_column='metric_date', grain='day', days=30,
+    resample={'sum': ('total_sessions', 'mfa_sessions', 'password_only_sessions')},
+    variants=('format=columnar',), window=kratos_daily_logins_window,
+    modal={'kratos_daily_logins': 'Daily Login Activity (Last 30 Days)'},
+)
+
+metric_route(
+    'kratos_user_segments', '/api/kratos/user-segments', 'aggregates.kratos_user_activity',
+    ('recency_segment', 'COUNT(*) AS user_count', 'AVG(total_sessions) AS avg_sessions'),
+    description='Get user activity segmentation by recency',
+    group_by='recency_segment',
+    order_by="""
+        CASE recency_segment
+            WHEN 'Active (< 7 days)' THEN 1
+            WHEN 'Recent (7-30 days)' THEN 2
+            WHEN 'At Risk (30-90 days)' THEN 3
+            ELSE 4
+        END
+    """,
+    response='rows',
+    modal={'kratos_user_segments': 'User Activity Segments (Recency)'},
+)
+
+metric_route(
+    'kratos_login_frequency', '/api/kratos/login-frequency',
+    'aggregates.kratos_login_frequency_segments',
+    ('frequency_segment', 'user_count', 'avg_logins', 'avg_days_active',
+     'avg_logins_per_active_day'),
+    description='Get login frequency distribution',
+    order_by='user_count DESC',
+    response='rows',
+    modal={'kratos_login_frequency': 'Login Frequency Distribution (30 Days)'},
+)
+
+metric_route(
+    'kratos_mfa_adoption', '/api/kratos/mfa-adoption', 'aggregates.kratos_mfa_adoption',
+    ('metric_month', 'totp_users', 'webauthn_users', 'password_only_users',
+     'mfa_adoption_rate'),
+    description='Get MFA adoption trends over time',
+    date_column='metric_month', grain='month',
+    variants=('format=columnar',),
+    modal={'kratos_mfa_adoption': 'MFA Adoption Over Time'},
+)
+
+metric_route(
+    'kratos_activation_funnel', '/api/kratos/activation-funnel',
+    'aggregates.kratos_activation_funnel',
+    ('signup_week', 'new_identities', 'activated_within_1_day', 'activated_within_7_days',
+     'activated_within_30_days', 'day1_activation_rate', 'week1_activation_rate',
+     'month1_activation_rate', 'avg_hours_to_first_login'),
+    description='Get signup to first login activation funnel',
+    date_column='signup_week', grain='week',
+    resample={'sum': ('new_identities', 'activated_within_1_day',
+                      'activated_within_7_days', 'activated_within_30_days')},
+    variants=('format=columnar',),
+    modal={'kratos_activation_funnel': 'Signup to First Login (Activation)'},
+)
+
+metric_route(
+    'kratos_security_alerts', '/api/kratos/security-alerts',
+    'aggregates.kratos_security_alerts',
+    ('identity_id', 'risk_level', 'session_count_7d', 'unique_ips_7d', 'active_days_7d',
+     'flag_multiple_ips', 'flag_high_volume'),
+    description='Get security alerts for anomalous login patterns',
+    order_by='unique_ips_7d DESC, session_count_7d DESC', limit=50,
+    response='rows',
+)
+
+metric_route(
+    'kratos_hourly_patterns', '/api/kratos/hourly-patterns', 'aggregates.kratos_hourly_patterns',
+    ('hour_of_day', 'day_type', 'SUM(total_sessions) AS total_sessions',
+     'SUM(unique_users) AS unique_users', 'AVG(avg_session_minutes) AS avg_session_minutes'),
+    description='Get login patterns by hour and day type',
+    group_by='hour_of_day, day_type', order_by='hour_of_day',
+    response='rows',
+    modal={'kratos_hourly_patterns': 'Login Patterns by Hour of Day'},
+)
+
+metric_route(
+    'kratos_account_states', '/api/kratos/account-states', 'aggregates.kratos_account_states',
+    ('state', 'identity_count', 'percentage', 'new_in_last_30_days'),
+    description='Get account state distribution',
+    order_by='identity_count DESC',
+    response='rows',
+)
+
+KRATOS_SUMMARY_PARTS = (
+    summary_parts.register('kratos.users', """
         SELECT 
-            school_id,
-            school_name,
-            degree_id,
-            degree_name,
-            alumni_count,
-            graduation_year_min,
-            graduation_year_max,
-            current_companies,
-            current_roles
-        FROM aggregates.alumni_networks
-        WHERE alumni_count > 0
-        ORDER BY alumni_count DESC;
-    """
-    return jsonify(execute_query(query))
-
-@app.route('/api/graph/project-collaborations')
-def graph_project_collaborations():
-    """Get project collaboration networks"""
-    query = """
+            COUNT(*) as total_users,
+            COUNT(*) FILTER (WHERE recency_segment = 'Active (< 7 days)') as active_users_7d
+        FROM aggregates.kratos_user_activity;
+    """, ('aggregates.kratos_user_activity',), ttl=3600),
+    summary_parts.register('kratos.security_alerts', """
+        SELECT COUNT(*) as security_alerts_count
+        FROM aggregates.kratos_security_alerts;
+    """, ('aggregates.kratos_security_alerts',), ttl=3600),
+)
+
+# Only runs while kratos_daily_logins_window is unavailable
+KRATOS_LOGINS_PART = summary_parts.register('kratos.logins', """
         SELECT 
-            project_id,
-            project_name,
-            company_id,
-            company_name,
-            user_count,
-            role_ids,
-            collaboration_strength
-        FROM aggregates.project_collaboration_graph
-        WHERE user_count > 0
-        ORDER BY user_count DESC;
-    """
-    return jsonify(execute_query(query))
+            COALESCE(SUM(unique_users_logged_in) FILTER (
+                WHERE metric_date >= CURRENT_DATE - INTERVAL '7 days'), 0) as total_logins_7d,
+            COALESCE(AVG(mfa_session_rate), 0) as avg_mfa_rate
+        FROM aggregates.kratos_daily_logins
+        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days';
+    """, ('aggregates.kratos_daily_logins',), ttl=600)
+
+def kratos_logins_summary(window):
+    """The kratos.logins columns, from the kratos_daily_logins window"""
+    today = database_today()
+    return {
+        'total_logins_7d': window.aggregate(
+            'sum', 'unique_users_logged_in', window.since(7, today)) or 0,
+        'avg_mfa_rate': window.aggregate('avg', 'mfa_session_rate', window.since(30, today)) or 0,
+    }
+
+@app.route('/api/kratos/summary-stats')
+@cached_endpoint('aggregates.kratos_user_activity', 'aggregates.kratos_daily_logins',
+                 'aggregates.kratos_security_alerts', ttl=SUMMARY_RESPONSE_TTL, max_stale=1800)
+def kratos_summary_stats():
+    """Get key Kratos metrics for summary cards"""
+    logins = kratos_daily_logins_window.current_snapshot()
+    parts = KRATOS_SUMMARY_PARTS
+    if logins is None:
+        parts += (KRATOS_LOGINS_PART,)
+    stats, stale_age = summary_parts.merged(parts)
+    mark_stale_data(stale_age)
+    if logins is not None:
+        stats.update(kratos_logins_summary(logins))
+    return json_response([stats])
 
 # ============================================================================
-# KRATOS AUTHENTICATION & SECURITY ANALYTICS
+# BATCH API - Many endpoints in one round trip
 # ============================================================================
 
-@app.route('/api/kratos/daily-logins')
-def kratos_daily_logins():
-    """Get daily login activity metrics"""
-    query = """
-        SELECT 
-            metric_date,
-            unique_users_logged_in,
-            total_sessions,
-            mfa_sessions,
-            password_only_sessions,
-            mfa_session_rate,
-            avg_session_minutes,
-            mobile_users,
-            desktop_users
-        FROM aggregates.kratos_daily_logins
-        WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-        ORDER BY metric_date DESC;
-    """
-    return jsonify(execute_query(query))
+BATCH_MAX_ENDPOINTS = int(os.getenv('BATCH_MAX_ENDPOINTS', '64'))
 
-@app.route('/api/kratos/user-segments')
-def kratos_user_segments():
-    """Get user activity segmentation by recency"""
-    query = """
-        SELECT 
-            recency_segment,
-            COUNT(*) as user_count,
-            AVG(total_sessions) as avg_sessions
-        FROM aggregates.kratos_user_activity
-        GROUP BY recency_segment
-        ORDER BY 
-            CASE recency_segment
-                WHEN 'Active (< 7 days)' THEN 1
-                WHEN 'Recent (7-30 days)' THEN 2
-                WHEN 'At Risk (30-90 days)' THEN 3
-                ELSE 4
-            END;
-    """
-    return jsonify(execute_query(query))
+# Sub-requests of a batch run concurrently, bounded by the connection pool
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_CONCURRENCY', str(db_pool.max_size))),
+    thread_name_prefix='api-batch',
+)
 
-@app.route('/api/kratos/login-frequency')
-def kratos_login_frequency():
-    """Get login frequency distribution"""
-    query = """
-        SELECT 
-            frequency_segment,
-            user_count,
-            avg_logins,
-            avg_days_active,
-            avg_logins_per_active_day
-        FROM aggregates.kratos_login_frequency_segments
-        ORDER BY user_count DESC;
-    """
-    return jsonify(execute_query(query))
+def dispatch_internal(endpoint, environ_overrides=None):
+    """Run an /api/<endpoint> view in its own request context.
 
-@app.route('/api/kratos/mfa-adoption')
-def kratos_mfa_adoption():
-    """Get MFA adoption trends over time"""
-    query = """
-        SELECT 
-            metric_month,
-            totp_users,
-            webauthn_users,
-            password_only_users,
-            mfa_adoption_rate
-        FROM aggregates.kratos_mfa_adoption
-        ORDER BY metric_month DESC;
+    endpoint is the part after /api/, optionally with a query string
+    (e.g. 'active-users/daily' or 'graph/skills-matching?limit=50').
+    Only cached data routes may be dispatched; anything else is a 404.
     """
-    return jsonify(execute_query(query))
-
-@app.route('/api/kratos/activation-funnel')
-def kratos_activation_funnel():
-    """Get signup to first login activation funnel"""
-    query = """
-        SELECT 
-            signup_week,
-            new_identities,
-            activated_within_1_day,
-            activated_within_7_days,
-            activated_within_30_days,
-            day1_activation_rate,
-            week1_activation_rate,
-            month1_activation_rate,
-            avg_hours_to_first_login
-        FROM aggregates.kratos_activation_funnel
-        ORDER BY signup_week DESC;
+    parts = urlsplit('/api/' + endpoint.lstrip('/'))
+    environ = EnvironBuilder(path=parts.path, query_string=parts.query,
+                             environ_overrides=environ_overrides).get_environ()
+    with app.request_context(environ):
+        rule = request.url_rule
+        view = app.view_functions.get(rule.endpoint) if rule is not None else None
+        if view is None or not hasattr(view, 'cache_sources'):
+            return app.response_class(
+                json.dumps({'error': f'Unknown endpoint: {endpoint}'}),
+                status=404, mimetype='application/json',
+            )
+        return app.make_response(app.dispatch_request())
+
+def _batch_endpoint_name(endpoint):
+    """The view name of a batch sub-request, as /metrics labels it"""
+    try:
+        return app.url_map.bind('').match(urlsplit('/api/' + endpoint.lstrip('/')).path)[0]
+    except HTTPException:
+        return 'unmatched'
+
+def _dispatch_for_batch(endpoint):
+    # dispatch_internal skips the request hooks, so the sub-request is timed
+    # here, under its own endpoint
+    timings = metrics.begin_request()
+    try:
+        response = dispatch_internal(endpoint)
+    except HTTPException as e:
+        response = app.response_class(json.dumps({'error': e.description}),
+                                      status=e.code, mimetype='application/json')
+    except Exception as e:
+        app.logger.exception('Batch sub-request failed: %s', endpoint)
+        response = app.response_class(json.dumps({'error': str(e)}),
+                                      status=500, mimetype='application/json')
+    # Read streamed bodies now, so their queries count for this sub-request
+    size = len(response.get_data())
+    request_metrics.finish(timings, _batch_endpoint_name(endpoint), 'GET',
+                           response.status_code, size)
+    return response
+
+@app.route('/api/batch', methods=['GET', 'POST'])
+def batch():
+    """Return several endpoints in one response.
+
+    POST {"endpoints": ["summary/stats", "new-users/monthly", ...]} or
+    GET /api/batch?endpoint=summary/stats&endpoint=new-users/monthly.
+    Duplicates are fetched once; sub-requests run concurrently.
     """
-    return jsonify(execute_query(query))
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or {}
+        endpoints = payload.get('endpoints') or []
+    else:
+        endpoints = request.args.getlist('endpoint')
+
+    if not isinstance(endpoints, list) or not all(isinstance(e, str) for e in endpoints):
+        return jsonify({'error': 'endpoints must be a list of strings'}), 400
+    unique = list(dict.fromkeys(endpoints))
+    if len(unique) > BATCH_MAX_ENDPOINTS:
+        return jsonify({'error': f'At most {BATCH_MAX_ENDPOINTS} endpoints per batch'}), 400
+
+    # Routes reading the same rows of a table share one query
+    prefetch_metrics(unique)
+    # Each sub-request runs in a copy of this context, with its own timings
+    responses = [future.result() for future in
+                 [batch_executor.submit(contextvars.copy_context().run,
+                                        _dispatch_for_batch, endpoint)
+                  for endpoint in unique]]
+
+    # Splice the already-serialized bodies together rather than re-parsing them
+    results, errors = [], {}
+    for endpoint, response in zip(unique, responses):
+        if response.status_code == 200:
+            results.append(json.dumps(endpoint).encode() + b':' + response.get_data().strip())
+        else:
+            body = response.get_json(silent=True) or {}
+            errors[endpoint] = body.get('error', f'HTTP {response.status_code}')
+    body = (b'{"results":{' + b','.join(results) + b'},"errors":'
+            + json.dumps(errors).encode() + b'}')
+    return app.response_class(body, mimetype='application/json')
 
-@app.route('/api/kratos/security-alerts')
-def kratos_security_alerts():
-    """Get security alerts for anomalous login patterns"""
-    query = """
-        SELECT 
-            identity_id,
-            risk_level,
-            session_count_7d,
-            unique_ips_7d,
-            active_days_7d,
-            flag_multiple_ips,
-            flag_high_volume
-        FROM aggregates.kratos_security_alerts
-        ORDER BY unique_ips_7d DESC, session_count_7d DESC
-        LIMIT 50;
-    """
-    return jsonify(execute_query(query))
+# ============================================================================
+# CACHE PRE-WARMING
+# ============================================================================
 
-@app.route('/api/kratos/hourly-patterns')
-def kratos_hourly_patterns():
-    """Get login patterns by hour and day type"""
-    query = """
-        SELECT 
-            hour_of_day,
-            day_type,
-            SUM(total_sessions) as total_sessions,
-            SUM(unique_users) as unique_users,
-            AVG(avg_session_minutes) as avg_session_minutes
-        FROM aggregates.kratos_hourly_patterns
-        GROUP BY hour_of_day, day_type
-        ORDER BY hour_of_day;
-    """
-    return jsonify(execute_query(query))
+def prewarm_endpoints():
+    """Every cached /api route without URL parameters (dashboard + graph pages)"""
+    endpoints = []
+    for rule in app.url_map.iter_rules():
+        view = app.view_functions.get(rule.endpoint)
+        if rule.arguments or not hasattr(view, 'cache_sources'):
+            continue
+        endpoint = rule.rule[len('/api/'):]
+        endpoints.append(endpoint)
+        endpoints.extend(f'{endpoint}?{variant}' for variant in view.cache_variants)
+    return sorted(endpoints)
+
+def prewarm_refresh(endpoint):
+    """Rebuild one endpoint's cache entry, bypassing any fresh entry"""
+    response = dispatch_internal(endpoint,
+                                 environ_overrides={CACHE_REFRESH_ENVIRON_KEY: True})
+    if response.is_streamed:
+        # Drain the stream so it runs (and caches itself if small enough)
+        for _ in response.iter_encoded():
+            pass
+        response.close()
+    return response.status_code
+
+cache_prewarmer = CachePrewarmer.from_env(
+    prewarm_endpoints,
+    prewarm_refresh,
+    prepare=partial(prefetch_metrics, refresh=True),
+    poll=lambda: data_watermark.current(()),
+    poll_interval=data_watermark.check_interval,
+)
+data_watermark.add_listener(cache_prewarmer.on_watermark_change)
+
+def start_background_workers():
+    """Start per-process background work (idempotent)"""
+    if os.getenv('CACHE_PREWARM_ENABLED', '1') != '0' and result_cache.enabled:
+        cache_prewarmer.start()
+    for index in memory_indexes:
+        index.warm()
+
+@app.before_request
+def _ensure_background_workers():
+    # Servers that import the app (gunicorn etc.) never run __main__, so the
+    # first request in each worker process starts its background threads.
+    start_background_workers()
 
-@app.route('/api/kratos/account-states')
-def kratos_account_states():
-    """Get account state distribution"""
-    query = """
-        SELECT 
-            state,
-            identity_count,
-            percentage,
-            new_in_last_30_days
-        FROM aggregates.kratos_account_states
-        ORDER BY identity_count DESC;
-    """
-    return jsonify(execute_query(query))
+# ============================================================================
+# ADMIN / OPERATIONS
+# ============================================================================
 
-@app.route('/api/kratos/summary-stats')
-def kratos_summary_stats():
-    """Get key Kratos metrics for summary cards"""
-    query = """
-        SELECT 
-            (SELECT COUNT(*) FROM aggregates.kratos_user_activity) as total_users,
-            (SELECT COUNT(*) FROM aggregates.kratos_user_activity 
-             WHERE recency_segment = 'Active (< 7 days)') as active_users_7d,
-            (SELECT COALESCE(SUM(unique_users_logged_in), 0) 
-             FROM aggregates.kratos_daily_logins 
-             WHERE metric_date >= CURRENT_DATE - INTERVAL '7 days') as total_logins_7d,
-            (SELECT COALESCE(AVG(mfa_session_rate), 0) 
-             FROM aggregates.kratos_daily_logins 
-             WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days') as avg_mfa_rate,
-            (SELECT COUNT(*) FROM aggregates.kratos_security_alerts) as security_alerts_count;
-    """
-    return jsonify(execute_query(query))
+@app.route('/api/admin/pool')
+def admin_pool_stats():
+    """Get connection pool statistics for this worker"""
+    return jsonify(db_pool.stats())
+
+@app.route('/api/admin/prewarm')
+def admin_prewarm_stats():
+    """Get cache pre-warm schedule and per-endpoint refresh durations"""
+    return jsonify(cache_prewarmer.stats())
+
+@app.route('/api/admin/queries')
+def admin_query_stats():
+    """Get query coalescing and prepared statement statistics for this worker"""
+    return jsonify({
+        'singleflight': query_flights.stats(),
+        'prepared_statements': statements.stats(),
+        'summary_parts': summary_parts.stats(),
+        'metric_registry': metric_registry.stats(),
+    })
+
+@app.route('/api/admin/cache')
+def admin_cache_stats():
+    """Get result cache statistics and the current data watermark"""
+    return jsonify({
+        'cache': result_cache.stats(),
+        'watermark': data_watermark.snapshot(),
+    })
+
+@app.route('/api/admin/cache/clear', methods=['POST'])
+def admin_cache_clear():
+    """Drop every cached response in this worker"""
+    result_cache.clear()
+    return jsonify({'cleared': True})
+
+@app.route('/api/admin/slow-queries')
+def admin_slow_queries():
+    """Get the most recent slow queries (newest first) with any captured plans"""
+    return jsonify({'stats': slow_queries.stats(), 'queries': slow_queries.entries()})
+
+@app.route('/api/admin/indexes')
+def admin_index_stats():
+    """Get build statistics for the in-memory lookup indexes"""
+    return jsonify({index.name: index.stats() for index in memory_indexes})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, cache and pool metrics for this worker in Prometheus text format"""
+    cache = result_cache.stats()
+    pool = db_pool.stats()
+    flights = query_flights.stats()
+    extra = [
+        ('cache_lookups_total', 'counter', 'Result cache lookups by outcome',
+         [({'outcome': outcome}, cache[outcome]) for outcome in ('hits', 'stale_hits', 'misses')]),
+        ('cache_hit_ratio', 'gauge', 'Share of lookups served from the result cache',
+         [({}, cache['hit_ratio'])]),
+        ('cache_entries', 'gauge', 'Responses held in the result cache', [({}, cache['entries'])]),
+        ('cache_bytes', 'gauge', 'Bytes held in the result cache', [({}, cache['bytes'])]),
+        ('cache_evictions_total', 'counter', 'Result cache LRU evictions',
+         [({}, cache['evictions'])]),
+        ('pool_connections', 'gauge', 'Database connections by state',
+         [({'state': 'idle'}, pool['idle']), ({'state': 'in_use'}, pool['in_use'])]),
+        ('pool_max_connections', 'gauge', 'Connection pool max_size', [({}, pool['max_size'])]),
+        ('pool_checkouts_total', 'counter', 'Connection checkouts', [({}, pool['checkouts'])]),
+        ('pool_checkout_timeouts_total', 'counter', 'Checkouts that hit the pool timeout',
+         [({}, pool['checkout_timeouts'])]),
+        ('pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection',
+         [({}, pool['wait_seconds_total'])]),
+        ('pool_connections_created_total', 'counter', 'Connections opened',
+         [({}, pool['connections_created'])]),
+        ('queries_total', 'counter', 'Queries by single-flight outcome',
+         [({'outcome': 'executed'}, flights['executions']),
+          ({'outcome': 'coalesced'}, flights['coalesced'])]),
+        ('slow_queries_total', 'counter', f'Queries slower than {slow_queries.threshold_ms:g} ms',
+         [({}, slow_queries.stats()['recorded'])]),
+        ('memory_index_rows', 'gauge', 'Rows loaded into each in-memory index',
+         [({'index': index.name}, index.stats()['rows']) for index in memory_indexes]),
+        ('process_resident_memory_bytes', 'gauge', 'Resident set size of this worker',
+         [({}, metrics.process_rss_bytes())]),
+    ]
+    return app.response_class(request_metrics.render(extra),
+                              mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 # ============================================================================
 # SQL QUERIES API - For SQL Modal Display
@@ -858,262 +1840,12 @@ def kratos_summary_stats():
 
 @app.route('/api/sql-queries')
 def get_sql_queries():
-    """Return all SQL queries for charts"""
-    queries = {
-        'new_users_monthly': {
-            'name': 'New Users Monthly',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_month as month,
-    new_signups,
-    total_users_end_of_month,
-    growth_rate_pct
-FROM aggregates.monthly_metrics
-ORDER BY metric_month DESC;'''
-        },
-        'growth_rate': {
-            'name': 'Monthly Growth Rate',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_month as month,
-    new_signups,
-    growth_rate_pct
-FROM aggregates.monthly_metrics
-ORDER BY metric_month DESC;'''
-        },
-        'dau': {
-            'name': 'Daily Active Users',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_date as date,
-    dau,
-    active_posters,
-    active_commenters,
-    active_voters,
-    engagement_rate
-FROM aggregates.daily_metrics
-WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-ORDER BY metric_date DESC;'''
-        },
-        'mau': {
-            'name': 'Monthly Active Users',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_month as month,
-    mau,
-    finder_mau,
-    standard_mau,
-    activation_rate
-FROM aggregates.monthly_metrics
-ORDER BY metric_month DESC;'''
-        },
-        'new_users_weekly': {
-            'name': 'New Users Weekly',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    DATE_TRUNC('week', metric_date) as week_start,
-    SUM(new_signups) as new_users
-FROM aggregates.daily_metrics
-GROUP BY DATE_TRUNC('week', metric_date)
-ORDER BY week_start DESC
-LIMIT 12;'''
-        },
-        'active_users_weekly': {
-            'name': 'Active Users Weekly',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    DATE_TRUNC('week', metric_date) as week_start,
-    MAX(dau) as peak_dau,
-    AVG(dau) as avg_dau
-FROM aggregates.daily_metrics
-GROUP BY DATE_TRUNC('week', metric_date)
-ORDER BY week_start DESC
-LIMIT 12;'''
-        },
-        'engagement_daily': {
-            'name': 'Daily Engagement Activities',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_date as date,
-    posts_created,
-    comments_created,
-    votes_cast,
-    collections_created,
-    engagement_rate
-FROM aggregates.daily_metrics
-WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days'
-ORDER BY metric_date DESC;'''
-        },
-        'engagement_monthly': {
-            'name': 'Monthly Engagement Activities',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_month as month,
-    total_posts,
-    total_comments,
-    total_votes,
-    total_collections,
-    avg_activities_per_user
-FROM aggregates.monthly_metrics
-ORDER BY metric_month DESC;'''
-        },
-        'user_segmentation': {
-            'name': 'User Segmentation by Engagement Level',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    engagement_level,
-    COUNT(*) as user_count,
-    AVG(engagement_score) as avg_score
-FROM aggregates.user_engagement_levels
-GROUP BY engagement_level
-ORDER BY 
-    CASE engagement_level
-        WHEN 'POWER_USER' THEN 1
-        WHEN 'ACTIVE' THEN 2
-        WHEN 'CASUAL' THEN 3
-        WHEN 'LURKER' THEN 4
-    END;'''
-        },
-        'mau_by_type': {
-            'name': 'MAU by User Type',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_month as month,
-    finder_mau,
-    standard_mau,
-    mau as total_mau
-FROM aggregates.monthly_metrics
-ORDER BY metric_month DESC;'''
-        },
-        'retention_summary': {
-            'name': 'Cohort Retention Rates',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    cohort_month,
-    retention_rate_30d,
-    retention_rate_60d,
-    retention_rate_90d,
-    activation_rate
-FROM core.user_cohorts
-ORDER BY cohort_month DESC;'''
-        },
-        'activation_rate': {
-            'name': 'Activation Rate by Cohort',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_month as month,
-    activation_rate,
-    mau,
-    new_signups
-FROM aggregates.monthly_metrics
-ORDER BY metric_month DESC;'''
-        },
-        'power_users': {
-            'name': 'Power Users Distribution',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    engagement_level,
-    COUNT(*) as user_count
-FROM aggregates.user_engagement_levels
-GROUP BY engagement_level;'''
-        },
-        'post_frequency': {
-            'name': 'Post Frequency',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_date as date,
-    posts_created,
-    unique_posters,
-    avg_posts_per_poster
-FROM aggregates.post_metrics
-ORDER BY metric_date DESC
-LIMIT 30;'''
-        },
-        'post_engagement': {
-            'name': 'Post Engagement Rate (Votes & Comments)',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_date as date,
-    posts_created,
-    total_votes,
-    comments_created,
-    engagement_rate_votes_pct,
-    engagement_rate_comments_pct
-FROM aggregates.post_metrics
-ORDER BY metric_date DESC;'''
-        },
-        'finder_searches': {
-            'name': 'Finder Searches & Profile Views',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_date as date,
-    total_votes as searches,
-    profiles_viewed
-FROM aggregates.finder_metrics
-ORDER BY metric_date DESC;'''
-        },
-        'collections': {
-            'name': 'Collections Created by Privacy Type',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    metric_date as date,
-    public_collections,
-    private_collections,
-    total_collections_created
-FROM aggregates.collection_metrics
-ORDER BY metric_date DESC;'''
-        },
-        'profile_completion': {
-            'name': 'Profile Completion Breakdown',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    profiles_with_headline,
-    profiles_with_linkedin,
-    profiles_with_location,
-    profiles_with_experience,
-    profiles_with_education,
-    avg_profile_completion_score
-FROM aggregates.profile_metrics
-ORDER BY metric_date DESC
-LIMIT 1;'''
-        },
-        'account_funnel': {
-            'name': 'Account Creation Funnel',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''SELECT 
-    total_signups,
-    profiles_with_basic_info,
-    profiles_with_experience,
-    profiles_with_education,
-    profiles_completed,
-    profiles_activated,
-    basic_info_rate,
-    completion_rate,
-    activation_rate
-FROM aggregates.funnel_metrics
-ORDER BY metric_date DESC
-LIMIT 1;'''
-        },
-        'account_funnel_pyramid': {
-            'name': 'Account Creation Funnel (Pyramid)',
-            'database': 'chemlink_analytics (aggregates schema)',
-            'query': '''-- Same query as account_funnel, different visualization
-SELECT 
-    total_signups,
-    profiles_with_basic_info,
-    profiles_with_experience,
-    profiles_with_education,
-    profiles_completed,
-    profiles_activated,
-    basic_info_rate,
-    completion_rate,
-    activation_rate
-FROM aggregates.funnel_metrics
-ORDER BY metric_date DESC
-LIMIT 1;'''
-        }
-    }
-    return jsonify(queries)
+    """Return the SQL behind each dashboard chart, as its route runs it"""
+    return jsonify(metric_registry.modal_queries())
 
 if __name__ == '__main__':
+    # The debug reloader imports this module twice; only the serving child
+    # process starts background workers, so the cache is warm right away.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_workers()
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: old execute_query + jsonify path vs. serialization.py.
+
+Both paths start from the same Postgres wire text so the comparison includes
+type casting. The old path lets psycopg2's default casters build
+date/datetime/Decimal objects, walks every cell with isinstance(), then calls
+flask.jsonify. The new path uses the JSON typecasters registered on pooled
+connections and hands the rows straight to serialization.dumps.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 5000] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+import psycopg2.extensions as ext
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import serialization  # noqa: E402
+
+# Column name, old caster, new caster, wire-text generator: a mix shaped like
+# the graph endpoints (ids, names, numerics, int arrays) plus daily metrics.
+COLUMNS = [
+    ('metric_date', ext.PYDATE, serialization.ISO_DATE, lambda i: f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}'),
+    ('week', ext.PYDATETIME, serialization.ISO_TIMESTAMP, lambda i: f'2025-06-{i % 28 + 1:02d} 00:00:00'),
+    ('company_id_1', None, None, lambda i: i),
+    ('company_name_1', None, None, lambda i: f'Company {i}'),
+    ('shared_employee_count', None, None, lambda i: i % 97),
+    ('network_strength_score', ext.DECIMAL, serialization.FLOAT_NUMERIC, lambda i: f'{i % 1000}.{i % 100:02d}'),
+    ('engagement_rate', ext.DECIMAL, serialization.FLOAT_NUMERIC, lambda i: f'{i % 100}.{i % 7}5'),
+    ('employee_ids', None, None, lambda i: list(range(i % 20))),
+]
+
+
+def wire_rows(n):
+    return [tuple(gen(i) for _, _, _, gen in COLUMNS) for i in range(n)]
+
+
+def cast_rows(raw, which):
+    names = [c[0] for c in COLUMNS]
+    casters = [c[which] for c in COLUMNS]
+    return [
+        dict(zip(names, (cast(v, None) if cast is not None else v
+                         for cast, v in zip(casters, row))))
+        for row in raw
+    ]
+
+
+def old_path(app, raw):
+    rows = cast_rows(raw, 1)
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, datetime):
+                row[key] = value.isoformat()
+    with app.app_context():
+        return jsonify(rows).get_data()
+
+
+def new_path(raw):
+    return serialization.dumps(cast_rows(raw, 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    raw = wire_rows(args.rows)
+
+    old = min(timeit.repeat(lambda: old_path(app, raw), number=1, repeat=args.repeat))
+    new = min(timeit.repeat(lambda: new_path(raw), number=1, repeat=args.repeat))
+
+    print(f'rows={args.rows} columns={len(COLUMNS)} (best of {args.repeat})')
+    print(f'  old execute_query + jsonify : {old * 1000:8.2f} ms')
+    print(f'  serialization.dumps          : {new * 1000:8.2f} ms')
+    print(f'  speedup                      : {old / new:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
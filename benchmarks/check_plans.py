@@ -0,0 +1,253 @@
+"""
+Query-plan check: EXPLAIN every query each /api route runs against seeded data.
+
+Calls every GET /api route in-process (result cache off, in-memory indexes
+disabled so the Postgres fallbacks run too), records each statement the
+route executes with its parameters, and EXPLAINs it on the seeded database.
+Routes with an in-memory path are then called again with their index loaded
+(those with no fallback, in INDEX_ONLY_STATUS, must first answer 503).
+A plan fails if it has a sequential scan over a large table or sorts a large
+number of rows. "Large" is --min-rows, checked against pg_class.reltuples,
+so seed with enough users for the big tables to cross it. The few routes
+that aggregate a whole table by design are listed in ALLOWED_FULL_SCANS.
+
+Exits non-zero when any plan fails, for use in CI after benchmarks/seed.py.
+It is a script rather than a test suite: the project has no test runner, and
+the check needs a seeded database, like the other benchmarks/ tools.
+
+Usage:
+    python benchmarks/seed.py --users 100000
+    python benchmarks/check_plans.py --users 100000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from urllib.parse import quote
+
+import psycopg2.extensions
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from slow_queries import SlowQueryLog  # noqa: E402
+
+# (endpoint, table) pairs whose full scan is the point of the query
+ALLOWED_FULL_SCANS = {
+    ('summary_stats', 'core.unified_users'): 'summary card counts every user (hourly part)',
+    ('summary_stats', 'aggregates.user_engagement_levels'):
+        'summary card counts active users (hourly part)',
+    ('user_segmentation', 'aggregates.user_engagement_levels'): 'groups every user by level',
+    ('kratos_user_segments', 'aggregates.kratos_user_activity'):
+        'groups every identity by recency',
+    ('kratos_summary_stats', 'aggregates.kratos_user_activity'):
+        'summary card counts every identity (hourly part)',
+    ('kratos_summary_stats', 'aggregates.kratos_security_alerts'):
+        'summary card counts every alert (hourly part)',
+    ('kratos_hourly_patterns', 'aggregates.kratos_hourly_patterns'):
+        'groups every day of history by hour and day type',
+}
+
+# Routes answered from an in-memory index when it is loaded: rule -> index
+INDEXED_ROUTES = {
+    '/api/graph/company-network/<company_name>': 'company_names',
+    '/api/graph/companies/autocomplete': 'company_names',
+    '/api/graph/connection-recommendations/<int:user_id>': 'user_recommendations',
+    '/api/graph/skills-matching/<int:user_id>': 'user_skills',
+}
+
+# Routes with no Postgres fallback: their status while the indexes are disabled
+INDEX_ONLY_STATUS = {
+    '/api/graph/companies/autocomplete': 503,
+}
+
+# Routes with ?limit=/?cursor= pages: the first page and the one after it
+PAGINATED_ROUTES = ('/api/graph/connection-recommendations', '/api/graph/skills-matching')
+
+SORT_NODES = ('Sort', 'Incremental Sort')
+
+
+class StatementCapture(SlowQueryLog):
+    """Records every statement the app runs instead of timing it"""
+
+    def __init__(self, ignored=()):
+        super().__init__(connect=None, threshold_ms=0)
+        self.ignored = set(ignored)
+        self.captured = []
+
+    def observe(self, statement, params, seconds, endpoint=None, explain_sql=None,
+                setup_sql=None):
+        if statement in self.ignored:
+            return
+        self.captured.append({
+            'statement': statement,
+            'params': params,
+            'explain_sql': explain_sql or statement,
+            'setup_sql': setup_sql,
+        })
+
+
+def route_paths(rule, path, client):
+    """Paths to request for rule: path, plus the first two pages for paginated routes"""
+    if rule not in PAGINATED_ROUTES:
+        return [path]
+    first = f'{path}?limit=100'
+    response = client.get(first)
+    next_cursor = (response.get_json(silent=True) or {}).get('next_cursor')
+    return [path, first] + ([f'{first}&cursor={quote(next_cursor)}'] if next_cursor else [])
+
+
+def table_sizes(conn):
+    with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+        cursor.execute("""
+            SELECT n.nspname || '.' || c.relname, c.reltuples::bigint
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND n.nspname IN ('core', 'aggregates')
+        """)
+        return dict(cursor.fetchall())
+
+
+def explain(conn, captured):
+    """The JSON plan of a captured statement, as the app would run it"""
+    try:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            # Prepared statements outlive the rollback below
+            cursor.execute('DEALLOCATE ALL')
+            if captured['setup_sql']:
+                cursor.execute(captured['setup_sql'])
+            cursor.execute(f"EXPLAIN (FORMAT JSON, VERBOSE) {captured['explain_sql']}",
+                           captured['params'])
+            plan = cursor.fetchone()[0]
+    finally:
+        conn.rollback()
+    return plan[0]['Plan']
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def plan_problems(plan, endpoint, sizes, min_rows):
+    problems = []
+    for node in plan_nodes(plan):
+        if node['Node Type'] == 'Seq Scan':
+            table = f"{node.get('Schema')}.{node.get('Relation Name')}"
+            rows = sizes.get(table, 0)
+            if rows >= min_rows and (endpoint, table) not in ALLOWED_FULL_SCANS:
+                problems.append(f'Seq Scan on {table} ({rows:,} rows)')
+        elif node['Node Type'] in SORT_NODES and node['Plan Rows'] >= min_rows:
+            keys = ', '.join(node.get('Sort Key', ()))
+            problems.append(f"{node['Node Type']} of ~{node['Plan Rows']:,} rows by {keys}")
+    return problems
+
+
+def format_plan(node, depth=0):
+    relation = f" on {node['Schema']}.{node['Relation Name']}" if 'Relation Name' in node else ''
+    index = f" using {node['Index Name']}" if 'Index Name' in node else ''
+    lines = [f"{'  ' * depth}-> {node['Node Type']}{relation}{index} "
+             f"(rows={node['Plan Rows']:,} cost={node['Total Cost']:,.0f})"]
+    for child in node.get('Plans', ()):
+        lines.extend(format_plan(child, depth + 1))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dbname', default='chemlink_bench')
+    parser.add_argument('--users', type=int, default=100000,
+                        help='--users the database was seeded with (for path parameters)')
+    parser.add_argument('--min-rows', type=int, default=10000,
+                        help='tables and sorts with at least this many rows count as large')
+    parser.add_argument('--routes', help='regex; only routes matching it are checked')
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    # The app reads its configuration at import time
+    os.environ['ANALYTICS_DB_NAME'] = args.dbname
+    os.environ['RESULT_CACHE_ENABLED'] = '0'
+    os.environ['CACHE_PREWARM_ENABLED'] = '0'
+    # Smaller than any table, so the routes take their Postgres fallbacks
+    index_max_rows = int(os.getenv('MEMORY_INDEX_MAX_ROWS', '2000000'))
+    os.environ['MEMORY_INDEX_MAX_ROWS'] = '1'
+    import app as dashboard
+    import memory_index
+    from load_test import api_routes, sample_path
+
+    # In-memory index loads read whole tables by design and are not part of a route
+    capture = StatementCapture(ignored=[
+        query for index in dashboard.memory_indexes
+        for query in (index.query, index.count_query)
+    ] + [memory_index.TABLE_ESTIMATE_QUERY])
+    dashboard.slow_queries = capture
+    client = dashboard.app.test_client()
+
+    routes = api_routes()
+    if args.routes:
+        routes = [(rule, endpoint) for rule, endpoint in routes if re.search(args.routes, rule)]
+
+    conn = dashboard.get_db_connection()
+
+    def check(rule, endpoint, label='', expected=(200, 404)):
+        """Request rule and EXPLAIN what it ran; True if every plan passed"""
+        start = len(capture.captured)
+        errors = []
+        for path in route_paths(rule, sample_path(rule, args), client):
+            response = client.get(path, buffered=True)
+            if response.status_code not in expected:
+                errors.append(f'{path} returned {response.status_code}')
+
+        seen = set()
+        for captured in capture.captured[start:]:
+            key = (captured['explain_sql'], repr(captured['params']))
+            if key in seen:
+                continue
+            seen.add(key)
+            try:
+                plan = explain(conn, captured)
+            except psycopg2.Error as e:
+                errors.append(f'EXPLAIN failed: {e}'.strip())
+                continue
+            problems = plan_problems(plan, endpoint, sizes, args.min_rows)
+            statement = ' '.join(captured['statement'].split())
+            errors.extend(f'{problem}\n      in: {statement[:160]}' for problem in problems)
+            if args.verbose or problems:
+                print(f'  {rule}')
+                print('\n'.join('      ' + line for line in format_plan(plan)))
+
+        status = 'FAIL' if errors else 'ok'
+        print(f'{status:4} {rule}{label} ({len(seen)} statements)')
+        for error in errors:
+            print(f'     {error}')
+        return not errors
+
+    try:
+        sizes = table_sizes(conn)
+        results = [check(rule, endpoint, expected=(INDEX_ONLY_STATUS[rule],))
+                   if rule in INDEX_ONLY_STATUS else check(rule, endpoint)
+                   for rule, endpoint in routes]
+
+        indexed = [(rule, endpoint) for rule, endpoint in routes if rule in INDEXED_ROUTES]
+        for name in dict.fromkeys(INDEXED_ROUTES[rule] for rule, _ in indexed):
+            index = getattr(dashboard, name)
+            while index.stats()['rebuilding']:
+                # A load the first pass started must not replace this one
+                time.sleep(0.1)
+            index.max_rows = index_max_rows
+            index.reload()
+        results.extend(check(rule, endpoint, ' [index loaded]') for rule, endpoint in indexed)
+    finally:
+        conn.close()
+
+    failures = results.count(False)
+    print(f'\n{len(results) - failures}/{len(results)} route checks passed '
+          f'(large = {args.min_rows:,}+ rows)')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
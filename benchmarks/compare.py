@@ -0,0 +1,71 @@
+"""
+Compare two load_test.py reports route by route.
+
+Prints p50/p95/p99 latency, throughput and DB time for each route in both
+reports with the relative change, worst regressions first.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+
+
+def change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def cell(old, new):
+    if new is None:
+        return f'{"-":>18}'
+    pct = change(old, new)
+    delta = '' if pct is None else f' {pct:+6.1f}%'
+    return f'{new:9.1f}{delta:>9}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    for report, name in ((old, args.old), (new, args.new)):
+        print(f"{name}: {report.get('label') or '-'} @ {report.get('git_revision') or '?'}, "
+              f"{report['users']:,} users, concurrency {report['concurrency']}")
+
+    rows = []
+    for rule in sorted(set(old['routes']) & set(new['routes'])):
+        before, after = old['routes'][rule], new['routes'][rule]
+        if not before['latency_ms'] or not after['latency_ms']:
+            continue
+        rows.append((change(before['latency_ms']['p95'], after['latency_ms']['p95']) or 0,
+                     rule, before, after))
+
+    print(f"\n{'route':50} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18} {'rps':>18} {'db ms':>18}")
+    for _, rule, before, after in sorted(rows, key=lambda row: row[0], reverse=True):
+        latency = [cell(before['latency_ms'][p], after['latency_ms'][p])
+                   for p in ('p50', 'p95', 'p99')]
+        print(f"{rule:50} {' '.join(latency)} "
+              f"{cell(before['throughput_rps'], after['throughput_rps'])} "
+              f"{cell(before['db_ms_per_request'], after['db_ms_per_request'])}")
+
+    only = sorted(set(old['routes']) ^ set(new['routes']))
+    if only:
+        print('\nroutes in only one report: ' + ', '.join(only))
+
+    rss_old, rss_new = old['rss_bytes']['peak'], new['rss_bytes']['peak']
+    if rss_old and rss_new:
+        print(f'\npeak RSS: {rss_old / 2**20:.1f} MiB -> {rss_new / 2**20:.1f} MiB '
+              f'({change(rss_old, rss_new):+.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
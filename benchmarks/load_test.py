@@ -0,0 +1,304 @@
+"""
+Load test: drive every GET /api route of a running dashboard at fixed concurrency.
+
+Routes are read from app.url_map, so new endpoints are picked up without
+editing this file (admin routes, /api/batch and /metrics are skipped). Path
+parameters are filled with values that exist in a database seeded by
+benchmarks/seed.py at the same --users. A final scenario replays the
+dashboard's page load: one /api/batch request for every endpoint
+static/js/dashboard.js fetches, as it sends them on a first visit. For each
+route the report has latency percentiles, throughput, error count and bytes,
+plus the DB time (sql + fetch phases) and worker RSS scraped from the app's
+/metrics.
+
+/metrics is per worker, so run the app with a single worker process for the
+DB time and RSS columns to cover every request. Set RESULT_CACHE_ENABLED=0 to
+measure the database paths rather than cache hits.
+
+Usage:
+    ANALYTICS_DB_NAME=chemlink_bench RESULT_CACHE_ENABLED=0 python app.py
+    python benchmarks/load_test.py --users 10000 --label baseline
+    python benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from functools import partial
+from urllib.parse import quote, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from app import app  # noqa: E402
+
+SKIPPED_PREFIXES = ('/api/admin/', '/api/batch')
+
+DASHBOARD_JS = os.path.join(HERE, '..', 'static', 'js', 'dashboard.js')
+DASHBOARD_SCENARIO = '/api/batch (dashboard page load)'
+
+# Left unescaped by the browser's encodeURIComponent, besides quote()'s own
+URI_COMPONENT_SAFE = "!'()*"
+
+# fetchData('x') requests x; fetchSeries('x') requests x?format=columnar
+DASHBOARD_FETCH = re.compile(r"\b(fetchData|fetchSeries)\('([^'?]+)'\)")
+
+# Query strings for routes that need one to do real work
+ROUTE_QUERIES = {
+    '/api/graph/companies/autocomplete': lambda args: f'q=Company%20{random.randint(1, 99)}',
+}
+
+# Payload sizes are reported as a browser would receive them
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip'}
+
+COMPANY_SUFFIXES = ('Chemicals', 'Labs', 'Pharma', 'Materials', 'Polymers')
+
+PHASE_SUM = re.compile(
+    r'^analytics_request_phase_seconds_sum\{endpoint="([^"]*)",phase="([^"]*)"\} (\S+)$')
+RSS = re.compile(r'^analytics_process_resident_memory_bytes (\S+)$')
+
+
+def api_routes():
+    """(rule, endpoint) for every GET route under /api"""
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or not rule.rule.startswith('/api/'):
+            continue
+        if rule.rule.startswith(SKIPPED_PREFIXES):
+            continue
+        routes.append((rule.rule, rule.endpoint))
+    return sorted(routes)
+
+
+def sample_path(rule, args):
+    """A concrete path for rule with its parameters filled from the seeded data"""
+    companies = max(args.users // 50, 50)
+
+    def fill(match):
+        name = match.group(2)
+        if name == 'user_id':
+            return str(random.randint(1, args.users))
+        if name == 'company_name':
+            company = random.randint(1, companies)
+            return quote(f'Company {company} {COMPANY_SUFFIXES[company % 5]}')
+        raise ValueError(f'No sample value for <{match.group(0)}> in {rule}')
+
+    path = re.sub(r'<(?:(\w+):)?(\w+)>', fill, rule)
+    query = ROUTE_QUERIES.get(rule)
+    return f'{path}?{query(args)}' if query else path
+
+
+def dashboard_endpoints():
+    """The endpoints dashboard.js batches on a first page load, in order"""
+    with open(DASHBOARD_JS) as f:
+        calls = DASHBOARD_FETCH.findall(f.read())
+    endpoints = [endpoint if helper == 'fetchData' else f'{endpoint}?format=columnar'
+                 for helper, endpoint in calls]
+    return list(dict.fromkeys(endpoints))
+
+
+def dashboard_batch_path():
+    return '/api/batch?' + '&'.join(f'endpoint={quote(endpoint, safe=URI_COMPONENT_SAFE)}'
+                                    for endpoint in dashboard_endpoints())
+
+
+def view_name(endpoint):
+    """The /metrics endpoint label of a batched endpoint"""
+    return app.url_map.bind('').match(urlsplit('/api/' + endpoint).path)[0]
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Client:
+    """Keep-alive HTTP connection owned by one load thread"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                            else http.client.HTTPConnection)
+        self._connect = lambda: connection_class(parts.hostname, parts.port, timeout=timeout)
+        self._conn = self._connect()
+
+    def get(self, path, headers=BROWSER_HEADERS):
+        """(status, body bytes); reconnects once if the server closed the connection"""
+        for attempt in (1, 2):
+            try:
+                self._conn.request('GET', path, headers=headers)
+                response = self._conn.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._conn.close()
+                self._conn = self._connect()
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        self._conn.close()
+
+
+def scrape_metrics(client):
+    """({(endpoint, phase): seconds}, rss_bytes) from the app's /metrics"""
+    status, body = client.get('/metrics', headers={})
+    if status != 200:
+        return {}, None
+    phases, rss = {}, None
+    for line in body.decode().splitlines():
+        match = PHASE_SUM.match(line)
+        if match:
+            phases[(match.group(1), match.group(2))] = float(match.group(3))
+            continue
+        match = RSS.match(line)
+        if match:
+            rss = int(float(match.group(1)))
+    return phases, rss
+
+
+def run_route(next_path, args):
+    """Send args.requests requests for next_path() from args.concurrency threads"""
+    latencies, errors, payload = [], [0], [0]
+    lock = threading.Lock()
+    remaining = iter(range(args.requests))
+
+    def worker():
+        client = Client(args.url, args.timeout)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                path = next_path()
+                started = time.perf_counter()
+                try:
+                    status, body = client.get(path)
+                except OSError:
+                    status, body = None, b''
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    payload[0] += len(body)
+                    if status != 200:
+                        errors[0] += 1
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'latency_ms': {
+            name: round(percentile(latencies, pct) * 1000, 3)
+            for name, pct in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))
+        } if latencies else None,
+        'bytes_per_request': round(payload[0] / len(latencies)) if latencies else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--users', type=int, default=10000,
+                        help='--users the database was seeded with (for path parameters)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per route')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--routes', help='regex; only routes matching it are run')
+    parser.add_argument('--label', default='', help='free-form note stored in the report')
+    parser.add_argument('--output', help='report path (default benchmarks/results/<time>.json)')
+    parser.add_argument('--seed', type=int, default=42, help='seed for sampled path parameters')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # rule -> (path sampler, endpoints whose DB time it accounts for)
+    scenarios = {rule: (partial(sample_path, rule, args), (endpoint,))
+                 for rule, endpoint in api_routes()}
+    # Batch sub-requests are recorded under their own endpoints
+    batch_path = dashboard_batch_path()
+    scenarios[DASHBOARD_SCENARIO] = (
+        lambda: batch_path,
+        ('batch',) + tuple(dict.fromkeys(view_name(e) for e in dashboard_endpoints())))
+    if args.routes:
+        scenarios = {rule: scenario for rule, scenario in scenarios.items()
+                     if re.search(args.routes, rule)}
+
+    started_at = datetime.now(timezone.utc)
+    control = Client(args.url, args.timeout)
+    _, rss_start = scrape_metrics(control)
+    rss_peak = rss_start or 0
+    results = {}
+
+    for rule, (next_path, endpoints) in scenarios.items():
+        for _ in range(args.warmup):
+            control.get(next_path())
+        before, _ = scrape_metrics(control)
+        result = run_route(next_path, args)
+        after, rss = scrape_metrics(control)
+
+        db_seconds = sum(after.get((endpoint, phase), 0.0) - before.get((endpoint, phase), 0.0)
+                         for endpoint in endpoints for phase in ('sql', 'fetch'))
+        result['db_ms_per_request'] = (round(db_seconds * 1000 / result['requests'], 3)
+                                       if result['requests'] else None)
+        result['rss_bytes'] = rss
+        rss_peak = max(rss_peak, rss or 0)
+        results[rule] = result
+
+        latency = result['latency_ms'] or {}
+        print(f"{rule:55} p50 {latency.get('p50', 0):8.1f}  p95 {latency.get('p95', 0):8.1f}  "
+              f"p99 {latency.get('p99', 0):8.1f} ms  {result['throughput_rps'] or 0:8.1f} rps  "
+              f"db {result['db_ms_per_request'] or 0:7.1f} ms  errors {result['errors']}")
+
+    _, rss_end = scrape_metrics(control)
+    control.close()
+
+    report = {
+        'label': args.label,
+        'started_at': started_at.isoformat(),
+        'git_revision': git_revision(),
+        'url': args.url,
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'rss_bytes': {'start': rss_start, 'end': rss_end, 'peak': rss_peak or None},
+        'routes': results,
+    }
+    output = args.output or os.path.join(
+        HERE, 'results', started_at.strftime('%Y%m%dT%H%M%SZ') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'wrote {output}')
+
+
+if __name__ == '__main__':
+    main()
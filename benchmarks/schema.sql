@@ -0,0 +1,339 @@
+-- Synthetic analytics schema for benchmarks/seed.py.
+--
+-- Only the columns app.py reads. The only keys are the ones the ETL documents
+-- (see NEO4J_INTEGRATION_PLAN.md); every other index comes from migrations/,
+-- so a benchmark run measures the same access paths as production.
+
+CREATE SCHEMA IF NOT EXISTS core;
+CREATE SCHEMA IF NOT EXISTS aggregates;
+
+DROP TABLE IF EXISTS
+    core.unified_users,
+    core.user_cohorts,
+    aggregates.daily_metrics,
+    aggregates.monthly_metrics,
+    aggregates.user_engagement_levels,
+    aggregates.cohort_retention,
+    aggregates.post_metrics,
+    aggregates.finder_metrics,
+    aggregates.collection_metrics,
+    aggregates.profile_metrics,
+    aggregates.funnel_metrics,
+    aggregates.connection_recommendations,
+    aggregates.company_network_map,
+    aggregates.skills_matching_scores,
+    aggregates.career_path_patterns,
+    aggregates.location_based_networks,
+    aggregates.alumni_networks,
+    aggregates.project_collaboration_graph,
+    aggregates.kratos_daily_logins,
+    aggregates.kratos_user_activity,
+    aggregates.kratos_login_frequency_segments,
+    aggregates.kratos_mfa_adoption,
+    aggregates.kratos_activation_funnel,
+    aggregates.kratos_security_alerts,
+    aggregates.kratos_hourly_patterns,
+    aggregates.kratos_account_states
+CASCADE;
+
+-- ---------------------------------------------------------------------------
+-- core
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE core.unified_users (
+    user_id BIGINT,
+    email TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    signup_date DATE,
+    deleted_at TIMESTAMP,
+    is_test_account BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE core.user_cohorts (
+    cohort_month DATE,
+    total_users INTEGER,
+    finder_users INTEGER,
+    standard_users INTEGER,
+    activation_rate DECIMAL(5,2),
+    retention_rate_30d DECIMAL(5,2),
+    retention_rate_60d DECIMAL(5,2),
+    retention_rate_90d DECIMAL(5,2)
+);
+
+-- ---------------------------------------------------------------------------
+-- aggregates: dashboard metrics
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE aggregates.daily_metrics (
+    metric_date DATE,
+    new_signups INTEGER,
+    new_finder_signups INTEGER,
+    new_standard_signups INTEGER,
+    total_users_cumulative INTEGER,
+    dau INTEGER,
+    active_posters INTEGER,
+    active_commenters INTEGER,
+    active_voters INTEGER,
+    active_collectors INTEGER,
+    posts_created INTEGER,
+    comments_created INTEGER,
+    votes_cast INTEGER,
+    collections_created INTEGER,
+    views_given INTEGER,
+    engagement_rate DECIMAL(6,2),
+    social_engagement_rate DECIMAL(6,2)
+);
+
+CREATE TABLE aggregates.monthly_metrics (
+    metric_month DATE,
+    new_signups INTEGER,
+    total_users_end_of_month INTEGER,
+    growth_rate_pct DECIMAL(6,2),
+    mau INTEGER,
+    avg_dau DECIMAL(10,2),
+    finder_mau INTEGER,
+    standard_mau INTEGER,
+    activation_rate DECIMAL(5,2),
+    total_posts INTEGER,
+    total_comments INTEGER,
+    total_votes INTEGER,
+    total_collections INTEGER,
+    avg_activities_per_user DECIMAL(8,2),
+    avg_engagement_score DECIMAL(8,2)
+);
+
+CREATE TABLE aggregates.user_engagement_levels (
+    user_id BIGINT,
+    email TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    engagement_level VARCHAR(20),
+    engagement_score DECIMAL(8,2),
+    total_activities INTEGER,
+    posts_created INTEGER,
+    votes_cast INTEGER,
+    collections_created INTEGER,
+    days_since_last_activity INTEGER
+);
+
+CREATE TABLE aggregates.cohort_retention (
+    cohort_month DATE,
+    weeks_since_signup INTEGER,
+    total_users INTEGER,
+    retained_users INTEGER,
+    retention_rate DECIMAL(5,2),
+    cumulative_retention DECIMAL(5,2)
+);
+
+CREATE TABLE aggregates.post_metrics (
+    metric_date DATE,
+    posts_created INTEGER,
+    unique_posters INTEGER,
+    avg_posts_per_poster DECIMAL(6,2),
+    comments_created INTEGER,
+    total_votes INTEGER,
+    avg_comments_per_post DECIMAL(6,2),
+    avg_votes_per_post DECIMAL(6,2),
+    engagement_rate_comments_pct DECIMAL(5,2),
+    engagement_rate_votes_pct DECIMAL(5,2),
+    text_posts INTEGER,
+    link_posts INTEGER,
+    media_posts INTEGER
+);
+
+CREATE TABLE aggregates.finder_metrics (
+    metric_date DATE,
+    total_votes INTEGER,
+    unique_voters INTEGER,
+    profiles_viewed INTEGER
+);
+
+CREATE TABLE aggregates.collection_metrics (
+    metric_date DATE,
+    total_collections_created INTEGER,
+    unique_collectors INTEGER,
+    public_collections INTEGER,
+    private_collections INTEGER
+);
+
+CREATE TABLE aggregates.profile_metrics (
+    metric_date DATE,
+    avg_profile_completion_score DECIMAL(5,2),
+    profiles_with_headline INTEGER,
+    profiles_with_linkedin INTEGER,
+    profiles_with_location INTEGER,
+    profiles_with_experience INTEGER,
+    profiles_with_education INTEGER,
+    profiles_updated INTEGER,
+    experiences_added INTEGER,
+    education_added INTEGER
+);
+
+CREATE TABLE aggregates.funnel_metrics (
+    metric_date DATE,
+    total_signups INTEGER,
+    profiles_with_basic_info INTEGER,
+    profiles_with_experience INTEGER,
+    profiles_with_education INTEGER,
+    profiles_completed INTEGER,
+    profiles_activated INTEGER,
+    basic_info_rate DECIMAL(5,2),
+    experience_rate DECIMAL(5,2),
+    education_rate DECIMAL(5,2),
+    completion_rate DECIMAL(5,2),
+    activation_rate DECIMAL(5,2)
+);
+
+-- ---------------------------------------------------------------------------
+-- aggregates: graph analytics
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE aggregates.connection_recommendations (
+    user_id INTEGER,
+    recommended_user_id INTEGER,
+    recommendation_score DECIMAL(5,2),
+    common_companies TEXT[],
+    common_roles TEXT[],
+    common_schools TEXT[],
+    recommendation_reason VARCHAR(500),
+    calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, recommended_user_id)
+);
+
+CREATE TABLE aggregates.company_network_map (
+    company_id_1 VARCHAR(255),
+    company_id_2 VARCHAR(255),
+    company_name_1 TEXT,
+    company_name_2 TEXT,
+    shared_employee_count INTEGER,
+    employee_ids INTEGER[],
+    network_strength_score DECIMAL(5,2),
+    calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (company_id_1, company_id_2)
+);
+
+CREATE TABLE aggregates.skills_matching_scores (
+    user_id INTEGER,
+    role_id INTEGER,
+    role_title TEXT,
+    experience_years DECIMAL(4,1),
+    proficiency_score DECIMAL(8,2),
+    similar_user_count INTEGER
+);
+
+CREATE TABLE aggregates.career_path_patterns (
+    path_vector TEXT,
+    role_sequence TEXT[],
+    user_count INTEGER,
+    user_ids INTEGER[],
+    avg_years_per_role DECIMAL(4,1)
+);
+
+CREATE TABLE aggregates.location_based_networks (
+    location_id INTEGER,
+    country TEXT,
+    user_count INTEGER,
+    company_diversity_score DECIMAL(5,2),
+    role_diversity_score DECIMAL(5,2),
+    top_companies TEXT[],
+    top_roles TEXT[]
+);
+
+CREATE TABLE aggregates.alumni_networks (
+    school_id INTEGER,
+    school_name TEXT,
+    degree_id INTEGER,
+    degree_name TEXT,
+    alumni_count INTEGER,
+    graduation_year_min INTEGER,
+    graduation_year_max INTEGER,
+    current_companies TEXT[],
+    current_roles TEXT[]
+);
+
+CREATE TABLE aggregates.project_collaboration_graph (
+    project_id INTEGER,
+    project_name TEXT,
+    company_id VARCHAR(255),
+    company_name TEXT,
+    user_count INTEGER,
+    role_ids INTEGER[],
+    collaboration_strength DECIMAL(5,2)
+);
+
+-- ---------------------------------------------------------------------------
+-- aggregates: Kratos authentication
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE aggregates.kratos_daily_logins (
+    metric_date DATE,
+    unique_users_logged_in INTEGER,
+    total_sessions INTEGER,
+    mfa_sessions INTEGER,
+    password_only_sessions INTEGER,
+    mfa_session_rate DECIMAL(5,2),
+    avg_session_minutes DECIMAL(6,2),
+    mobile_users INTEGER,
+    desktop_users INTEGER
+);
+
+CREATE TABLE aggregates.kratos_user_activity (
+    identity_id UUID,
+    recency_segment TEXT,
+    total_sessions INTEGER
+);
+
+CREATE TABLE aggregates.kratos_login_frequency_segments (
+    frequency_segment TEXT,
+    user_count INTEGER,
+    avg_logins DECIMAL(8,2),
+    avg_days_active DECIMAL(8,2),
+    avg_logins_per_active_day DECIMAL(8,2)
+);
+
+CREATE TABLE aggregates.kratos_mfa_adoption (
+    metric_month DATE,
+    totp_users INTEGER,
+    webauthn_users INTEGER,
+    password_only_users INTEGER,
+    mfa_adoption_rate DECIMAL(5,2)
+);
+
+CREATE TABLE aggregates.kratos_activation_funnel (
+    signup_week DATE,
+    new_identities INTEGER,
+    activated_within_1_day INTEGER,
+    activated_within_7_days INTEGER,
+    activated_within_30_days INTEGER,
+    day1_activation_rate DECIMAL(5,2),
+    week1_activation_rate DECIMAL(5,2),
+    month1_activation_rate DECIMAL(5,2),
+    avg_hours_to_first_login DECIMAL(8,2)
+);
+
+CREATE TABLE aggregates.kratos_security_alerts (
+    identity_id UUID,
+    risk_level TEXT,
+    session_count_7d INTEGER,
+    unique_ips_7d INTEGER,
+    active_days_7d INTEGER,
+    flag_multiple_ips BOOLEAN,
+    flag_high_volume BOOLEAN
+);
+
+CREATE TABLE aggregates.kratos_hourly_patterns (
+    metric_date DATE,
+    hour_of_day INTEGER,
+    day_type TEXT,
+    total_sessions INTEGER,
+    unique_users INTEGER,
+    avg_session_minutes DECIMAL(6,2)
+);
+
+CREATE TABLE aggregates.kratos_account_states (
+    state TEXT,
+    identity_count INTEGER,
+    percentage DECIMAL(5,2),
+    new_in_last_30_days INTEGER
+);
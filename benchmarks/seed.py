@@ -0,0 +1,372 @@
+"""
+Seed a local Postgres with synthetic core.* / aggregates.* data for benchmarks.
+
+Creates (or recreates) every table app.py reads, using the layout in
+benchmarks/schema.sql, and fills it server-side with generate_series at the
+requested scale, then builds the indexes in migrations/. The random seed is
+fixed, so the same --users/--days give the same data. Connection settings
+come from the ANALYTICS_DB_* variables; the database name defaults to
+chemlink_bench and is created if missing.
+
+Usage:
+    python benchmarks/seed.py --users 10000
+    python benchmarks/seed.py --users 1000000 --days 1095 --dbname chemlink_bench_1m
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS = os.path.join(HERE, '..', 'migrations')
+
+# Each statement is run with the scale parameters from scale_params().
+# Tables whose size does not depend on the user count stay small, like the
+# real aggregates (one row per day, month, segment...). The LATERAL
+# subqueries draw per-row random values; their WHERE clause references the
+# series variable so Postgres evaluates them for every row instead of once.
+SEED_STATEMENTS = [
+    ('core.unified_users', """
+        INSERT INTO core.unified_users
+        SELECT g, 'user' || g || '@example.com', 'First' || (g %% 1000), 'Last' || (g %% 997),
+               CURRENT_DATE - (random() * %(days)s)::int,
+               CASE WHEN random() < 0.02 THEN now() END,
+               random() < 0.01
+        FROM generate_series(1, %(users)s) g
+    """),
+    ('core.user_cohorts', """
+        INSERT INTO core.user_cohorts
+        SELECT m::date, c, (c * 0.4)::int, (c * 0.6)::int,
+               round((40 + random() * 40)::numeric, 2), round((30 + random() * 30)::numeric, 2),
+               round((20 + random() * 20)::numeric, 2), round((10 + random() * 20)::numeric, 2)
+        FROM generate_series(date_trunc('month', CURRENT_DATE - %(days)s), CURRENT_DATE,
+                             interval '1 month') m,
+             LATERAL (SELECT (%(users)s / %(months)s * (0.5 + random()))::int AS c
+                     WHERE m IS NOT NULL) s
+    """),
+    ('aggregates.daily_metrics', """
+        INSERT INTO aggregates.daily_metrics
+        SELECT d::date, s.signups, (s.signups * 0.4)::int, (s.signups * 0.6)::int,
+               (%(users)s::bigint * (d::date - (CURRENT_DATE - %(days)s)) / %(days)s)::int,
+               s.dau, (s.dau * 0.1)::int, (s.dau * 0.15)::int, (s.dau * 0.3)::int,
+               (s.dau * 0.05)::int, (s.dau * 0.12)::int, (s.dau * 0.2)::int, (s.dau * 0.5)::int,
+               (s.dau * 0.04)::int, s.dau * 3,
+               round((5 + random() * 20)::numeric, 2), round((1 + random() * 10)::numeric, 2)
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             LATERAL (SELECT (%(users)s / %(days)s * (0.5 + random()))::int + 1 AS signups,
+                             (%(users)s * 0.05 * (0.8 + random() * 0.4))::int AS dau
+                     WHERE d IS NOT NULL) s
+    """),
+    ('aggregates.monthly_metrics', """
+        INSERT INTO aggregates.monthly_metrics
+        SELECT m::date, s.signups, (%(users)s / %(months)s) * (row_number() OVER (ORDER BY m))::int,
+               round((random() * 15)::numeric, 2), s.mau, round((s.mau * 0.3)::numeric, 2),
+               (s.mau * 0.4)::int, (s.mau * 0.6)::int, round((30 + random() * 40)::numeric, 2),
+               s.mau / 2, s.mau, s.mau * 3, s.mau / 10,
+               round((2 + random() * 10)::numeric, 2), round((10 + random() * 50)::numeric, 2)
+        FROM generate_series(date_trunc('month', CURRENT_DATE - %(days)s), CURRENT_DATE,
+                             interval '1 month') m,
+             LATERAL (SELECT (%(users)s / %(months)s * (0.5 + random()))::int AS signups,
+                             (%(users)s * 0.3 * (0.8 + random() * 0.4))::int AS mau
+                     WHERE m IS NOT NULL) s
+    """),
+    ('aggregates.user_engagement_levels', """
+        INSERT INTO aggregates.user_engagement_levels
+        SELECT g, 'user' || g || '@example.com', 'First' || (g %% 1000), 'Last' || (g %% 997),
+               CASE WHEN r < 0.02 THEN 'POWER_USER' WHEN r < 0.12 THEN 'ACTIVE'
+                    WHEN r < 0.42 THEN 'CASUAL' ELSE 'LURKER' END,
+               round(((1 - r) * 1000)::numeric, 2), ((1 - r) * 500)::int,
+               ((1 - r) * 50)::int, ((1 - r) * 200)::int, ((1 - r) * 20)::int, (r * 365)::int
+        FROM generate_series(1, %(users)s) g,
+             LATERAL (SELECT random() AS r WHERE g IS NOT NULL) s
+    """),
+    ('aggregates.cohort_retention', """
+        INSERT INTO aggregates.cohort_retention
+        SELECT m::date, w, c, (c * pow(0.85, w))::int,
+               round((100 * pow(0.85, w))::numeric, 2), round((100 * pow(0.8, w))::numeric, 2)
+        FROM generate_series(date_trunc('month', CURRENT_DATE - %(days)s), CURRENT_DATE,
+                             interval '1 month') m,
+             generate_series(0, 12) w,
+             LATERAL (SELECT (%(users)s / %(months)s)::int + 1 AS c) s
+    """),
+    ('aggregates.post_metrics', """
+        INSERT INTO aggregates.post_metrics
+        SELECT d::date, p, (p * 0.6)::int + 1, round((1 + random())::numeric, 2),
+               p * 2, p * 5, round((random() * 4)::numeric, 2), round((random() * 8)::numeric, 2),
+               round((random() * 60)::numeric, 2), round((random() * 90)::numeric, 2),
+               (p * 0.6)::int, (p * 0.25)::int, (p * 0.15)::int
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             LATERAL (SELECT (%(users)s * 0.006 * (0.5 + random()))::int + 1 AS p
+                     WHERE d IS NOT NULL) s
+    """),
+    ('aggregates.finder_metrics', """
+        INSERT INTO aggregates.finder_metrics
+        SELECT d::date, v, (v * 0.3)::int + 1, v * 4
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             LATERAL (SELECT (%(users)s * 0.01 * (0.5 + random()))::int + 1 AS v
+                     WHERE d IS NOT NULL) s
+    """),
+    ('aggregates.collection_metrics', """
+        INSERT INTO aggregates.collection_metrics
+        SELECT d::date, c, (c * 0.7)::int + 1, (c * 0.4)::int, (c * 0.6)::int
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             LATERAL (SELECT (%(users)s * 0.002 * (0.5 + random()))::int + 1 AS c
+                     WHERE d IS NOT NULL) s
+    """),
+    ('aggregates.profile_metrics', """
+        INSERT INTO aggregates.profile_metrics
+        SELECT d::date, round((40 + random() * 40)::numeric, 2),
+               (%(users)s * 0.6)::int, (%(users)s * 0.3)::int, (%(users)s * 0.7)::int,
+               (%(users)s * 0.5)::int, (%(users)s * 0.45)::int,
+               u, (u * 0.3)::int, (u * 0.2)::int
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             LATERAL (SELECT (%(users)s * 0.004 * (0.5 + random()))::int + 1 AS u
+                     WHERE d IS NOT NULL) s
+    """),
+    ('aggregates.funnel_metrics', """
+        INSERT INTO aggregates.funnel_metrics
+        SELECT d::date, %(users)s, (%(users)s * 0.8)::int, (%(users)s * 0.5)::int,
+               (%(users)s * 0.45)::int, (%(users)s * 0.3)::int, (%(users)s * 0.2)::int,
+               80, 50, 45, 30, 20
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d
+    """),
+    ('aggregates.connection_recommendations', """
+        INSERT INTO aggregates.connection_recommendations
+            (user_id, recommended_user_id, recommendation_score, common_companies,
+             common_roles, common_schools, recommendation_reason)
+        SELECT u, ((u::bigint + k * 7919) %% %(users)s) + 1,
+               round((random() * 100)::numeric, 2),
+               ARRAY['Company ' || (u %% %(companies)s)], ARRAY['Role ' || (u %% 50)],
+               CASE WHEN k %% 2 = 0 THEN ARRAY['School ' || (u %% 200)] ELSE '{}' END,
+               (ARRAY['Shared company', 'Shared role', 'Shared school'])[1 + k %% 3]
+        FROM generate_series(1, %(users)s) u, generate_series(1, %(recs_per_user)s) k
+        ON CONFLICT DO NOTHING
+    """),
+    ('aggregates.company_network_map', """
+        INSERT INTO aggregates.company_network_map
+            (company_id_1, company_id_2, company_name_1, company_name_2,
+             shared_employee_count, employee_ids, network_strength_score)
+        SELECT 'c' || a, 'c' || b, n.name_a, n.name_b, (random() * 200)::int,
+               ARRAY[(random() * %(users)s)::int, (random() * %(users)s)::int,
+                     (random() * %(users)s)::int],
+               round((random() * 100)::numeric, 2)
+        FROM generate_series(1, %(companies)s) a, generate_series(1, 10) k,
+             LATERAL (SELECT ((a + k * 31) %% %(companies)s) + 1 AS b) e,
+             LATERAL (SELECT
+                 'Company ' || a || ' ' || (ARRAY['Chemicals', 'Labs', 'Pharma', 'Materials',
+                                                  'Polymers'])[1 + a %% 5] AS name_a,
+                 'Company ' || e.b || ' ' || (ARRAY['Chemicals', 'Labs', 'Pharma', 'Materials',
+                                                    'Polymers'])[1 + e.b %% 5] AS name_b) n
+        WHERE a <> e.b
+        ON CONFLICT DO NOTHING
+    """),
+    ('aggregates.skills_matching_scores', """
+        INSERT INTO aggregates.skills_matching_scores
+        SELECT u, r.role_id, 'Role ' || r.role_id, round((random() * 20)::numeric, 1),
+               round((random() * 1000)::numeric, 2), (random() * 300)::int
+        FROM generate_series(1, %(users)s) u, generate_series(1, %(roles_per_user)s) k,
+             LATERAL (SELECT ((u + k * 13) %% 50) + 1 AS role_id) r
+    """),
+    ('aggregates.career_path_patterns', """
+        INSERT INTO aggregates.career_path_patterns
+        SELECT 'path-' || g, ARRAY['Role ' || (g %% 50), 'Role ' || ((g + 1) %% 50)],
+               (random() * 500)::int + 1, ARRAY[g, g + 1], round((1 + random() * 5)::numeric, 1)
+        FROM generate_series(1, %(path_count)s) g
+    """),
+    ('aggregates.location_based_networks', """
+        INSERT INTO aggregates.location_based_networks
+        SELECT g, (ARRAY['US', 'DE', 'CN', 'IN', 'JP', 'GB', 'FR'])[1 + g %% 7],
+               (random() * %(users)s / 100)::int + 1,
+               round((random() * 100)::numeric, 2), round((random() * 100)::numeric, 2),
+               ARRAY['Company ' || (g %% %(companies)s)], ARRAY['Role ' || (g %% 50)]
+        FROM generate_series(1, 500) g
+    """),
+    ('aggregates.alumni_networks', """
+        INSERT INTO aggregates.alumni_networks
+        SELECT s, 'School ' || s, d, (ARRAY['BSc', 'MSc', 'PhD', 'MBA'])[d],
+               (random() * 1000)::int, 1980 + (random() * 20)::int, 2000 + (random() * 25)::int,
+               ARRAY['Company ' || (s %% %(companies)s)], ARRAY['Role ' || (s %% 50)]
+        FROM generate_series(1, %(school_count)s) s, generate_series(1, 4) d
+    """),
+    ('aggregates.project_collaboration_graph', """
+        INSERT INTO aggregates.project_collaboration_graph
+        SELECT g, 'Project ' || g, 'c' || (g %% %(companies)s + 1),
+               'Company ' || (g %% %(companies)s + 1), (random() * 40)::int,
+               ARRAY[g %% 50, (g + 7) %% 50], round((random() * 100)::numeric, 2)
+        FROM generate_series(1, %(project_count)s) g
+    """),
+    ('aggregates.kratos_daily_logins', """
+        INSERT INTO aggregates.kratos_daily_logins
+        SELECT d::date, u, u * 2, (u * 0.6)::int, (u * 1.4)::int,
+               round((20 + random() * 20)::numeric, 2), round((5 + random() * 30)::numeric, 2),
+               (u * 0.4)::int, (u * 0.6)::int
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             LATERAL (SELECT (%(users)s * 0.05 * (0.8 + random() * 0.4))::int + 1 AS u
+                     WHERE d IS NOT NULL) s
+    """),
+    ('aggregates.kratos_user_activity', """
+        INSERT INTO aggregates.kratos_user_activity
+        SELECT md5('identity' || g)::uuid,
+               CASE WHEN r < 0.2 THEN 'Active (< 7 days)' WHEN r < 0.4 THEN 'Recent (7-30 days)'
+                    WHEN r < 0.6 THEN 'At Risk (30-90 days)' ELSE 'Dormant (90+ days)' END,
+               (random() * 200)::int
+        FROM generate_series(1, %(users)s) g,
+             LATERAL (SELECT random() AS r WHERE g IS NOT NULL) s
+    """),
+    ('aggregates.kratos_login_frequency_segments', """
+        INSERT INTO aggregates.kratos_login_frequency_segments
+        SELECT seg, (%(users)s * share)::int, round((random() * 100)::numeric, 2),
+               round((random() * 30)::numeric, 2), round((1 + random() * 3)::numeric, 2)
+        FROM (VALUES ('Daily', 0.1), ('Weekly', 0.2), ('Monthly', 0.3),
+                     ('Occasional', 0.25), ('Single login', 0.15)) v(seg, share)
+    """),
+    ('aggregates.kratos_mfa_adoption', """
+        INSERT INTO aggregates.kratos_mfa_adoption
+        SELECT m::date, (%(users)s * 0.1)::int, (%(users)s * 0.05)::int, (%(users)s * 0.85)::int,
+               round((10 + random() * 10)::numeric, 2)
+        FROM generate_series(date_trunc('month', CURRENT_DATE - %(days)s), CURRENT_DATE,
+                             interval '1 month') m
+    """),
+    ('aggregates.kratos_activation_funnel', """
+        INSERT INTO aggregates.kratos_activation_funnel
+        SELECT w::date, n, (n * 0.5)::int, (n * 0.7)::int, (n * 0.8)::int, 50, 70, 80,
+               round((random() * 72)::numeric, 2)
+        FROM generate_series(date_trunc('week', CURRENT_DATE - %(days)s), CURRENT_DATE,
+                             interval '1 week') w,
+             LATERAL (SELECT (%(users)s / %(weeks)s * (0.5 + random()))::int + 1 AS n
+                     WHERE w IS NOT NULL) s
+    """),
+    ('aggregates.kratos_security_alerts', """
+        INSERT INTO aggregates.kratos_security_alerts
+        SELECT md5('alert' || g)::uuid, (ARRAY['low', 'medium', 'high'])[1 + g %% 3],
+               (random() * 300)::int, (random() * 20)::int + 1, (random() * 7)::int,
+               random() < 0.5, random() < 0.2
+        FROM generate_series(1, %(alert_count)s) g
+    """),
+    ('aggregates.kratos_hourly_patterns', """
+        INSERT INTO aggregates.kratos_hourly_patterns
+        SELECT d::date, h, CASE WHEN extract(isodow FROM d) > 5 THEN 'weekend' ELSE 'weekday' END,
+               (random() * %(users)s / 500)::int, (random() * %(users)s / 1000)::int,
+               round((5 + random() * 30)::numeric, 2)
+        FROM generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE, interval '1 day') d,
+             generate_series(0, 23) h
+    """),
+    ('aggregates.kratos_account_states', """
+        INSERT INTO aggregates.kratos_account_states
+        SELECT st, (%(users)s * share)::int, share * 100, (%(users)s * share * 0.05)::int
+        FROM (VALUES ('active', 0.9), ('inactive', 0.07), ('locked', 0.02),
+                     ('unverified', 0.01)) v(st, share)
+    """),
+]
+
+
+def scale_params(users, days, recs_per_user, roles_per_user):
+    return {
+        'users': users,
+        'days': days,
+        'months': max(days // 30, 1),
+        'weeks': max(days // 7, 1),
+        'recs_per_user': recs_per_user,
+        'roles_per_user': roles_per_user,
+        'companies': max(users // 50, 50),
+        'path_count': max(users // 100, 100),
+        'school_count': max(users // 1000, 50),
+        'project_count': max(users // 20, 100),
+        'alert_count': max(users // 100, 10),
+    }
+
+
+def connect(dbname):
+    return psycopg2.connect(
+        host=os.getenv('ANALYTICS_DB_HOST', 'localhost'),
+        port=int(os.getenv('ANALYTICS_DB_PORT', '5432')),
+        database=dbname,
+        user=os.getenv('ANALYTICS_DB_USER', 'postgres'),
+        password=os.getenv('ANALYTICS_DB_PASSWORD', 'postgres'),
+    )
+
+
+def ensure_database(dbname):
+    conn = connect('postgres')
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s', (dbname,))
+            if cursor.fetchone() is None:
+                cursor.execute(sql.SQL('CREATE DATABASE {}').format(sql.Identifier(dbname)))
+                print(f'created database {dbname}')
+    finally:
+        conn.close()
+
+
+def migration_statements(path):
+    """Statements of a migration file, for running one at a time outside a transaction"""
+    with open(path) as f:
+        text = '\n'.join(line for line in f if not line.lstrip().startswith('--'))
+    return [statement.strip() for statement in text.split(';') if statement.strip()]
+
+
+def apply_migrations(conn):
+    """Run migrations/*.sql in order (CREATE INDEX CONCURRENTLY needs autocommit)"""
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS, '*.sql'))):
+            step = time.perf_counter()
+            for statement in migration_statements(path):
+                cursor.execute(statement)
+            print(f'{os.path.basename(path):45} {"":>17}  {time.perf_counter() - step:7.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=730, help='history length for daily tables')
+    parser.add_argument('--recs-per-user', type=int, default=3)
+    parser.add_argument('--roles-per-user', type=int, default=2)
+    parser.add_argument('--dbname', default='chemlink_bench')
+    parser.add_argument('--no-migrations', action='store_true',
+                        help='leave out the indexes in migrations/ (to measure without them)')
+    parser.add_argument('--force', action='store_true',
+                        help='allow seeding the database named in ANALYTICS_DB_NAME')
+    args = parser.parse_args()
+
+    if args.dbname == os.getenv('ANALYTICS_DB_NAME', 'chemlink_analytics') and not args.force:
+        sys.exit(f'Refusing to drop and reseed {args.dbname} (the configured analytics '
+                 f'database); use --dbname or --force')
+
+    params = scale_params(args.users, args.days, args.recs_per_user, args.roles_per_user)
+    ensure_database(args.dbname)
+    conn = connect(args.dbname)
+    started = time.perf_counter()
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute('SET synchronous_commit = off')
+            cursor.execute('SELECT setseed(0.42)')
+            with open(os.path.join(HERE, 'schema.sql')) as f:
+                cursor.execute(f.read())
+            for table, statement in SEED_STATEMENTS:
+                step = time.perf_counter()
+                cursor.execute(statement, params)
+                print(f'{table:45} {cursor.rowcount:>12,} rows  {time.perf_counter() - step:7.1f}s')
+
+        # Indexes are built after the load, which is faster than maintaining
+        # them row by row
+        if not args.no_migrations:
+            apply_migrations(conn)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE')
+    finally:
+        conn.close()
+
+    print(f'seeded {args.dbname} at {args.users:,} users in {time.perf_counter() - started:.1f}s')
+    print(f'run the app against it with ANALYTICS_DB_NAME={args.dbname}')
+
+
+if __name__ == '__main__':
+    main()
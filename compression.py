@@ -0,0 +1,60 @@
+"""
+Content-Encoding negotiation and compression for /api responses.
+
+gzip is always available; brotli is used when the optional `brotli` package
+is installed (pip install brotli). Cached bodies are compressed once per data
+version, by the first request that asks for the encoding, so their level is
+only a notch above the one for one-off bodies: brotli's top qualities take
+seconds on a multi-megabyte body.
+"""
+
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+CACHED_LEVEL = {'br': 6, 'gzip': 6}
+ONE_OFF_LEVEL = {'br': 5, 'gzip': 6}
+
+
+def negotiate(accept_encodings):
+    """Best supported encoding from a werkzeug Accept-Encoding header, or None"""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(body, encoding, cached=False):
+    """Compress body with the given Content-Encoding"""
+    level = (CACHED_LEVEL if cached else ONE_OFF_LEVEL)[encoding]
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def compress_stream(chunks, encoding):
+    """Incrementally compress an iterable of byte chunks (streamed responses)"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=ONE_OFF_LEVEL['br'])
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+    elif encoding == 'gzip':
+        # wbits=31 selects the gzip container
+        compressor = zlib.compressobj(ONE_OFF_LEVEL['gzip'], zlib.DEFLATED, 31)
+        for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+    else:
+        raise ValueError(f'Unsupported encoding: {encoding}')
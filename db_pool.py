@@ -0,0 +1,290 @@
+"""
+Connection pool for the analytics database.
+
+Each worker process keeps its own pool of psycopg2 connections so routes no
+longer pay a TCP + auth handshake per request. Connections are health-checked
+after sitting idle, recycled once they exceed their max lifetime, and the pool
+keeps running statistics that are exposed at /api/admin/pool.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout"""
+
+
+class PooledConnection:
+    """A psycopg2 connection plus the bookkeeping the pool needs"""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+    def age(self, now):
+        return now - self.created_at
+
+    def idle_for(self, now):
+        return now - self.last_used
+
+
+class ManagedConnectionPool:
+    """
+    Thread-safe, per-process pool of database connections.
+
+    connect          -- zero-argument callable returning a new psycopg2 connection
+    min_size         -- idle connections kept open even when they go stale
+    max_size         -- hard cap on open connections for this worker
+    max_lifetime     -- seconds after which a connection is closed and replaced
+    max_idle         -- seconds an idle connection above min_size is kept
+    health_check_after -- idle seconds after which a connection is pinged on checkout
+    timeout          -- seconds to wait for a free connection before PoolTimeout
+    on_checkout      -- optional callable(wait_seconds) run after every checkout
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, max_lifetime=1800,
+                 max_idle=300, health_check_after=30, timeout=10, on_checkout=None):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._on_checkout = on_checkout
+
+        self._cond = threading.Condition()
+        self._reset_state()
+
+    @classmethod
+    def from_env(cls, connect, on_checkout=None):
+        """Build a pool sized from ANALYTICS_DB_POOL_* environment variables"""
+        return cls(
+            connect,
+            min_size=int(os.getenv('ANALYTICS_DB_POOL_MIN', '1')),
+            max_size=int(os.getenv('ANALYTICS_DB_POOL_MAX', '10')),
+            max_lifetime=float(os.getenv('ANALYTICS_DB_POOL_MAX_LIFETIME', '1800')),
+            max_idle=float(os.getenv('ANALYTICS_DB_POOL_MAX_IDLE', '300')),
+            health_check_after=float(os.getenv('ANALYTICS_DB_POOL_HEALTH_CHECK_AFTER', '30')),
+            timeout=float(os.getenv('ANALYTICS_DB_POOL_TIMEOUT', '10')),
+            on_checkout=on_checkout,
+        )
+
+    def _reset_state(self):
+        # Connections inherited across fork() belong to the parent's sockets,
+        # so a child process simply forgets them and starts a fresh pool.
+        self._pid = os.getpid()
+        self._idle = []
+        self._in_use = 0
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'recycled_max_lifetime': 0,
+            'recycled_max_idle': 0,
+            'health_check_failures': 0,
+            'broken_on_return': 0,
+            'checkouts': 0,
+            'checkout_timeouts': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the with-block"""
+        pooled = self.checkout()
+        broken = False
+        try:
+            yield pooled.conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.checkin(pooled, broken=broken)
+
+    def checkout(self):
+        """Return a healthy PooledConnection, creating one if there is room"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        with self._cond:
+            if os.getpid() != self._pid:
+                self._reset_state()
+
+            while True:
+                now = time.monotonic()
+                pooled = self._take_idle(now)
+                if pooled is not None:
+                    break
+                if self._size() < self.max_size:
+                    # Reserve the slot before releasing the lock to connect
+                    self._in_use += 1
+                    pooled = None
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats['checkout_timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No database connection available after {self.timeout}s '
+                        f'(pool max_size={self.max_size})'
+                    )
+                self._cond.wait(remaining)
+
+            if pooled is not None:
+                self._in_use += 1
+
+        if pooled is None:
+            try:
+                pooled = PooledConnection(self._connect())
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats['connections_created'] += 1
+        elif pooled.idle_for(time.monotonic()) > self.health_check_after:
+            pooled = self._health_checked(pooled)
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds_total'] += waited
+            self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+        if self._on_checkout is not None:
+            self._on_checkout(waited)
+        return pooled
+
+    def checkin(self, pooled, broken=False):
+        """Return a connection to the pool, discarding it if it is unusable"""
+        now = time.monotonic()
+        conn = pooled.conn
+
+        if not broken and not conn.closed:
+            try:
+                # End the implicit read transaction so the connection is clean
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        if conn.closed:
+            broken = True
+
+        recycle = broken or pooled.age(now) > self.max_lifetime
+        with self._cond:
+            self._in_use -= 1
+            if os.getpid() != self._pid:
+                self._cond.notify()
+                return
+            if broken:
+                self._stats['broken_on_return'] += 1
+            elif recycle:
+                self._stats['recycled_max_lifetime'] += 1
+            else:
+                pooled.last_used = now
+                self._idle.append(pooled)
+            self._cond.notify()
+
+        if recycle:
+            self._close(pooled)
+
+    def stats(self):
+        """Snapshot of pool configuration, occupancy and counters"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'pid': self._pid,
+                'size': self._size(),
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_lifetime_seconds': self.max_lifetime,
+            })
+        checkouts = snapshot['checkouts']
+        snapshot['wait_seconds_avg'] = (
+            snapshot['wait_seconds_total'] / checkouts if checkouts else 0.0
+        )
+        return snapshot
+
+    def close_all(self):
+        """Close every idle connection (in-use ones are closed on return)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._close(pooled)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _size(self):
+        return len(self._idle) + self._in_use
+
+    def _take_idle(self, now):
+        """Pop the most recently used idle connection, pruning stale ones"""
+        expired = []
+        pooled = None
+        while self._idle:
+            candidate = self._idle.pop()
+            if candidate.conn.closed or candidate.age(now) > self.max_lifetime:
+                self._stats['recycled_max_lifetime'] += 1
+                expired.append(candidate)
+                continue
+            pooled = candidate
+            break
+
+        # Trim connections that have idled too long, oldest first
+        while len(self._idle) > max(self.min_size - 1, 0) and \
+                self._idle[0].idle_for(now) > self.max_idle:
+            self._stats['recycled_max_idle'] += 1
+            expired.append(self._idle.pop(0))
+
+        for stale in expired:
+            self._close(stale, locked=True)
+        return pooled
+
+    def _health_checked(self, pooled):
+        """Ping a connection that has been idle; replace it if the ping fails"""
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            pooled.conn.rollback()
+            return pooled
+        except psycopg2.Error:
+            with self._cond:
+                self._stats['health_check_failures'] += 1
+            self._close(pooled)
+            try:
+                replacement = PooledConnection(self._connect())
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats['connections_created'] += 1
+            return replacement
+
+    def _close(self, pooled, locked=False):
+        try:
+            pooled.conn.close()
+        except psycopg2.Error:
+            pass
+        if locked:
+            self._stats['connections_closed'] += 1
+        else:
+            with self._cond:
+                self._stats['connections_closed'] += 1
@@ -0,0 +1,321 @@
+"""
+In-memory lookup structures built from the aggregates tables.
+
+Some graph lookups are too selective or too chatty to send to Postgres on
+every request (autocomplete keystrokes, substring matches on company names,
+per-user recommendation lookups on every profile view).
+A WatermarkedIndex loads its source table once, builds an immutable snapshot
+optimized for the lookup, and swaps in a rebuilt snapshot when the data
+watermark shows the ETL has refreshed the table. Readers always see one
+complete snapshot and never wait for a build: until the first load finishes
+they get None and query Postgres instead.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Planner estimates of the source tables' row counts (-1: never analyzed)
+TABLE_ESTIMATE_QUERY = """
+    SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = ANY(%s::regclass[]);
+"""
+
+
+class WatermarkedIndex:
+    """
+    Base class for a snapshot rebuilt when its source tables change.
+
+    Subclasses set `name`, `sources` and `query` (a statement taking the row
+    limit as its only parameter) and implement build(columns), which turns the
+    columnar query result into the snapshot object.
+
+    execute   -- callable(query, params) returning a columnar result
+                 (column name -> list of values)
+    watermark -- result_cache.DataWatermark used to detect refreshes
+    max_rows  -- tables larger than this are not loaded; snapshot() then
+                 returns None and callers fall back to querying Postgres.
+                 When the table may be that large, its rows are counted in
+                 Postgres first rather than fetched and thrown away.
+    """
+
+    name = None
+    sources = ()
+    query = None
+
+    def __init__(self, execute, watermark, max_rows=None):
+        self._execute = execute
+        self._watermark = watermark
+        self.max_rows = max_rows or int(os.getenv('MEMORY_INDEX_MAX_ROWS', '2000000'))
+        self._snapshot = None
+        self._version = None
+        self._loaded = False
+        self._oversized = False
+        self._lock = threading.Lock()
+        # pid of the process running a background rebuild (a forked worker
+        # must not wait for its parent's thread)
+        self._rebuilding = None
+        self._warming_pid = None
+        self._stats = {'builds': 0, 'build_failures': 0, 'rows': 0,
+                       'last_build_ms': None, 'built_at': None, 'available': False}
+
+    def build(self, columns):
+        raise NotImplementedError
+
+    @property
+    def loaded(self):
+        """Whether the first load has finished (its snapshot may still be None)"""
+        return self._loaded
+
+    @property
+    def count_query(self):
+        """The number of rows query returns, capped by the same LIMIT"""
+        return f"SELECT COUNT(*) AS row_count FROM ({self.query.strip().rstrip(';')}) capped;"
+
+    def snapshot(self):
+        """Current snapshot (None until the first load, or if the table is too large)"""
+        version = self._watermark.current(self.sources)
+        if not self._loaded or version != self._version:
+            # Callers query Postgres until the first load has finished
+            self.rebuild_in_background(version)
+        return self._snapshot
+
+    def current_snapshot(self):
+        """Snapshot of the current data version; None while a newer one is built.
+
+        For callers whose response is cached under the current version and
+        must not be built from the previous data.
+        """
+        snapshot = self.snapshot()
+        if self._version != self._watermark.current(self.sources):
+            return None
+        return snapshot
+
+    def reload(self):
+        """Rebuild the snapshot now, in this thread (e.g. after changing max_rows)"""
+        with self._lock:
+            self._rebuild(self._watermark.current(self.sources))
+
+    def warm(self):
+        """Start the initial load in the background (once per process)"""
+        with self._lock:
+            if self._loaded or self._warming_pid == os.getpid():
+                return
+            self._warming_pid = os.getpid()
+        self.rebuild_in_background(self._watermark.current(self.sources))
+
+    def on_watermark_change(self, changed_sources):
+        if self._loaded and changed_sources & set(self.sources):
+            self.rebuild_in_background(self._watermark.current(self.sources))
+
+    def rebuild_in_background(self, version):
+        with self._lock:
+            if self._rebuilding == os.getpid():
+                return
+            self._rebuilding = os.getpid()
+        threading.Thread(target=self._background_rebuild, args=(version,),
+                         name=f'index-{self.name}', daemon=True).start()
+
+    def _background_rebuild(self, version):
+        try:
+            self._rebuild(version)
+        except Exception:
+            # Keep serving the previous snapshot and don't retry this version
+            logger.exception('Rebuilding %s index failed', self.name)
+            self._version = version
+        finally:
+            with self._lock:
+                self._rebuilding = None
+
+    def _capped_row_count(self):
+        """Rows query returns (up to max_rows + 1), or None when surely fewer.
+
+        Counted only when the planner's estimate of the source tables, or the
+        previous build, says the table may be too large to load.
+        """
+        estimates = self._execute(TABLE_ESTIMATE_QUERY, (list(self.sources),))['estimate']
+        if (not self._oversized and all(estimate >= 0 for estimate in estimates)
+                and sum(estimates) <= self.max_rows):
+            return None
+        return self._execute(self.count_query, (self.max_rows + 1,))['row_count'][0]
+
+    def _rebuild(self, version):
+        started = time.perf_counter()
+        try:
+            rows = self._capped_row_count()
+            if rows is None or rows <= self.max_rows:
+                columns = self._execute(self.query, (self.max_rows + 1,))
+                rows = len(next(iter(columns.values()), ()))
+        except Exception:
+            self._stats['build_failures'] += 1
+            raise
+
+        self._oversized = rows > self.max_rows
+        if self._oversized:
+            logger.warning('%s has more than %d rows; %s index disabled',
+                           ', '.join(self.sources), self.max_rows, self.name)
+            snapshot = None
+        else:
+            snapshot = self.build(columns)
+
+        # Single reference swaps: readers see the old or the new snapshot
+        self._snapshot = snapshot
+        self._version = version
+        self._loaded = True
+        self._stats.update({
+            'builds': self._stats['builds'] + 1,
+            'rows': rows,
+            'last_build_ms': round((time.perf_counter() - started) * 1000, 2),
+            'built_at': time.time(),
+            'available': snapshot is not None,
+        })
+
+    def stats(self):
+        return {'sources': list(self.sources),
+                'rebuilding': self._rebuilding == os.getpid(),
+                **self._stats}
+
+
+class CompanyNames:
+    """Company ids and names with a trigram index for substring matches"""
+
+    __slots__ = ('ids', 'names', 'folded', 'weights', 'trigrams')
+
+    def __init__(self, ids, names, weights):
+        self.ids = ids
+        self.names = names
+        self.folded = [(name or '').lower() for name in names]
+        self.weights = weights
+        trigrams = {}
+        for position, name in enumerate(self.folded):
+            for gram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                trigrams.setdefault(gram, []).append(position)
+        self.trigrams = {gram: frozenset(positions) for gram, positions in trigrams.items()}
+
+    def _candidates(self, needle):
+        if len(needle) < 3:
+            # Too short for a trigram; a pass over the names is still cheap
+            return range(len(self.folded))
+        postings = []
+        for gram in {needle[i:i + 3] for i in range(len(needle) - 2)}:
+            positions = self.trigrams.get(gram)
+            if positions is None:
+                return ()
+            postings.append(positions)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def search(self, text):
+        """Positions of companies whose name contains text (case-insensitive)"""
+        needle = text.lower()
+        # Trigrams only narrow the candidates; the substring check is exact
+        return [p for p in self._candidates(needle) if needle in self.folded[p]]
+
+    def matching_ids(self, text):
+        return sorted({self.ids[p] for p in self.search(text)})
+
+    def autocomplete(self, text, limit=10):
+        """Best matches for a search box: prefix matches first, then by size"""
+        needle = text.lower()
+        ranked = sorted(
+            self.search(text),
+            key=lambda p: (not self.folded[p].startswith(needle), -self.weights[p],
+                           self.folded[p]),
+        )
+        return [
+            {'company_id': self.ids[p], 'company_name': self.names[p],
+             'shared_employees': self.weights[p]}
+            for p in ranked[:limit]
+        ]
+
+
+class CompanyNameIndex(WatermarkedIndex):
+    """Names of every company on either side of a company_network_map edge"""
+
+    name = 'company_names'
+    sources = ('aggregates.company_network_map',)
+    query = """
+        SELECT
+            company_id,
+            company_name,
+            SUM(shared_employee_count)::bigint AS shared_employees
+        FROM (
+            SELECT company_id_1 AS company_id, company_name_1 AS company_name,
+                   shared_employee_count
+            FROM aggregates.company_network_map
+            UNION ALL
+            SELECT company_id_2, company_name_2, shared_employee_count
+            FROM aggregates.company_network_map
+        ) edges
+        GROUP BY company_id, company_name
+        LIMIT %s;
+    """
+
+    def build(self, columns):
+        return CompanyNames(
+            columns['company_id'],
+            columns['company_name'],
+            [weight or 0 for weight in columns['shared_employees']],
+        )
+
+
+class UserRows:
+    """Rows grouped by user_id: parallel column lists plus per-user offsets"""
+
+    __slots__ = ('names', 'columns', 'offsets')
+
+    def __init__(self, columns):
+        self.names = list(columns)
+        self.columns = [columns[name] for name in self.names]
+        # Rows arrive ordered by user_id, so each user is one contiguous slice
+        offsets = {}
+        start = 0
+        user_ids = columns['user_id']
+        for position in range(1, len(user_ids) + 1):
+            if position == len(user_ids) or user_ids[position] != user_ids[start]:
+                offsets[user_ids[start]] = (start, position)
+                start = position
+        self.offsets = offsets
+
+    def rows_for(self, user_id):
+        """The user's rows as dicts, best first; [] for unknown users"""
+        span = self.offsets.get(user_id)
+        if span is None:
+            return []
+        start, end = span
+        names = self.names
+        return [dict(zip(names, row))
+                for row in zip(*(column[start:end] for column in self.columns))]
+
+
+class UserTopKIndex(WatermarkedIndex):
+    """
+    The best top_k rows per user of an aggregates table, pre-sorted by score.
+
+    table and score_column are trusted identifiers from the route definitions;
+    top_k=None keeps every row.
+    """
+
+    def __init__(self, execute, watermark, name, table, columns, score_column,
+                 top_k=None, max_rows=None):
+        super().__init__(execute, watermark, max_rows)
+        self.name = name
+        self.sources = (table,)
+        rank_filter = f'WHERE user_rank <= {int(top_k)}' if top_k else ''
+        self.query = f"""
+            SELECT {', '.join(columns)}
+            FROM (
+                SELECT {', '.join(columns)},
+                       ROW_NUMBER() OVER (PARTITION BY user_id
+                                          ORDER BY {score_column} DESC) AS user_rank
+                FROM {table}
+            ) ranked
+            {rank_filter}
+            ORDER BY user_id, user_rank
+            LIMIT %s;
+        """
+
+    def build(self, columns):
+        return UserRows(columns)
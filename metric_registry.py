@@ -0,0 +1,509 @@
+"""
+Declarative registry of the single-table data routes.
+
+Most /api routes are one SELECT over one aggregates table: some columns, an
+optional date filter, an order and a limit. A Metric declares that once; the
+route and its result-cache sources, the SQL shown in the dashboard's SQL
+modal and the projection from an in-memory table window are all derived from
+the declaration (see metric_route in app.py).
+
+Because the row set of each metric is declared rather than buried in a SQL
+string, the planner can fuse metrics: metrics that read the same rows of the
+same table (same source, filter, grouping and order) are answered by one
+SELECT of the union of their columns, and each takes its own columns and row
+limit from the result. Batch requests and cache pre-warm runs prefetch their
+metrics this way, one query per row set instead of one per route.
+
+Time series can also be read over any date range, re-bucketed into a coarser
+grain, downsampled for drawing and cut down to the rows changed since a
+client's copy (Metric.query, from_window, reshape, downsample and
+rows_since).
+"""
+
+import contextvars
+import logging
+import re
+import textwrap
+import threading
+import time
+from datetime import date, timedelta
+
+import rollups
+from rollups import AGGREGATES, GRAINS as ROLLUPS
+
+logger = logging.getLogger(__name__)
+
+RESPONSES = ('series', 'rows', 'row', 'stream')
+GRAINS = ('day', 'week', 'month')
+# Grains a series can be re-bucketed into, finest first
+SERIES_GRAINS = ('day',) + ROLLUPS
+
+_ALIASED = re.compile(r'^(.*?)\s+as\s+(\w+)$', re.IGNORECASE | re.DOTALL)
+_IDENTIFIER = re.compile(r'^\w+$')
+_AGGREGATE_CALL = re.compile(r'\b(sum|count|avg|min|max)\s*\(', re.IGNORECASE)
+_WINDOW_AGGREGATE = re.compile(r'^(\w+)\((\w+)\)$')
+
+
+def _select_item(item):
+    """(expression, alias) of a select-list item: 'column' or 'expression AS alias'"""
+    match = _ALIASED.match(item.strip())
+    if match:
+        return match.group(1).strip(), match.group(2)
+    if not _IDENTIFIER.match(item.strip()):
+        raise ValueError(f'Select item needs an alias: {item!r}')
+    return item.strip(), item.strip()
+
+
+def _clause(keyword, text):
+    """A SQL clause, with multi-line text indented under its keyword"""
+    text = textwrap.dedent(text).strip()
+    if '\n' in text:
+        return f"{keyword}\n{textwrap.indent(text, '    ')}"
+    return f'{keyword} {text}'
+
+
+class Metric:
+    """
+    One data route declared as a query over a single table.
+
+    name        -- Flask endpoint name of the route
+    path        -- URL rule, e.g. '/api/new-users/daily'
+    source      -- table read; its watermark invalidates cached responses
+    columns     -- select-list items: 'column' or 'expression AS alias'
+    date_column -- the table's date column, and grain the grain of its rows
+                   ('day', 'week' or 'month')
+    days        -- only rows dated within the last `days` days
+    where       -- extra SQL filter
+    rollup      -- DATE_TRUNC unit ('week', ...) to group the rows into;
+                   the first day of each bucket is returned in a column of
+                   that name and columns are aggregates such as
+                   'SUM(new_signups) AS new_users'
+    group_by    -- SQL GROUP BY for groupings other than a rollup
+    order_by    -- SQL ORDER BY (default: newest date first)
+    limit       -- row limit
+    response    -- 'series' (rows, or columns with ?format=columnar),
+                   'rows', 'row' (the first row as an object) or 'stream'
+    variants    -- extra query strings the pre-warmer keeps warm
+    window      -- table_window.TableWindow over source that can answer the
+                   metric from memory
+    modal       -- {chart key: title} entries for /api/sql-queries
+    resample    -- {aggregate: columns} for re-bucketing a time series into a
+                   coarser grain, e.g. {'sum': ('new_signups',)}; other
+                   value columns are averaged
+    """
+
+    def __init__(self, name, path, source, columns, description=None, date_column=None,
+                 grain=None, days=None, where=None, rollup=None, group_by=None,
+                 order_by=None, limit=None, response='series', variants=(), window=None,
+                 modal=None, resample=None):
+        if response not in RESPONSES:
+            raise ValueError(f'{name}: response must be one of {RESPONSES}')
+        if grain is not None and grain not in GRAINS:
+            raise ValueError(f'{name}: grain must be one of {GRAINS}')
+        if rollup is not None and rollup not in ROLLUPS:
+            raise ValueError(f'{name}: rollup must be one of {ROLLUPS}')
+        if (days is not None or rollup is not None) and date_column is None:
+            raise ValueError(f'{name}: days and rollup need a date_column')
+
+        self.name = name
+        self.path = path
+        self.source = source
+        self.sources = (source,)
+        self.description = description
+        self.date_column = date_column
+        self.grain = rollup or grain
+        self.days = days
+        self.rollup = rollup
+        self.limit = limit
+        self.response = response
+        self.variants = tuple(variants)
+        self.window = window
+        self.modal = modal or {}
+
+        self.columns = [_select_item(item) for item in columns]
+        custom_sql = where is not None or group_by is not None
+        self._filter = textwrap.dedent(where).strip() if where is not None else None
+        filters = []
+        if days is not None:
+            filters.append(f"{date_column} >= CURRENT_DATE - INTERVAL '{int(days)} days'")
+        if self._filter is not None:
+            filters.append(self._filter)
+        if rollup is not None:
+            bucket = f"DATE_TRUNC('{rollup}', {date_column})"
+            # A date, as computed by rollups.py, whatever the session time zone
+            self.columns.insert(0, (f'{bucket}::date', rollup))
+            group_by = bucket
+            order_by = order_by or f'{rollup} DESC'
+        elif date_column is not None:
+            order_by = order_by or f'{date_column} DESC'
+        self.where = ' AND '.join(filters) or None
+        self.group_by = group_by
+        self.order_by = order_by
+        self.is_aggregate = group_by is None and any(
+            _AGGREGATE_CALL.search(expression) for expression, _ in self.columns)
+
+        self.resample = {}
+        for function, names in (resample or {}).items():
+            if function not in AGGREGATES:
+                raise ValueError(f'{name}: unknown resample aggregate {function!r}')
+            self.resample.update(dict.fromkeys(names, function))
+        unknown = set(self.resample) - set(self.value_columns)
+        if unknown:
+            raise ValueError(f'{name}: cannot resample {", ".join(sorted(unknown))}')
+
+        if window is not None:
+            self._check_window(custom_sql)
+        self.sql = self.compose(self.columns, limit)
+
+    @property
+    def row_set(self):
+        """Metrics with the same row set can be answered by one SELECT"""
+        return (self.source, self.where, self.group_by, self.order_by, self.is_aggregate)
+
+    @property
+    def is_time_series(self):
+        """One row per date (or rollup bucket), ordered by date alone"""
+        return self.response == 'series' and self.date_column is not None and (
+            self.rollup is not None or self.order_by == f'{self.date_column} DESC')
+
+    @property
+    def date_alias(self):
+        """Output name of the date (or rollup bucket) column"""
+        if self.rollup is not None:
+            return self.rollup
+        return next(alias for expression, alias in self.columns
+                    if expression == self.date_column)
+
+    @property
+    def value_columns(self):
+        """Output names of the columns other than the date"""
+        return [alias for expression, alias in self.columns
+                if expression != self.date_column and alias != self.rollup]
+
+    @property
+    def fusable(self):
+        # Streamed results are unbounded and must not be buffered
+        return self.response != 'stream'
+
+    def compose(self, columns, limit, where=None, group_by=None):
+        """SELECT of (expression, alias) columns over this metric's rows
+        (or the rows matching where, grouped by group_by, if given)"""
+        where = where or self.where
+        group_by = group_by or self.group_by
+        items = ',\n'.join(
+            f'    {expression}' if expression == alias else f'    {expression} as {alias}'
+            for expression, alias in columns)
+        clauses = [f'SELECT\n{items}', f'FROM {self.source}']
+        if where is not None:
+            clauses.append(_clause('WHERE', where))
+        if group_by is not None:
+            clauses.append(_clause('GROUP BY', group_by))
+        if self.order_by is not None:
+            clauses.append(_clause('ORDER BY', self.order_by))
+        if limit is not None:
+            clauses.append(f'LIMIT {int(limit)}')
+        return '\n'.join(clauses) + ';'
+
+    def _check_window(self, custom_sql):
+        """A window answers the metric only when no SQL has to be evaluated"""
+        available = set(self.window.columns)
+        if custom_sql:
+            raise ValueError(f'{self.name}: where and group_by cannot be answered from a window')
+        if self.date_column != self.window.date_column:
+            raise ValueError(f'{self.name}: window is over a different date column')
+        if self.rollup is not None and self.days is not None:
+            raise ValueError(f'{self.name}: rollups over a date filter cannot use a window')
+        for expression, alias in self.columns:
+            if self.rollup is not None and alias == self.rollup:
+                # Bucketed from the window's date column
+                continue
+            if self.rollup is not None:
+                match = _WINDOW_AGGREGATE.match(expression)
+                if match is None or match.group(1).lower() not in AGGREGATES:
+                    raise ValueError(f'{self.name}: {expression!r} is not a window aggregate')
+                expression = match.group(2)
+            if expression not in available:
+                raise ValueError(f'{self.name}: window has no column {expression!r}')
+
+    def check_grain(self, grain):
+        """ValueError unless the series can be re-bucketed into grain"""
+        if grain not in SERIES_GRAINS:
+            raise ValueError(f'grain must be one of {", ".join(SERIES_GRAINS)}')
+        if SERIES_GRAINS.index(grain) < SERIES_GRAINS.index(self.grain):
+            raise ValueError(f'grain must be {self.grain} or coarser')
+
+    def date_range(self, start, end, grain, today):
+        """(start, end) ISO dates a ?from=&to= request reads, both inclusive.
+
+        end defaults to today, and start to the metric's `days` before end
+        (no lower bound for metrics without one). start is moved back to the
+        first day of its bucket so that the first bucket is complete.
+        """
+        end = end or today
+        if start is None and self.days is not None:
+            start = (date.fromisoformat(end) - timedelta(days=self.days)).isoformat()
+        if start is not None:
+            start = rollups.bucket_start(start, grain or self.grain)
+            if start > end:
+                raise ValueError('from must not be after to')
+        return start, end
+
+    def query(self, bounds=None, grain=None):
+        """(sql, params) reading the metric's rows dated within bounds, a
+        (start, end) pair from date_range that replaces its own date filter
+        and limit, with rollups bucketed by grain"""
+        regrouped = self.rollup is not None and grain not in (None, self.rollup)
+        if bounds is None and not regrouped:
+            return self.sql, None
+
+        columns, group_by = self.columns, None
+        if regrouped:
+            bucket = f"DATE_TRUNC('{grain}', {self.date_column})"
+            columns = [(f'{bucket}::date', self.rollup)] + self.columns[1:]
+            group_by = bucket
+        if bounds is None:
+            return self.compose(columns, self.limit, group_by=group_by), None
+
+        start, end = bounds
+        filters, params = [f'{self.date_column} <= %s'], [end]
+        if start is not None:
+            filters.insert(0, f'{self.date_column} >= %s')
+            params.insert(0, start)
+        if self._filter is not None:
+            filters.append(self._filter)
+        return self.compose(columns, None, where=' AND '.join(filters),
+                            group_by=group_by), params
+
+    def from_window(self, window, today, bounds=None, grain=None):
+        """The metric's columns computed from a table_window.WindowRows snapshot.
+
+        bounds and grain are as for query(); None when bounds reach back past
+        the rows the window holds.
+        """
+        positions = None
+        if bounds is not None:
+            positions = window.between(*bounds)
+            if positions is None:
+                return None
+
+        if self.rollup is not None:
+            aggregates = {}
+            for expression, alias in self.columns[1:]:
+                function, column = _WINDOW_AGGREGATE.match(expression).groups()
+                aggregates[alias] = (function.lower(), column)
+            return window.rollup(grain or self.rollup, aggregates,
+                                 groups=None if bounds else self.limit, key=self.rollup,
+                                 rows=positions)
+
+        renames = {expression: alias for expression, alias in self.columns}
+        if positions is not None:
+            first, stop = positions
+            return window.project(list(renames), rows=stop, renames=renames, start=first)
+        rows = None if self.days is None else window.since(self.days, today)
+        if self.limit is not None:
+            rows = self.limit if rows is None else min(rows, self.limit)
+        return window.project(list(renames), rows=rows, renames=renames)
+
+    def derive(self, columns, rolling=None, deltas=False):
+        """columns plus, for each value column, its trailing `rolling`-row
+        average and/or its change and percent change from the previous row"""
+        columns = dict(columns)
+        for name in self.value_columns:
+            values = columns[name]
+            if rolling:
+                columns[f'{name}_rolling_avg'] = rollups.rolling(values, rolling)
+            if deltas:
+                columns[f'{name}_change'], columns[f'{name}_change_pct'] = \
+                    rollups.period_deltas(values)
+        return columns
+
+    def reshape(self, columns, grain=None, rolling=None, deltas=False):
+        """Series columns re-bucketed into grain, with the derived columns of
+        derive()"""
+        if grain not in (None, self.grain) and self.rollup is None:
+            aggregates = {name: (self.resample.get(name, 'avg'), name)
+                          for name in self.value_columns}
+            frame = rollups.SeriesFrame(columns[self.date_alias], columns)
+            columns = frame.rollup(grain, aggregates, key=self.date_alias)
+        if rolling or deltas:
+            columns = self.derive(columns, rolling, deltas)
+        return columns
+
+    def downsample(self, columns, points):
+        """Series columns reduced to `points` rows, picked by the shape of the
+        first value column (rollups.lttb)"""
+        kept = rollups.lttb(columns[self.date_alias], columns[self.value_columns[0]], points)
+        return {name: [values[i] for i in kept] for name, values in columns.items()}
+
+    def rows_since(self, columns, since, overlap=0):
+        """Series columns limited to the rows dated on or after since (ISO
+        date), plus the `overlap` rows before them"""
+        dates = columns[self.date_alias]
+        count = 0
+        # Newest first; ISO dates compare correctly as strings
+        while count < len(dates) and dates[count] >= since:
+            count += 1
+        count = min(count + overlap, len(dates))
+        return {name: values[:count] for name, values in columns.items()}
+
+
+class FusedQuery:
+    """One SELECT answering several metrics that read the same rows"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        fused_alias = {}
+        columns = []
+        self._outputs = {}
+        for metric in metrics:
+            outputs = []
+            for expression, alias in metric.columns:
+                if expression not in fused_alias:
+                    # Two metrics may use one alias for different expressions
+                    taken = {name for _, name in columns}
+                    name = alias if alias not in taken else f'{alias}_{len(columns)}'
+                    fused_alias[expression] = name
+                    columns.append((expression, name))
+                outputs.append((alias, fused_alias[expression]))
+            self._outputs[metric.name] = outputs
+
+        limits = [metric.limit for metric in metrics]
+        limit = None if None in limits else max(limits)
+        self.sql = metrics[0].compose(columns, limit)
+
+    def split(self, columns):
+        """{metric name: its columns} from the columnar result of self.sql"""
+        return {
+            metric.name: {alias: columns[fused][:metric.limit]
+                          for alias, fused in self._outputs[metric.name]}
+            for metric in self.metrics
+        }
+
+
+class MetricRegistry:
+    """
+    The declared metrics, and prefetching of several of them at once.
+
+    execute   -- callable(query) returning a columnar result
+    watermark -- result_cache.DataWatermark; prefetched results are only
+                 served for the data version they were read at
+    executor  -- thread pool the fused queries of one prefetch run on
+    database  -- database name shown in the SQL modal
+    """
+
+    def __init__(self, execute, watermark, executor, database):
+        self._execute = execute
+        self._watermark = watermark
+        self._executor = executor
+        self.database = database
+        self.metrics = {}
+        self._by_path = {}
+        self._lock = threading.Lock()
+        # metric name -> [version, columns, requests left to serve]
+        self._prefetched = {}
+        self._stats = {'fused_queries': 0, 'fused_metrics': 0, 'fused_failures': 0,
+                       'prefetched_served': 0, 'last_fused_ms': None}
+
+    def register(self, name, path, source, columns, **options):
+        if name in self.metrics or path in self._by_path:
+            raise ValueError(f'Metric {name} ({path}) is already registered')
+        metric = Metric(name, path, source, columns, **options)
+        self.metrics[name] = metric
+        self._by_path[path] = metric
+        return metric
+
+    def for_path(self, path):
+        return self._by_path.get(path)
+
+    def plan(self, metrics):
+        """FusedQuery for each row set read by two or more of metrics.
+
+        Metrics currently answered from a table window need no query at all,
+        and the rest are left to run on their own.
+        """
+        groups = {}
+        for metric in dict.fromkeys(metrics):
+            if not metric.fusable:
+                continue
+            if metric.window is not None and metric.window.current_snapshot() is not None:
+                continue
+            groups.setdefault(metric.row_set, []).append(metric)
+        return [FusedQuery(group) for group in groups.values() if len(group) > 1]
+
+    def prefetch(self, metrics):
+        """Run the fused queries for metrics, for the next requests to serve.
+
+        metrics may repeat a metric once per request that will be made for
+        it (e.g. with and without ?format=columnar); each prefetched result
+        is kept until that many requests have taken it.
+        """
+        metrics = list(metrics)
+        fused = self.plan(metrics)
+        if not fused:
+            return
+        # Each query runs in a copy of the caller's context so its DB time is
+        # counted for the request that triggered the prefetch
+        futures = [(query, self._watermark.current(query.metrics[0].sources),
+                    self._executor.submit(contextvars.copy_context().run, self._run, query))
+                   for query in fused]
+        for query, version, future in futures:
+            columns = future.result()
+            if columns is None:
+                continue
+            with self._lock:
+                for name, result in query.split(columns).items():
+                    uses = sum(1 for metric in metrics if metric.name == name)
+                    self._prefetched[name] = [version, result, uses]
+
+    def _run(self, query):
+        started = time.perf_counter()
+        try:
+            columns = self._execute(query.sql)
+        except Exception:
+            # The routes fall back to their own queries
+            logger.exception('Fused query for %s failed',
+                             ', '.join(metric.name for metric in query.metrics))
+            with self._lock:
+                self._stats['fused_failures'] += 1
+            return None
+        with self._lock:
+            self._stats['fused_queries'] += 1
+            self._stats['fused_metrics'] += len(query.metrics)
+            self._stats['last_fused_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return columns
+
+    def take_prefetched(self, metric):
+        """Prefetched columns of metric for the current data version, if any"""
+        with self._lock:
+            entry = self._prefetched.get(metric.name)
+            if entry is None:
+                return None
+            entry[2] -= 1
+            if entry[2] <= 0:
+                del self._prefetched[metric.name]
+        if entry[0] != self._watermark.current(metric.sources):
+            return None
+        with self._lock:
+            self._stats['prefetched_served'] += 1
+        return entry[1]
+
+    def modal_queries(self):
+        """/api/sql-queries entries: the SQL each dashboard chart's route runs"""
+        queries = {}
+        for metric in self.metrics.values():
+            schema = metric.source.split('.')[0]
+            for key, title in metric.modal.items():
+                queries[key] = {
+                    'name': title,
+                    'database': f'{self.database} ({schema} schema)',
+                    'query': metric.sql,
+                }
+        return queries
+
+    def stats(self):
+        with self._lock:
+            return {
+                'metrics': len(self.metrics),
+                'prefetched_pending': len(self._prefetched),
+                **self._stats,
+            }
@@ -0,0 +1,214 @@
+"""
+Per-request instrumentation and Prometheus text exposition.
+
+Every request gets a RequestTimings object in a context variable. The query
+helpers, the pool, in-memory rollups and the serializer add time to it by
+phase (pool_wait, sql, fetch, compute, serialize, write), along with row
+counts. When the response has been written, RequestMetrics folds the request
+into per-endpoint histograms, which /metrics renders in the Prometheus text
+format together with the cache and pool counters. There is no client
+library dependency; the exposition format is plain text.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ('pool_wait', 'sql', 'fetch', 'compute', 'serialize', 'write')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class RequestTimings:
+    """Phase durations and row count accumulated while serving one request"""
+
+    __slots__ = ('started', 'phases', 'rows', 'lock')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.rows = 0
+        # Parts of a request may run on worker threads (see query_parts.py)
+        self.lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self.lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+def begin_request():
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings():
+    return _current.get()
+
+
+def observe_phase(phase, seconds):
+    """Add seconds to phase of the current request (no-op outside a request)"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+def add_rows(count):
+    timings = _current.get()
+    if timings is not None:
+        with timings.lock:
+            timings.rows += count
+
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, time.perf_counter() - started)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}'
+        yield f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}'
+        yield f'{name}_sum{_labels(labels)} {_number(self.sum)}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+
+class RequestMetrics:
+    """Per-endpoint request counters and histograms for this worker"""
+
+    def __init__(self, prefix='analytics'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._duration = {}
+        self._phases = {}
+        self._rows = {}
+        self._bytes = {}
+
+    def finish(self, timings, endpoint, method, status, payload_bytes):
+        """Record a request whose response has been fully written"""
+        duration = time.perf_counter() - timings.started
+        with timings.lock:
+            phases = dict(timings.phases)
+            rows = timings.rows
+
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._histogram(self._duration, endpoint, LATENCY_BUCKETS).observe(duration)
+            for phase, seconds in phases.items():
+                self._histogram(self._phases, (endpoint, phase), LATENCY_BUCKETS).observe(seconds)
+            self._rows[endpoint] = self._rows.get(endpoint, 0) + rows
+            self._histogram(self._bytes, endpoint, SIZE_BUCKETS).observe(payload_bytes)
+
+    @staticmethod
+    def _histogram(family, key, buckets):
+        histogram = family.get(key)
+        if histogram is None:
+            histogram = family[key] = Histogram(buckets)
+        return histogram
+
+    def render(self, extra=()):
+        """Prometheus text format; extra is (name, type, help, [(labels, value)])"""
+        p = self.prefix
+        lines = []
+
+        with self._lock:
+            _header(lines, f'{p}_requests_total', 'counter', 'Requests served')
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                labels = {'endpoint': endpoint, 'method': method, 'status': status}
+                lines.append(f'{p}_requests_total{_labels(labels)} {count}')
+
+            _header(lines, f'{p}_request_duration_seconds', 'histogram',
+                    'Time from request start until the response was written')
+            for endpoint, histogram in sorted(self._duration.items()):
+                lines.extend(histogram.samples(f'{p}_request_duration_seconds',
+                                               {'endpoint': endpoint}))
+
+            _header(lines, f'{p}_request_phase_seconds', 'histogram',
+                    'Time per request spent in each phase: ' + ', '.join(PHASES))
+            for (endpoint, phase), histogram in sorted(self._phases.items()):
+                lines.extend(histogram.samples(f'{p}_request_phase_seconds',
+                                               {'endpoint': endpoint, 'phase': phase}))
+
+            _header(lines, f'{p}_rows_total', 'counter', 'Rows fetched from Postgres')
+            for endpoint, rows in sorted(self._rows.items()):
+                lines.append(f'{p}_rows_total{_labels({"endpoint": endpoint})} {rows}')
+
+            _header(lines, f'{p}_response_bytes', 'histogram',
+                    'Response payload size as sent (after compression)')
+            for endpoint, histogram in sorted(self._bytes.items()):
+                lines.extend(histogram.samples(f'{p}_response_bytes', {'endpoint': endpoint}))
+
+        for name, kind, help_text, samples in extra:
+            _header(lines, f'{p}_{name}', kind, help_text)
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f'{p}_{name}{_labels(labels)} {_number(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def process_rss_bytes():
+    """Resident set size of this worker, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def _labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
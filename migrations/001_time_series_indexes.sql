@@ -0,0 +1,47 @@
+-- Date indexes for the time-series tables.
+--
+-- Every chart reads a date range or the latest N periods:
+--   WHERE metric_date >= CURRENT_DATE - INTERVAL '30 days' ORDER BY metric_date DESC
+--   ORDER BY metric_month DESC [LIMIT 1]
+-- A backward scan of these indexes returns rows already in the order the
+-- routes ask for.
+--
+-- Run outside a transaction (psql -f does): CREATE INDEX CONCURRENTLY does
+-- not block the ETL, and IF NOT EXISTS makes re-running a no-op.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS daily_metrics_metric_date_idx
+    ON aggregates.daily_metrics (metric_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS monthly_metrics_metric_month_idx
+    ON aggregates.monthly_metrics (metric_month);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS post_metrics_metric_date_idx
+    ON aggregates.post_metrics (metric_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS finder_metrics_metric_date_idx
+    ON aggregates.finder_metrics (metric_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS collection_metrics_metric_date_idx
+    ON aggregates.collection_metrics (metric_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS profile_metrics_metric_date_idx
+    ON aggregates.profile_metrics (metric_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS funnel_metrics_metric_date_idx
+    ON aggregates.funnel_metrics (metric_date);
+
+-- /api/retention/cohorts: ORDER BY cohort_month DESC, weeks_since_signup ASC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS cohort_retention_month_week_idx
+    ON aggregates.cohort_retention (cohort_month DESC, weeks_since_signup);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_cohorts_cohort_month_idx
+    ON core.user_cohorts (cohort_month);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS kratos_daily_logins_metric_date_idx
+    ON aggregates.kratos_daily_logins (metric_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS kratos_mfa_adoption_metric_month_idx
+    ON aggregates.kratos_mfa_adoption (metric_month);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS kratos_activation_funnel_signup_week_idx
+    ON aggregates.kratos_activation_funnel (signup_week);
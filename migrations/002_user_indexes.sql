@@ -0,0 +1,14 @@
+-- Per-user tables: the top-N lists and filtered counts.
+
+-- /api/users/power-users:
+--   WHERE engagement_level IN ('POWER_USER', 'ACTIVE') ORDER BY engagement_score DESC LIMIT 50
+-- The summary card's COUNT(*) with the same filter is answered from this
+-- index too. The predicate must stay identical to the one in app.py for the
+-- planner to use it.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_engagement_levels_active_score_idx
+    ON aggregates.user_engagement_levels (engagement_score DESC)
+    WHERE engagement_level IN ('POWER_USER', 'ACTIVE');
+
+-- /api/kratos/security-alerts: ORDER BY unique_ips_7d DESC, session_count_7d DESC LIMIT 50
+CREATE INDEX CONCURRENTLY IF NOT EXISTS kratos_security_alerts_ips_sessions_idx
+    ON aggregates.kratos_security_alerts (unique_ips_7d DESC, session_count_7d DESC);
@@ -0,0 +1,42 @@
+-- Graph tables: keyset pages, per-user lookups and score-ordered lists.
+
+-- /api/graph/connection-recommendations, legacy list and ?cursor= pages:
+--   WHERE (recommendation_score, user_id, recommended_user_id) < (...)
+--   ORDER BY recommendation_score DESC, user_id DESC, recommended_user_id DESC
+-- Scanned backward; ascending columns keep the row comparison usable as an
+-- index condition.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS connection_recommendations_keyset_idx
+    ON aggregates.connection_recommendations (recommendation_score, user_id, recommended_user_id);
+
+-- /api/graph/connection-recommendations/<user_id> and the per-user index build:
+--   WHERE user_id = $1 ORDER BY recommendation_score DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS connection_recommendations_user_score_idx
+    ON aggregates.connection_recommendations (user_id, recommendation_score);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS skills_matching_scores_keyset_idx
+    ON aggregates.skills_matching_scores (proficiency_score, user_id, role_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS skills_matching_scores_user_score_idx
+    ON aggregates.skills_matching_scores (user_id, proficiency_score);
+
+-- /api/graph/company-network streams the table ORDER BY shared_employee_count
+-- DESC; the per-company lookups sort their matches the same way.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS company_network_map_shared_count_idx
+    ON aggregates.company_network_map (shared_employee_count);
+
+-- WHERE company_id_1 = ANY($1) OR company_id_2 = ANY($1): the primary key
+-- covers company_id_1, this covers the other side of the edge.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS company_network_map_company_id_2_idx
+    ON aggregates.company_network_map (company_id_2);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS career_path_patterns_user_count_idx
+    ON aggregates.career_path_patterns (user_count);
+
+-- WHERE alumni_count > 0 / user_count > 0 ORDER BY ... DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alumni_networks_alumni_count_idx
+    ON aggregates.alumni_networks (alumni_count)
+    WHERE alumni_count > 0;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS project_collaboration_graph_user_count_idx
+    ON aggregates.project_collaboration_graph (user_count)
+    WHERE user_count > 0;
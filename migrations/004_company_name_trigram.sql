@@ -0,0 +1,17 @@
+-- Trigram indexes for the company-name fallback.
+--
+-- /api/graph/company-network/<company_name> normally resolves names with the
+-- in-memory index (memory_index.py). When company_network_map is too large
+-- for it (MEMORY_INDEX_MAX_ROWS), the route falls back to
+--   WHERE company_name_1 ILIKE $1 OR company_name_2 ILIKE $1
+-- with a '%name%' pattern, which only a trigram index can serve.
+--
+-- CREATE EXTENSION needs a role allowed to create pg_trgm in this database.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS company_network_map_name_1_trgm_idx
+    ON aggregates.company_network_map USING gin (company_name_1 gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS company_network_map_name_2_trgm_idx
+    ON aggregates.company_network_map USING gin (company_name_2 gin_trgm_ops);
@@ -0,0 +1,167 @@
+"""
+Background pre-warmer for the result cache.
+
+Re-executes every registered /api/* data route on a schedule, right after
+startup, and whenever the data watermark reports that the aggregates were
+refreshed, so user requests land on a warm cache. Refreshes run through a
+small bounded thread pool so warming never floods the database, and the
+duration of each endpoint's last refresh is kept for /api/admin/prewarm.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class CachePrewarmer:
+    """
+    endpoints     -- callable returning the endpoint names to warm
+    refresh       -- callable(endpoint) that rebuilds one cache entry and
+                     returns its HTTP status code
+    interval      -- seconds between scheduled full runs
+    concurrency   -- max endpoints refreshed at the same time
+    poll          -- optional callable run every poll_interval seconds between
+                     runs (used to notice aggregates refreshes promptly)
+    prepare       -- optional callable(endpoints) run before each run's
+                     refreshes (used to fetch rows several endpoints share once)
+    """
+
+    def __init__(self, endpoints, refresh, interval=900, concurrency=2,
+                 poll=None, poll_interval=30, prepare=None):
+        self._endpoints = endpoints
+        self._refresh = refresh
+        self._prepare = prepare
+        self.interval = interval
+        self.concurrency = concurrency
+        self._poll = poll
+        self.poll_interval = poll_interval
+
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._endpoint_stats = {}
+        self._run_stats = {
+            'runs': 0,
+            'last_run_reason': None,
+            'last_run_started_at': None,
+            'last_run_seconds': None,
+            'last_run_failures': 0,
+        }
+        self._pending_reason = None
+
+    @classmethod
+    def from_env(cls, endpoints, refresh, poll=None, poll_interval=30, prepare=None):
+        return cls(
+            endpoints,
+            refresh,
+            interval=float(os.getenv('CACHE_PREWARM_INTERVAL', '900')),
+            concurrency=int(os.getenv('CACHE_PREWARM_CONCURRENCY', '2')),
+            poll=poll,
+            poll_interval=poll_interval,
+            prepare=prepare,
+        )
+
+    def start(self):
+        """Start the scheduler thread (once per process) and queue a startup run"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='cache-prewarm',
+                                            daemon=True)
+            self._thread.start()
+        self.trigger('startup')
+
+    def trigger(self, reason):
+        """Ask for a full run as soon as the scheduler is free"""
+        with self._lock:
+            self._pending_reason = self._pending_reason or reason
+        self._wake.set()
+
+    def on_watermark_change(self, changed_sources):
+        self.trigger('aggregates refresh: ' + ', '.join(sorted(changed_sources)))
+
+    def run_once(self, reason='manual'):
+        """Refresh every endpoint now, at most `concurrency` at a time"""
+        endpoints = list(self._endpoints())
+        started = time.time()
+        failures = 0
+        if self._prepare is not None:
+            try:
+                self._prepare(endpoints)
+            except Exception:
+                logger.exception('Pre-warm preparation failed')
+
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix='cache-prewarm-worker') as pool:
+            for endpoint, status, seconds, error in pool.map(self._refresh_one, endpoints):
+                if error is not None or status != 200:
+                    failures += 1
+                with self._lock:
+                    self._endpoint_stats[endpoint] = {
+                        'last_refreshed_at': time.time(),
+                        'last_duration_ms': round(seconds * 1000, 2),
+                        'last_status': status,
+                        'last_error': error,
+                    }
+
+        elapsed = time.time() - started
+        with self._lock:
+            self._run_stats.update({
+                'runs': self._run_stats['runs'] + 1,
+                'last_run_reason': reason,
+                'last_run_started_at': started,
+                'last_run_seconds': round(elapsed, 3),
+                'last_run_failures': failures,
+            })
+        logger.info('Cache pre-warm (%s): %d endpoints in %.2fs, %d failed',
+                    reason, len(endpoints), elapsed, failures)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval_seconds': self.interval,
+                'concurrency': self.concurrency,
+                **self._run_stats,
+                'endpoints': dict(sorted(self._endpoint_stats.items())),
+            }
+
+    def _refresh_one(self, endpoint):
+        started = time.perf_counter()
+        try:
+            status = self._refresh(endpoint)
+            return endpoint, status, time.perf_counter() - started, None
+        except Exception as e:
+            logger.exception('Pre-warm failed for %s', endpoint)
+            return endpoint, None, time.perf_counter() - started, str(e)
+
+    def _loop(self):
+        next_run = time.monotonic() + self.interval
+        while True:
+            timeout = min(self.poll_interval, max(next_run - time.monotonic(), 0))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+            if self._poll is not None:
+                try:
+                    self._poll()
+                except Exception:
+                    logger.exception('Pre-warm poll failed')
+
+            with self._lock:
+                reason, self._pending_reason = self._pending_reason, None
+            if reason is None and time.monotonic() >= next_run:
+                reason = 'schedule'
+            if reason is None:
+                continue
+
+            try:
+                self.run_once(reason)
+            except Exception:
+                logger.exception('Pre-warm run failed')
+            next_run = time.monotonic() + self.interval
@@ -0,0 +1,135 @@
+"""
+Independently cached parts of the summary-card queries.
+
+The summary endpoints used to pack every card into one statement of scalar
+subqueries, which Postgres runs one after another on a single backend, so the
+slowest COUNT(*) held up every card. Each group of cards is now a QueryPart
+with its own source tables and refresh cadence. The parts a request needs run
+concurrently on separate pooled connections and are merged into one row. A
+part that has gone stale keeps serving its previous value while it is
+refreshed in the background, up to a bounded staleness; merged() reports how
+old such a value is, so the response is not passed off as fresh.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPart:
+    """
+    A single-row query whose columns are merged into a summary response.
+
+    sources -- tables it reads; a watermark change invalidates the value
+    ttl     -- seconds before the value is refreshed even without a change
+    """
+
+    def __init__(self, name, query, sources, ttl):
+        self.name = name
+        self.query = query
+        self.sources = tuple(sources)
+        self.ttl = ttl
+        self.value = None
+        self.version = None
+        self.fetched_at = None
+        self.last_duration_ms = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    def is_fresh(self, version, now):
+        return self.version == version and now - self.fetched_at < self.ttl
+
+    def stats(self, now):
+        return {
+            'sources': list(self.sources),
+            'ttl_seconds': self.ttl,
+            'age_seconds': None if self.fetched_at is None else round(now - self.fetched_at, 1),
+            'last_duration_ms': self.last_duration_ms,
+            'refreshing': self.refreshing,
+        }
+
+
+class QueryPartRunner:
+    """
+    Fetches and caches QueryPart values.
+
+    execute   -- callable(query) returning a list of row dicts
+    watermark -- result_cache.DataWatermark
+    executor  -- thread pool the parts run on (sized to the connection pool)
+    max_stale -- seconds a stale value may still be served while refreshing
+    """
+
+    def __init__(self, execute, watermark, executor, max_stale):
+        self._execute = execute
+        self._watermark = watermark
+        self._executor = executor
+        self.max_stale = max_stale
+        self._parts = {}
+
+    def register(self, name, query, sources, ttl):
+        part = QueryPart(name, query, sources, ttl)
+        self._parts[name] = part
+        return part
+
+    def merged(self, parts):
+        """One dict with the columns of every part, fetching what is missing concurrently.
+
+        Returns (values, stale_age): stale_age is the age in seconds of the
+        oldest stale value served while it is refreshed, or 0 if none was.
+        """
+        now = time.time()
+        to_fetch = []
+        stale_age = 0
+        for part in parts:
+            version = self._watermark.current(part.sources)
+            if part.fetched_at is None or (not part.is_fresh(version, now)
+                                           and now - part.fetched_at > part.ttl + self.max_stale):
+                to_fetch.append((part, version))
+            elif not part.is_fresh(version, now):
+                stale_age = max(stale_age, now - part.fetched_at)
+                self._refresh_in_background(part, version)
+
+        # Every missing part gets its own connection; the request waits only
+        # for the slowest of them, not for their sum. Each runs in a copy of
+        # the caller's context so its DB time is counted for the request.
+        for future in [self._executor.submit(contextvars.copy_context().run,
+                                             self._fetch, part, version)
+                       for part, version in to_fetch]:
+            future.result()
+
+        merged = {}
+        for part in parts:
+            merged.update(part.value)
+        return merged, stale_age
+
+    def _fetch(self, part, version):
+        started = time.perf_counter()
+        rows = self._execute(part.query)
+        with part.lock:
+            part.value = dict(rows[0]) if rows else {}
+            part.version = version
+            part.fetched_at = time.time()
+            part.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def _refresh_in_background(self, part, version):
+        with part.lock:
+            if part.refreshing:
+                return
+            part.refreshing = True
+        self._executor.submit(self._background_refresh, part, version)
+
+    def _background_refresh(self, part, version):
+        try:
+            self._fetch(part, version)
+        except Exception:
+            logger.exception('Refreshing summary part %s failed', part.name)
+        finally:
+            with part.lock:
+                part.refreshing = False
+
+    def stats(self):
+        now = time.time()
+        return {name: part.stats(now) for name, part in sorted(self._parts.items())}
@@ -0,0 +1,284 @@
+"""
+In-process result cache for the /api/* routes.
+
+The dashboard reads pre-aggregated tables that only change when the ETL
+refresh runs, so serialized responses are cached in a memory-bounded LRU and
+tagged with the *data watermark* of the tables they were built from. When the
+watermark moves (the ETL wrote to a source table, or the calendar day rolled
+over for the CURRENT_DATE windows) the entry no longer matches and is rebuilt.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import compression
+
+logger = logging.getLogger(__name__)
+
+# Change counters plus the relation filenode: inserts/updates/deletes bump the
+# counters, TRUNCATE and non-concurrent REFRESH MATERIALIZED VIEW swap the
+# filenode. Reading pg_stat_user_tables never touches the tables themselves.
+WATERMARK_QUERY = """
+    SELECT
+        schemaname || '.' || relname AS source,
+        (n_tup_ins + n_tup_upd + n_tup_del)::text
+            || ':' || pg_relation_filenode(relid)::text AS version
+    FROM pg_stat_user_tables
+    WHERE schemaname IN ('aggregates', 'core')
+    UNION ALL
+    SELECT 'current_date', CURRENT_DATE::text;
+"""
+
+# Longest a caller waits for another thread's first read of the versions
+FIRST_REFRESH_WAIT = 30
+
+
+class DataWatermark:
+    """
+    Tracks a version token per source table.
+
+    The versions are re-read from Postgres at most once per check_interval
+    seconds; in between, callers get the last known values. An optional
+    override_query (e.g. a row from the ETL refresh log) may return
+    (source, version) rows; a source of '*' applies to every table.
+    Until the first read has succeeded (see `known`), every version is None.
+    """
+
+    def __init__(self, execute, check_interval=30, override_query=None):
+        self._execute = execute
+        self.check_interval = check_interval
+        self.override_query = override_query
+        self._versions = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._first_check = threading.Event()
+        self.known = False
+        self._listeners = []
+
+    @classmethod
+    def from_env(cls, execute):
+        return cls(
+            execute,
+            check_interval=float(os.getenv('CACHE_WATERMARK_INTERVAL', '30')),
+            override_query=os.getenv('CACHE_WATERMARK_QUERY') or None,
+        )
+
+    def current(self, sources):
+        """Version tuple for the given source tables"""
+        self._maybe_refresh()
+        versions = self._versions
+        wildcard = versions.get('*')
+        return (versions.get('current_date'), wildcard) + tuple(
+            versions.get(source) for source in sources
+        )
+
+    def current_date(self):
+        """The database's CURRENT_DATE as of the last check (ISO text), if known"""
+        self._maybe_refresh()
+        return self._versions.get('current_date')
+
+    def refresh(self):
+        """Re-read all versions now; returns the set of sources that changed"""
+        rows = list(self._execute(WATERMARK_QUERY))
+        if self.override_query:
+            rows.extend(self._execute(self.override_query))
+        versions = {row['source']: str(row['version']) for row in rows}
+
+        with self._lock:
+            previous = self._versions
+            self._versions = versions
+            self._checked_at = time.monotonic()
+            self.known = True
+
+        changed = {
+            source for source in set(previous) | set(versions)
+            if previous.get(source) != versions.get(source)
+        }
+        if previous and changed:
+            logger.info('Data watermark moved for %s', ', '.join(sorted(changed)))
+            for listener in list(self._listeners):
+                try:
+                    listener(changed)
+                except Exception:
+                    logger.exception('Watermark listener failed')
+        return changed
+
+    def add_listener(self, callback):
+        """Call callback(changed_sources) whenever a refresh detects a change"""
+        self._listeners.append(callback)
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            due = self._checked_at is None or now - self._checked_at >= self.check_interval
+            if not due:
+                return
+            waiting = self._refreshing
+            first = self._checked_at is None
+            self._refreshing = True
+        if waiting:
+            # Another thread is reading the versions; the first time, wait for
+            # it rather than return unknown (None) versions
+            if first:
+                self._first_check.wait(FIRST_REFRESH_WAIT)
+            return
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving against the last known watermark if the DB hiccups
+            logger.exception('Could not refresh data watermark')
+            with self._lock:
+                self._checked_at = now
+        finally:
+            with self._lock:
+                self._refreshing = False
+            self._first_check.set()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._versions)
+
+
+class CacheEntry:
+    """A serialized response body and the data version it was built from"""
+
+    __slots__ = ('key', 'body', 'etag', 'encoded', 'version', 'created_at', 'expires_at',
+                 'stale_since', 'size')
+
+    def __init__(self, key, body, version, ttl):
+        now = time.time()
+        self.key = key
+        self.body = body
+        # Content hash computed once per stored body, reused for every 304
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # Compressed copies of body by Content-Encoding, filled on first use
+        self.encoded = {}
+        self.version = version
+        self.created_at = now
+        self.expires_at = now + ttl
+        self.stale_since = None
+        self.size = len(body)
+
+    def age(self):
+        return time.time() - self.created_at
+
+    def is_fresh(self, version):
+        return self.version == version and time.time() < self.expires_at
+
+    def staleness(self):
+        """Seconds since this entry stopped being fresh.
+
+        Counted from TTL expiry, or from the first lookup that saw a newer
+        data watermark, whichever came first.
+        """
+        now = time.time()
+        if self.stale_since is None:
+            self.stale_since = min(now, self.expires_at)
+        return now - self.stale_since
+
+
+class ResultCache:
+    """Thread-safe LRU of CacheEntry objects bounded by total body bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=8 * 1024 * 1024,
+                 default_ttl=3600, enabled=True):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'stores': 0,
+                       'evictions': 0, 'rejected_too_large': 0, 'compressions': 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_bytes=int(float(os.getenv('RESULT_CACHE_MAX_MB', '64')) * 1024 * 1024),
+            max_entry_bytes=int(float(os.getenv('RESULT_CACHE_MAX_ENTRY_MB', '8')) * 1024 * 1024),
+            default_ttl=float(os.getenv('RESULT_CACHE_TTL', '3600')),
+            enabled=os.getenv('RESULT_CACHE_ENABLED', '1') != '0',
+        )
+
+    def get(self, key):
+        """Return the entry for key (fresh or not) and mark it recently used"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def record(self, outcome):
+        """Count a lookup outcome: 'hits', 'stale_hits' or 'misses'"""
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def put(self, key, body, version, ttl=None):
+        """Store body for key; returns the entry, or None if it was not cached"""
+        entry = CacheEntry(key, body, version, self.default_ttl if ttl is None else ttl)
+        if not self.enabled:
+            return None
+        if entry.size > self.max_entry_bytes:
+            with self._lock:
+                self._stats['rejected_too_large'] += 1
+            return None
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._stats['stores'] += 1
+            self._evict_locked()
+        return entry
+
+    def encoded_body(self, entry, encoding):
+        """entry.body compressed with encoding, compressed at most once per entry"""
+        body = entry.encoded.get(encoding)
+        if body is not None:
+            return body
+
+        body = compression.compress(entry.body, encoding, cached=True)
+        with self._lock:
+            if encoding not in entry.encoded:
+                entry.encoded[encoding] = body
+                entry.size += len(body)
+                if self._entries.get(entry.key) is entry:
+                    self._bytes += len(body)
+                    self._stats['compressions'] += 1
+                    self._evict_locked()
+        return body
+
+    def _evict_locked(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            })
+        served = snapshot['hits'] + snapshot['stale_hits']
+        lookups = served + snapshot['misses']
+        snapshot['hit_ratio'] = served / lookups if lookups else 0.0
+        return snapshot
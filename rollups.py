@@ -0,0 +1,216 @@
+"""
+Vectorized rollups of daily series with NumPy.
+
+The weekly charts used to send a DATE_TRUNC ... GROUP BY to Postgres on every
+request, and every new grain meant another hand-written query. A SeriesFrame
+holds a date-ordered series (the rows of a table window) as NumPy arrays,
+built once per data version, so rolling it up to weeks, months, quarters or
+N-day buckets is a handful of array operations over contiguous runs of
+dates. rolling() and period_deltas() derive trailing averages and
+period-over-period changes from any series column, and lttb() picks the
+points of a long series worth drawing.
+
+Semantics follow SQL: NULLs (NaN here) are ignored by the aggregates, a
+bucket with no values aggregates to NULL, and sums and maxima of integer
+columns stay integers.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+GRAINS = ('week', 'month', 'quarter', 'year')
+AGGREGATES = ('sum', 'avg', 'max', 'min')
+
+# Origin of N-day buckets (Postgres date_bin); a Monday, so 7-day buckets
+# are the same as weeks
+BUCKET_ORIGIN = np.datetime64('2000-01-03', 'D')
+
+
+def bucket_starts(days, grain):
+    """First day of the bucket containing each day (datetime64[D] arrays).
+
+    grain is one of GRAINS (DATE_TRUNC semantics: weeks start on Monday) or
+    a number of days.
+    """
+    if grain == 'week':
+        ordinals = days.astype('int64')
+        # Day 0 of datetime64 is a Thursday, weekday 3 counting from Monday
+        return (ordinals - (ordinals + 3) % 7).astype('datetime64[D]')
+    if grain == 'month':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    if grain == 'quarter':
+        months = days.astype('datetime64[M]').astype('int64')
+        return (months - months % 3).astype('datetime64[M]').astype('datetime64[D]')
+    if grain == 'year':
+        return days.astype('datetime64[Y]').astype('datetime64[D]')
+    if isinstance(grain, int) and not isinstance(grain, bool) and grain > 0:
+        offsets = (days - BUCKET_ORIGIN).astype('int64')
+        return BUCKET_ORIGIN + (offsets - offsets % grain).astype('timedelta64[D]')
+    raise ValueError(f'grain must be one of {GRAINS} or a positive number of days')
+
+
+def bucket_start(day, grain):
+    """First day of the bucket containing the ISO date day, as an ISO date"""
+    if grain == 'day':
+        return day
+    return str(bucket_starts(np.array([day], dtype='datetime64[D]'), grain)[0])
+
+
+def _to_list(values, integral):
+    """Array -> JSON-ready list: NaN becomes None, integral columns stay ints"""
+    if integral:
+        return [None if np.isnan(v) else int(v) for v in values]
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+class SeriesFrame:
+    """
+    NumPy view of a date-ordered series (newest or oldest row first).
+
+    dates   -- ISO date strings, one per row
+    columns -- {name: [values, ...]} parallel to dates; None is NULL
+    """
+
+    def __init__(self, dates, columns):
+        self.days = np.array(dates, dtype='datetime64[D]')
+        self._columns = columns
+        self._arrays = {}
+        self._integral = {}
+
+    def values(self, column):
+        """float64 array of column, NaN for NULL (built once per column)"""
+        values = self._arrays.get(column)
+        if values is None:
+            raw = self._columns[column]
+            self._integral[column] = all(isinstance(v, int) for v in raw if v is not None)
+            values = self._arrays[column] = np.array(raw, dtype=np.float64)
+        return values
+
+    def integral(self, column):
+        self.values(column)
+        return self._integral[column]
+
+    def rollup(self, grain, aggregates, groups=None, key=None, start=0, stop=None):
+        """GROUP BY bucket ORDER BY bucket LIMIT groups, in the series' order.
+
+        aggregates maps output names to (function, column) pairs, function
+        one of AGGREGATES. The bucket start dates are returned under key
+        (default: the grain's name, or 'bucket' for N-day buckets). Only rows
+        start to stop of the series are rolled up.
+        """
+        key = key or (grain if isinstance(grain, str) else 'bucket')
+        starts = bucket_starts(self.days[start:stop], grain)
+        if not len(starts):
+            return {key: [], **{alias: [] for alias in aggregates}}
+
+        # Rows are date-ordered, so each bucket is one contiguous run
+        firsts = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+        end = len(starts)
+        if groups is not None and len(firsts) > groups:
+            firsts, end = firsts[:groups], firsts[groups]
+
+        result = {key: np.datetime_as_string(starts[firsts]).tolist()}
+
+        for alias, (function, column) in aggregates.items():
+            if function not in AGGREGATES:
+                raise ValueError(f'Unknown aggregate {function!r}')
+            values = self.values(column)[start:start + end]
+            present = ~np.isnan(values)
+            counts = np.add.reduceat(present, firsts)
+            if function in ('sum', 'avg'):
+                totals = np.add.reduceat(np.where(present, values, 0.0), firsts)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    aggregated = totals if function == 'sum' else totals / counts
+            elif function == 'max':
+                aggregated = np.fmax.reduceat(values, firsts)
+            else:
+                aggregated = np.fmin.reduceat(values, firsts)
+            aggregated = np.where(counts > 0, aggregated, np.nan)
+            result[alias] = _to_list(aggregated, function != 'avg' and self.integral(column))
+        return result
+
+
+def _newest_first_array(values):
+    return np.array(values, dtype=np.float64)
+
+
+def rolling(values, periods, function='avg'):
+    """Trailing aggregate over the last `periods` rows of a newest-first column.
+
+    Like AGG(x) OVER (ORDER BY date ROWS periods - 1 PRECEDING): the oldest
+    rows aggregate the shorter history available, and NULLs are ignored.
+    """
+    if function not in AGGREGATES:
+        raise ValueError(f'Unknown aggregate {function!r}')
+    if periods < 1:
+        raise ValueError('periods must be at least 1')
+    if not len(values):
+        return []
+    chronological = _newest_first_array(values)[::-1]
+    # Pad the start so every row has a full (partly NaN) window behind it
+    padded = np.concatenate((np.full(periods - 1, np.nan), chronological))
+    windows = sliding_window_view(padded, periods)
+    present = ~np.isnan(windows)
+    counts = present.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if function == 'max':
+            aggregated = np.fmax.reduce(windows, axis=1)
+        elif function == 'min':
+            aggregated = np.fmin.reduce(windows, axis=1)
+        else:
+            totals = np.where(present, windows, 0.0).sum(axis=1)
+            aggregated = totals if function == 'sum' else totals / counts
+    aggregated = np.where(counts > 0, aggregated, np.nan)[::-1]
+    integral = function != 'avg' and all(isinstance(v, int) for v in values if v is not None)
+    return _to_list(aggregated, integral)
+
+
+def period_deltas(values, periods=1):
+    """(change, percent change) of each row of a newest-first column against
+    the row `periods` older; None where either value is missing (or zero,
+    for the percentage)."""
+    current = _newest_first_array(values)
+    previous = np.full(len(current), np.nan)
+    previous[:max(len(current) - periods, 0)] = current[periods:]
+    change = current - previous
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percent = np.round(change / np.abs(previous) * 100, 2)
+    percent[previous == 0] = np.nan
+    integral = all(isinstance(v, int) for v in values if v is not None)
+    return _to_list(change, integral), _to_list(percent, False)
+
+
+def lttb(dates, values, points):
+    """Positions of the `points` rows of a newest-first series that
+    Largest-Triangle-Three-Buckets keeps, newest first.
+
+    The first and last rows are always kept. The rows between are split into
+    points - 2 buckets, and from each the row forming the largest triangle
+    with the row kept before it and the average of the next bucket is kept,
+    so peaks and troughs survive. Rows with a NULL value are kept only from
+    buckets with no other values.
+    """
+    length = len(values)
+    if points >= length or points < 3:
+        return list(range(length))
+    x = np.array(dates, dtype='datetime64[D]')[::-1].astype(np.float64)
+    y = _newest_first_array(values)[::-1]
+    missing = np.isnan(y)
+    y = np.where(missing, 0.0, y)
+
+    # Bucket boundaries, and the last row as a final bucket of its own
+    edges = np.arange(points - 1) * (length - 2) // (points - 2) + 1
+    edges = np.append(edges, length).tolist()
+    kept = [0]
+    previous = 0
+    for bucket in range(points - 2):
+        first, stop = edges[bucket], edges[bucket + 1]
+        following = slice(stop, edges[bucket + 2])
+        average_x, average_y = x[following].mean(), y[following].mean()
+        areas = np.abs((x[previous] - average_x) * (y[first:stop] - y[previous])
+                       - (x[previous] - x[first:stop]) * (average_y - y[previous]))
+        areas[missing[first:stop]] = -1.0
+        previous = first + int(np.argmax(areas))
+        kept.append(previous)
+    kept.append(length - 1)
+    return [length - 1 - position for position in reversed(kept)]
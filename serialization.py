@@ -0,0 +1,100 @@
+"""
+JSON serialization for query results.
+
+Instead of letting psycopg2 build datetime/Decimal objects and then walking
+every row and column to convert them, the analytics connections register
+type casters keyed on the column's Postgres type: dates and timestamps are
+turned into ISO-8601 strings and NUMERIC into floats straight from the wire
+text (arrays included). Result rows are then already JSON-native and go to
+the C JSON encoder as-is, with no per-cell Python loop and no dict rebuilding.
+"""
+
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import psycopg2.extensions as ext
+
+# Postgres type OIDs (pg_type) handled by the casters below
+DATE_OID, DATE_ARRAY_OID = 1082, 1182
+TIME_OID, TIME_ARRAY_OID = 1083, 1183
+TIMESTAMP_OID, TIMESTAMP_ARRAY_OID = 1114, 1115
+TIMESTAMPTZ_OID, TIMESTAMPTZ_ARRAY_OID = 1184, 1185
+NUMERIC_OID, NUMERIC_ARRAY_OID = 1700, 1231
+
+
+def _cast_iso_text(value, cursor):
+    # Postgres text output for date and time is already ISO-8601
+    return value
+
+
+def _cast_timestamp(value, cursor):
+    if value is None:
+        return None
+    return value.replace(' ', 'T', 1)
+
+
+def _cast_timestamptz(value, cursor):
+    if value is None:
+        return None
+    value = value.replace(' ', 'T', 1)
+    # Postgres abbreviates whole-hour offsets ("+00"); ISO-8601 wants "+00:00"
+    if len(value) > 3 and value[-3] in '+-':
+        value += ':00'
+    return value
+
+
+# JSON has no NaN or infinities; Postgres numeric has all three (14+)
+NON_FINITE_NUMERIC = ('NaN', 'Infinity', '-Infinity')
+
+
+def _cast_numeric(value, cursor):
+    if value is None or value in NON_FINITE_NUMERIC:
+        return None
+    return float(value)
+
+
+ISO_DATE = ext.new_type((DATE_OID,), 'ISO_DATE', _cast_iso_text)
+ISO_TIME = ext.new_type((TIME_OID,), 'ISO_TIME', _cast_iso_text)
+ISO_TIMESTAMP = ext.new_type((TIMESTAMP_OID,), 'ISO_TIMESTAMP', _cast_timestamp)
+ISO_TIMESTAMPTZ = ext.new_type((TIMESTAMPTZ_OID,), 'ISO_TIMESTAMPTZ', _cast_timestamptz)
+FLOAT_NUMERIC = ext.new_type((NUMERIC_OID,), 'FLOAT_NUMERIC', _cast_numeric)
+
+JSON_TYPECASTERS = (
+    ISO_DATE,
+    ISO_TIME,
+    ISO_TIMESTAMP,
+    ISO_TIMESTAMPTZ,
+    FLOAT_NUMERIC,
+    ext.new_array_type((DATE_ARRAY_OID,), 'ISO_DATE[]', ISO_DATE),
+    ext.new_array_type((TIME_ARRAY_OID,), 'ISO_TIME[]', ISO_TIME),
+    ext.new_array_type((TIMESTAMP_ARRAY_OID,), 'ISO_TIMESTAMP[]', ISO_TIMESTAMP),
+    ext.new_array_type((TIMESTAMPTZ_ARRAY_OID,), 'ISO_TIMESTAMPTZ[]', ISO_TIMESTAMPTZ),
+    ext.new_array_type((NUMERIC_ARRAY_OID,), 'FLOAT_NUMERIC[]', FLOAT_NUMERIC),
+)
+
+
+def register_json_typecasters(conn):
+    """Make conn return JSON-native values for date/time and NUMERIC columns"""
+    for caster in JSON_TYPECASTERS:
+        ext.register_type(caster, conn)
+    return conn
+
+
+def _default(value):
+    # Only reached for values that did not come through the casters above
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False)
+
+
+def dumps(data):
+    """Serialize query results to UTF-8 JSON bytes"""
+    return _encoder.encode(data).encode('utf-8')
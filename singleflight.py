@@ -0,0 +1,65 @@
+"""
+Request coalescing for identical concurrent work.
+
+When many clients open the dashboard at once they all ask for the same
+queries. SingleFlight lets the first caller for a key run the work while
+everyone else arriving before it finishes waits and receives the same result
+(or the same exception), so Postgres sees one execution per distinct query.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        """Run fn() unless a call for key is already in flight; share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self._stats['executions'] += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['in_flight'] = len(self._calls)
+        return snapshot
@@ -0,0 +1,160 @@
+"""
+Slow-query log with sampled EXPLAIN capture.
+
+Queries that take longer than a threshold are kept in a bounded ring buffer
+(statement, parameters, duration, endpoint) for /api/admin/slow-queries. A
+sample of them is re-run as EXPLAIN (ANALYZE, BUFFERS) in a background thread
+on a separate, read-only connection, so the plan that made the query slow is
+on hand without waiting for users to report it. The same statement is
+explained at most once per explain_interval, and only one EXPLAIN runs at a
+time.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class SlowQueryLog:
+    """
+    connect          -- zero-argument callable returning a new connection (not pooled)
+    threshold_ms     -- queries at least this slow are recorded; 0 disables the log
+    capacity         -- entries kept; the oldest are dropped first
+    sample_rate      -- share of slow queries that get an EXPLAIN
+    explain_interval -- seconds before the same statement is explained again
+    explain_timeout_ms -- statement_timeout for the EXPLAIN connection
+    """
+
+    def __init__(self, connect, threshold_ms=500, capacity=100, sample_rate=0.2,
+                 explain_interval=600, explain_timeout_ms=30000):
+        self._connect = connect
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._explaining = False
+        self._explained_at = {}
+        self._stats = {'recorded': 0, 'explained': 0, 'explain_failures': 0}
+
+    @classmethod
+    def from_env(cls, connect):
+        return cls(
+            connect,
+            threshold_ms=float(os.getenv('SLOW_QUERY_MS', '500')),
+            capacity=int(os.getenv('SLOW_QUERY_LOG_SIZE', '100')),
+            sample_rate=float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE', '0.2')),
+            explain_interval=float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '600')),
+            explain_timeout_ms=int(os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', '30000')),
+        )
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0
+
+    def observe(self, statement, params, seconds, endpoint=None, explain_sql=None,
+                setup_sql=None):
+        """Record the query if it was slow and maybe explain it.
+
+        statement is the SQL shown in the log. explain_sql/setup_sql override
+        what is explained, for statements that must be prepared first
+        (EXPLAIN ... EXECUTE name after PREPARE name).
+        """
+        duration_ms = seconds * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+
+        entry = {
+            'recorded_at': time.time(),
+            'endpoint': endpoint,
+            'duration_ms': round(duration_ms, 2),
+            'statement': ' '.join(statement.split()),
+            'params': list(params) if params is not None else None,
+            'plan': None,
+            'explain_error': None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self._stats['recorded'] += 1
+            explain = self._claim_explain(entry['statement'])
+        logger.warning('Slow query (%.0f ms) on %s: %.200s', duration_ms, endpoint,
+                       entry['statement'])
+
+        if explain:
+            threading.Thread(
+                target=self._explain,
+                args=(entry, explain_sql or statement, params, setup_sql),
+                name='slow-query-explain', daemon=True,
+            ).start()
+
+    def _claim_explain(self, statement):
+        # Called with the lock held
+        now = time.monotonic()
+        if self._explaining or random.random() >= self.sample_rate:
+            return False
+        last = self._explained_at.get(statement)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._explaining = True
+        self._explained_at[statement] = now
+        return True
+
+    def _explain(self, entry, sql, params, setup_sql):
+        conn = None
+        try:
+            conn = self._connect()
+            # EXPLAIN ANALYZE executes the statement; make sure it cannot write
+            conn.set_session(readonly=True)
+            with conn.cursor() as cursor:
+                cursor.execute(f'SET statement_timeout = {int(self.explain_timeout_ms)}')
+                if setup_sql:
+                    cursor.execute(setup_sql)
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                plan = '\n'.join(_plan_line(row) for row in cursor.fetchall())
+            with self._lock:
+                entry['plan'] = plan
+                self._stats['explained'] += 1
+        except Exception as e:
+            logger.exception('EXPLAIN for slow query failed')
+            with self._lock:
+                entry['explain_error'] = str(e)
+                self._stats['explain_failures'] += 1
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            with self._lock:
+                self._explaining = False
+
+    def entries(self):
+        """Recorded slow queries, newest first"""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._entries)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'threshold_ms': self.threshold_ms,
+                'sample_rate': self.sample_rate,
+                'entries': len(self._entries),
+                'capacity': self._entries.maxlen,
+            })
+        return snapshot
+
+
+def _plan_line(row):
+    # Rows come back as dicts from RealDictCursor connections
+    return row['QUERY PLAN'] if isinstance(row, dict) else row[0]
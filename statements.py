@@ -0,0 +1,115 @@
+"""
+Server-side prepared statements for the per-entity lookups.
+
+Routes such as /api/graph/connection-recommendations/<user_id> run the same
+SQL over and over with a different id. Registering that SQL once with $n
+placeholders lets each pooled connection PREPARE it the first time it is
+used and EXECUTE it afterwards, so repeat calls skip parsing and planning
+(Postgres switches to a cached generic plan once it is no worse than the
+custom ones). Parameters are always bound, never formatted into the SQL.
+"""
+
+import logging
+import re
+import threading
+import weakref
+
+from psycopg2 import errors
+
+logger = logging.getLogger(__name__)
+
+_NAME_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+def escape_like(value):
+    """Escape LIKE/ILIKE wildcards so value matches literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class PreparedStatement:
+    """A named SQL statement with $1..$n placeholders of the given Postgres types"""
+
+    __slots__ = ('name', 'sql', 'param_types')
+
+    def __init__(self, name, sql, param_types=()):
+        self.name = name
+        self.sql = sql
+        self.param_types = tuple(param_types)
+
+    @property
+    def prepare_sql(self):
+        types = f" ({', '.join(self.param_types)})" if self.param_types else ''
+        return f'PREPARE {self.name}{types} AS {self.sql}'
+
+    @property
+    def execute_sql(self):
+        if not self.param_types:
+            return f'EXECUTE {self.name}'
+        return f"EXECUTE {self.name} ({', '.join(['%s'] * len(self.param_types))})"
+
+
+class StatementRegistry:
+    """
+    Registered statements plus, per live connection, which of them that
+    connection has already prepared. Connections are tracked weakly, so a
+    connection the pool closes or replaces simply drops out.
+    """
+
+    def __init__(self):
+        self._statements = {}
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {'prepares': 0, 'executions': 0, 'reprepares': 0}
+
+    def register(self, name, sql, param_types=()):
+        if not _NAME_RE.match(name):
+            raise ValueError(f'Invalid statement name: {name!r}')
+        if name in self._statements:
+            raise ValueError(f'Statement already registered: {name}')
+        statement = PreparedStatement(name, sql, param_types)
+        self._statements[name] = statement
+        return statement
+
+    def statements(self):
+        return dict(self._statements)
+
+    def execute(self, cursor, statement, params=()):
+        """Run statement on cursor, preparing it on this connection if needed"""
+        if len(params) != len(statement.param_types):
+            raise ValueError(f'{statement.name} takes {len(statement.param_types)} parameters')
+
+        conn = cursor.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, set())
+            self._stats['executions'] += 1
+
+        # A pooled connection is only used by one thread at a time
+        if statement.name not in prepared:
+            self._prepare(cursor, statement, prepared)
+        try:
+            cursor.execute(statement.execute_sql, params)
+        except errors.InvalidSqlStatementName:
+            # The session lost its statements (e.g. DISCARD ALL); start over
+            logger.warning('Prepared statement %s missing on connection, re-preparing',
+                           statement.name)
+            conn.rollback()
+            prepared.clear()
+            with self._lock:
+                self._stats['reprepares'] += 1
+            self._prepare(cursor, statement, prepared)
+            cursor.execute(statement.execute_sql, params)
+
+    def _prepare(self, cursor, statement, prepared):
+        # Prepared statements live for the session and survive the rollback
+        # the pool issues when the connection is returned
+        cursor.execute(statement.prepare_sql)
+        prepared.add(statement.name)
+        with self._lock:
+            self._stats['prepares'] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['connections'] = len(self._prepared)
+        snapshot['registered'] = sorted(self._statements)
+        return snapshot
@@ -24,15 +24,148 @@ function formatMonth(dateString) {
 }
 
 // API fetch helper
-async function fetchData(endpoint) {
+// Calls made in the same tick are queued and sent together through /api/batch,
+// so the whole dashboard loads in one round trip and shared endpoints
+// (e.g. retention/summary) are only fetched once.
+const pendingFetches = new Map();
+let batchTimer = null;
+
+function fetchData(endpoint) {
+    return new Promise(resolve => {
+        if (!pendingFetches.has(endpoint)) pendingFetches.set(endpoint, []);
+        pendingFetches.get(endpoint).push(resolve);
+        if (!batchTimer) batchTimer = setTimeout(flushFetchBatch, 0);
+    });
+}
+
+async function flushFetchBatch() {
+    // Series requests wait for the stored series to know what to ask for;
+    // waiting here keeps them in this batch
+    await storedSeries;
+    const batch = new Map(pendingFetches);
+    pendingFetches.clear();
+    batchTimer = null;
+
+    // GET keeps the batch conditional: the browser revalidates it with its
+    // ETag and unchanged dashboards come back as an empty 304
+    const query = [...batch.keys()].map(e => `endpoint=${encodeURIComponent(e)}`).join('&');
+
+    let payload = null;
     try {
-        const response = await fetch(`/api/${endpoint}`);
+        const response = await fetch(`/api/batch?${query}`);
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-        return await response.json();
+        payload = await response.json();
     } catch (error) {
-        console.error(`Error fetching ${endpoint}:`, error);
+        console.error('Error fetching batch:', error);
+    }
+
+    batch.forEach((resolvers, endpoint) => {
+        const data = payload && endpoint in payload.results ? payload.results[endpoint] : null;
+        if (payload && data === null) {
+            console.error(`Error fetching ${endpoint}:`, payload.errors[endpoint]);
+        }
+        resolvers.forEach(resolve => resolve(data));
+    });
+}
+
+// Series store
+// Time series are kept in IndexedDB with the version token the server sent.
+// Later page loads ask only for the rows new or changed since that version
+// (?since=) and merge them in, so an unchanged dashboard transfers almost
+// nothing. Without IndexedDB (e.g. some private windows) every load is full.
+const SERIES_DB = 'analytics-dashboard';
+const SERIES_STORE = 'series';
+let seriesDb = null;
+
+// Every stored series, read once per page load: url -> {version, columns}
+const storedSeries = new Promise(resolve => {
+    let request;
+    try {
+        request = indexedDB.open(SERIES_DB, 1);
+    } catch (error) {
+        resolve(new Map());
+        return;
+    }
+    request.onupgradeneeded = () => request.result.createObjectStore(SERIES_STORE);
+    request.onerror = () => resolve(new Map());
+    request.onsuccess = () => {
+        seriesDb = request.result;
+        const entries = new Map();
+        const cursor = seriesDb.transaction(SERIES_STORE).objectStore(SERIES_STORE).openCursor();
+        cursor.onsuccess = () => {
+            if (!cursor.result) return resolve(entries);
+            entries.set(cursor.result.key, cursor.result.value);
+            cursor.result.continue();
+        };
+        cursor.onerror = () => resolve(entries);
+    };
+});
+
+function saveSeries(url, version, columns) {
+    if (!seriesDb) return;
+    try {
+        seriesDb.transaction(SERIES_STORE, 'readwrite').objectStore(SERIES_STORE)
+            .put({version, columns}, url);
+    } catch (error) {
+        console.error(`Error storing ${url}:`, error);
+    }
+}
+
+// Stored columns (newest first) with a ?since= delta merged in: delta rows
+// replace stored rows of the same date, and rows older than the series'
+// start are dropped. null if the columns no longer match.
+function mergeSeries(columns, delta) {
+    const names = Object.keys(delta.columns);
+    if (names.length !== Object.keys(columns).length || !names.every(n => n in columns)) {
         return null;
     }
+    const rows = new Map();
+    [columns, delta.columns].forEach(source => {
+        source[delta.key].forEach((day, i) => rows.set(day, names.map(n => source[n][i])));
+    });
+    // ISO dates sort as strings
+    const days = [...rows.keys()]
+        .filter(day => delta.start !== null && day >= delta.start)
+        .sort()
+        .reverse();
+    const merged = {};
+    names.forEach((name, column) => {
+        merged[name] = days.map(day => rows.get(day)[column]);
+    });
+    return merged;
+}
+
+// Time-series endpoints are requested column-oriented (?format=columnar) so
+// no key names are repeated per row and nothing has to be re-pivoted here.
+// Rows come back newest first; columns are flipped to chronological order.
+// params may set a date range and grain ({from: '2023-01-01', grain: 'week'});
+// long ranges come back downsampled to at most `points` rows.
+async function fetchSeries(endpoint, params = {}) {
+    const query = new URLSearchParams({format: 'columnar', ...params});
+    const url = `${endpoint}?${query}`;
+    const stored = (await storedSeries).get(url);
+
+    let columns = null;
+    if (stored) {
+        query.set('since', stored.version);
+        const delta = await fetchData(`${endpoint}?${query}`);
+        // If the delta failed, the stored copy is still worth drawing
+        columns = delta ? mergeSeries(stored.columns, delta) : stored.columns;
+        if (delta && columns) saveSeries(url, delta.version, columns);
+    }
+    if (!columns) {
+        const data = await fetchData(url);
+        if (!data) return null;
+        columns = data.columns;
+        // Downsampled series come without a version and are not stored
+        if (data.version) saveSeries(url, data.version, columns);
+    }
+
+    const series = {};
+    Object.entries(columns).forEach(([name, values]) => {
+        series[name] = [...values].reverse();
+    });
+    return series;
 }
 
 // Summary Cards
@@ -63,15 +196,14 @@ async function loadSummaryCards() {
 
 // Charts
 async function loadNewUsersMonthlyChart() {
-    const data = await fetchData('new-users/monthly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('new-users/monthly');
+    if (!series || series.month.length === 0) return;
     const ctx = document.getElementById('newUsersMonthlyChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.month)),
-            datasets: [{label: 'New Users', data: sortedData.map(d => d.new_signups), backgroundColor: colors.primary}]
+            labels: series.month.map(formatMonth),
+            datasets: [{label: 'New Users', data: series.new_signups, backgroundColor: colors.primary}]
         },
         options: {
             responsive: true,
@@ -85,63 +217,59 @@ async function loadNewUsersMonthlyChart() {
 }
 
 async function loadGrowthRateChart() {
-    const data = await fetchData('growth-rate/monthly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('growth-rate/monthly');
+    if (!series || series.month.length === 0) return;
     const ctx = document.getElementById('growthRateChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.month)),
-            datasets: [{label: 'Growth %', data: sortedData.map(d => parseFloat(d.growth_rate_pct) || 0), backgroundColor: sortedData.map(d => parseFloat(d.growth_rate_pct) >= 0 ? colors.success : colors.danger)}]
+            labels: series.month.map(formatMonth),
+            datasets: [{label: 'Growth %', data: series.growth_rate_pct.map(v => parseFloat(v) || 0), backgroundColor: series.growth_rate_pct.map(v => parseFloat(v) >= 0 ? colors.success : colors.danger)}]
         },
         options: {responsive: true, plugins: {legend: {display: false}}, scales: {y: {beginAtZero: true, ticks: {callback: v => v + '%'}}}}
     });
 }
 
 async function loadDAUChart() {
-    const data = await fetchData('active-users/daily');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('active-users/daily');
+    if (!series || series.date.length === 0) return;
     const ctx = document.getElementById('dauChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.date)),
-            datasets: [{label: 'DAU', data: sortedData.map(d => d.dau), borderColor: colors.info, backgroundColor: colors.info + '33', fill: true, tension: 0.3}]
+            labels: series.date.map(formatDate),
+            datasets: [{label: 'DAU', data: series.dau, borderColor: colors.info, backgroundColor: colors.info + '33', fill: true, tension: 0.3}]
         },
         options: {responsive: true, scales: {y: {beginAtZero: true}}}
     });
 }
 
 async function loadMAUChart() {
-    const data = await fetchData('active-users/monthly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('active-users/monthly');
+    if (!series || series.month.length === 0) return;
     const ctx = document.getElementById('mauChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.month)),
-            datasets: [{label: 'MAU', data: sortedData.map(d => d.mau), backgroundColor: colors.purple}]
+            labels: series.month.map(formatMonth),
+            datasets: [{label: 'MAU', data: series.mau, backgroundColor: colors.purple}]
         },
         options: {responsive: true, plugins: {legend: {display: false}}, scales: {y: {beginAtZero: true}}}
     });
 }
 
 async function loadEngagementDailyChart() {
-    const data = await fetchData('engagement/daily');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('engagement/daily');
+    if (!series || series.date.length === 0) return;
     const ctx = document.getElementById('engagementDailyChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.date)),
+            labels: series.date.map(formatDate),
             datasets: [
-                {label: 'Posts', data: sortedData.map(d => d.posts_created), borderColor: colors.primary, fill: false, tension: 0.3},
-                {label: 'Votes', data: sortedData.map(d => d.votes_cast), borderColor: colors.success, fill: false, tension: 0.3},
-                {label: 'Collections', data: sortedData.map(d => d.collections_created), borderColor: colors.warning, fill: false, tension: 0.3}
+                {label: 'Posts', data: series.posts_created, borderColor: colors.primary, fill: false, tension: 0.3},
+                {label: 'Votes', data: series.votes_cast, borderColor: colors.success, fill: false, tension: 0.3},
+                {label: 'Collections', data: series.collections_created, borderColor: colors.warning, fill: false, tension: 0.3}
             ]
         },
         options: {responsive: true, scales: {y: {beginAtZero: true}}}
@@ -149,19 +277,18 @@ async function loadEngagementDailyChart() {
 }
 
 async function loadEngagementMonthlyChart() {
-    const data = await fetchData('engagement/monthly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('engagement/monthly');
+    if (!series || series.month.length === 0) return;
     const ctx = document.getElementById('engagementMonthlyChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.month)),
+            labels: series.month.map(formatMonth),
             datasets: [
-                {label: 'Posts', data: sortedData.map(d => d.total_posts), backgroundColor: colors.primary},
-                {label: 'Comments', data: sortedData.map(d => d.total_comments), backgroundColor: colors.secondary},
-                {label: 'Votes', data: sortedData.map(d => d.total_votes), backgroundColor: colors.success},
-                {label: 'Collections', data: sortedData.map(d => d.total_collections), backgroundColor: colors.warning}
+                {label: 'Posts', data: series.total_posts, backgroundColor: colors.primary},
+                {label: 'Comments', data: series.total_comments, backgroundColor: colors.secondary},
+                {label: 'Votes', data: series.total_votes, backgroundColor: colors.success},
+                {label: 'Collections', data: series.total_collections, backgroundColor: colors.warning}
             ]
         },
         options: {responsive: true, scales: {x: {stacked: true}, y: {stacked: true, beginAtZero: true}}}
@@ -183,17 +310,16 @@ async function loadUserSegmentationChart() {
 }
 
 async function loadMAUByTypeChart() {
-    const data = await fetchData('active-users/monthly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('active-users/monthly');
+    if (!series || series.month.length === 0) return;
     const ctx = document.getElementById('mauByTypeChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.month)),
+            labels: series.month.map(formatMonth),
             datasets: [
-                {label: 'Finder', data: sortedData.map(d => d.finder_mau), backgroundColor: colors.primary},
-                {label: 'Standard', data: sortedData.map(d => d.standard_mau), backgroundColor: colors.warning}
+                {label: 'Finder', data: series.finder_mau, backgroundColor: colors.primary},
+                {label: 'Standard', data: series.standard_mau, backgroundColor: colors.warning}
             ]
         },
         options: {responsive: true, scales: {x: {stacked: true}, y: {stacked: true, beginAtZero: true}}}
@@ -201,18 +327,17 @@ async function loadMAUByTypeChart() {
 }
 
 async function loadRetentionSummaryChart() {
-    const data = await fetchData('retention/summary');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('retention/summary');
+    if (!series || series.cohort_month.length === 0) return;
     const ctx = document.getElementById('retentionSummaryChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatMonth(d.cohort_month)),
+            labels: series.cohort_month.map(formatMonth),
             datasets: [
-                {label: '30 Day', data: sortedData.map(d => parseFloat(d.retention_rate_30d) || 0), borderColor: colors.success, fill: false, tension: 0.3},
-                {label: '60 Day', data: sortedData.map(d => parseFloat(d.retention_rate_60d) || 0), borderColor: colors.warning, fill: false, tension: 0.3},
-                {label: '90 Day', data: sortedData.map(d => parseFloat(d.retention_rate_90d) || 0), borderColor: colors.danger, fill: false, tension: 0.3}
+                {label: '30 Day', data: series.retention_rate_30d.map(v => parseFloat(v) || 0), borderColor: colors.success, fill: false, tension: 0.3},
+                {label: '60 Day', data: series.retention_rate_60d.map(v => parseFloat(v) || 0), borderColor: colors.warning, fill: false, tension: 0.3},
+                {label: '90 Day', data: series.retention_rate_90d.map(v => parseFloat(v) || 0), borderColor: colors.danger, fill: false, tension: 0.3}
             ]
         },
         options: {responsive: true, scales: {y: {beginAtZero: true, max: 100, ticks: {callback: v => v + '%'}}}}
@@ -220,15 +345,14 @@ async function loadRetentionSummaryChart() {
 }
 
 async function loadActivationRateChart() {
-    const data = await fetchData('retention/summary');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('retention/summary');
+    if (!series || series.cohort_month.length === 0) return;
     const ctx = document.getElementById('activationRateChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.cohort_month)),
-            datasets: [{label: 'Activation', data: sortedData.map(d => parseFloat(d.activation_rate) || 0), backgroundColor: colors.purple}]
+            labels: series.cohort_month.map(formatMonth),
+            datasets: [{label: 'Activation', data: series.activation_rate.map(v => parseFloat(v) || 0), backgroundColor: colors.purple}]
         },
         options: {responsive: true, plugins: {legend: {display: false}}, scales: {y: {beginAtZero: true, ticks: {callback: v => v + '%'}}}}
     });
@@ -257,17 +381,16 @@ async function loadPowerUsersChart() {
 
 // New Charts
 async function loadPostFrequencyChart() {
-    const data = await fetchData('engagement/post-frequency');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('engagement/post-frequency');
+    if (!series || series.date.length === 0) return;
     const ctx = document.getElementById('postFrequencyChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.date)),
+            labels: series.date.map(formatDate),
             datasets: [
-                {label: 'Posts Created', data: sortedData.map(d => d.posts_created), borderColor: colors.primary, backgroundColor: colors.primary + '33', fill: true, tension: 0.3},
-                {label: 'Unique Posters', data: sortedData.map(d => d.unique_posters), borderColor: colors.success, backgroundColor: colors.success + '33', fill: false, tension: 0.3}
+                {label: 'Posts Created', data: series.posts_created, borderColor: colors.primary, backgroundColor: colors.primary + '33', fill: true, tension: 0.3},
+                {label: 'Unique Posters', data: series.unique_posters, borderColor: colors.success, backgroundColor: colors.success + '33', fill: false, tension: 0.3}
             ]
         },
         options: {
@@ -281,18 +404,17 @@ async function loadPostFrequencyChart() {
 }
 
 async function loadPostEngagementChart() {
-    const data = await fetchData('engagement/post-engagement-rate');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('engagement/post-engagement-rate');
+    if (!series || series.date.length === 0) return;
     const ctx = document.getElementById('postEngagementChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.date)),
+            labels: series.date.map(formatDate),
             datasets: [
                 {
                     label: 'Vote Engagement %', 
-                    data: sortedData.map(d => parseFloat(d.engagement_rate_votes_pct) || 0), 
+                    data: series.engagement_rate_votes_pct.map(v => parseFloat(v) || 0), 
                     borderColor: colors.success,
                     backgroundColor: colors.success + '33',
                     fill: false,
@@ -300,7 +422,7 @@ async function loadPostEngagementChart() {
                 },
                 {
                     label: 'Comment Engagement %', 
-                    data: sortedData.map(d => parseFloat(d.engagement_rate_comments_pct) || 0), 
+                    data: series.engagement_rate_comments_pct.map(v => parseFloat(v) || 0), 
                     borderColor: colors.warning,
                     backgroundColor: colors.warning + '33',
                     fill: false,
@@ -319,17 +441,16 @@ async function loadPostEngagementChart() {
 }
 
 async function loadFinderSearchesChart() {
-    const data = await fetchData('finder/searches');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('finder/searches');
+    if (!series || series.date.length === 0) return;
     const ctx = document.getElementById('finderSearchesChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.date)),
+            labels: series.date.map(formatDate),
             datasets: [
-                {label: 'Searches/Votes', data: sortedData.map(d => d.searches), borderColor: colors.primary, fill: false, tension: 0.3},
-                {label: 'Profile Views', data: sortedData.map(d => d.profiles_viewed), borderColor: colors.warning, fill: false, tension: 0.3}
+                {label: 'Searches/Votes', data: series.searches, borderColor: colors.primary, fill: false, tension: 0.3},
+                {label: 'Profile Views', data: series.profiles_viewed, borderColor: colors.warning, fill: false, tension: 0.3}
             ]
         },
         options: {
@@ -343,17 +464,16 @@ async function loadFinderSearchesChart() {
 }
 
 async function loadCollectionsChart() {
-    const data = await fetchData('collections/created-by-privacy');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('collections/created-by-privacy');
+    if (!series || series.date.length === 0) return;
     const ctx = document.getElementById('collectionsChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatDate(d.date)),
+            labels: series.date.map(formatDate),
             datasets: [
-                {label: 'Public', data: sortedData.map(d => d.public_collections), backgroundColor: colors.success},
-                {label: 'Private', data: sortedData.map(d => d.private_collections), backgroundColor: colors.warning}
+                {label: 'Public', data: series.public_collections, backgroundColor: colors.success},
+                {label: 'Private', data: series.private_collections, backgroundColor: colors.warning}
             ]
         },
         options: {
@@ -494,15 +614,14 @@ async function loadAccountFunnelPyramidChart() {
 
 // Weekly Trends
 async function loadNewUsersWeeklyChart() {
-    const data = await fetchData('new-users/weekly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('new-users/weekly');
+    if (!series || series.week.length === 0) return;
     const ctx = document.getElementById('newUsersWeeklyChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.week_start)),
-            datasets: [{label: 'New Users', data: sortedData.map(d => d.new_users), borderColor: colors.primary, backgroundColor: colors.primary + '33', fill: true, tension: 0.3}]
+            labels: series.week.map(formatDate),
+            datasets: [{label: 'New Users', data: series.new_users, borderColor: colors.primary, backgroundColor: colors.primary + '33', fill: true, tension: 0.3}]
         },
         options: {
             responsive: true,
@@ -516,17 +635,16 @@ async function loadNewUsersWeeklyChart() {
 }
 
 async function loadActiveUsersWeeklyChart() {
-    const data = await fetchData('active-users/weekly');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('active-users/weekly');
+    if (!series || series.week.length === 0) return;
     const ctx = document.getElementById('activeUsersWeeklyChart').getContext('2d');
-    const sortedData = [...data].reverse();
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.week_start)),
+            labels: series.week.map(formatDate),
             datasets: [
-                {label: 'Peak DAU', data: sortedData.map(d => d.peak_dau), borderColor: colors.info, fill: false, tension: 0.3},
-                {label: 'Avg DAU', data: sortedData.map(d => d.avg_dau), borderColor: colors.success, backgroundColor: colors.success + '33', fill: true, tension: 0.3}
+                {label: 'Peak DAU', data: series.peak_dau, borderColor: colors.info, fill: false, tension: 0.3},
+                {label: 'Avg DAU', data: series.avg_dau, borderColor: colors.success, backgroundColor: colors.success + '33', fill: true, tension: 0.3}
             ]
         },
         options: {
@@ -544,20 +662,19 @@ async function loadActiveUsersWeeklyChart() {
 // ============================================================================
 
 async function loadKratosDailyLoginsChart() {
-    const data = await fetchData('kratos/daily-logins');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('kratos/daily-logins');
+    if (!series || series.metric_date.length === 0) return;
     
     const ctx = document.getElementById('kratosDailyLoginsChart').getContext('2d');
-    const sortedData = [...data].reverse();
     
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.metric_date)),
+            labels: series.metric_date.map(formatDate),
             datasets: [
                 {
                     label: 'Unique Users',
-                    data: sortedData.map(d => d.unique_users_logged_in),
+                    data: series.unique_users_logged_in,
                     borderColor: colors.primary,
                     backgroundColor: colors.primary + '33',
                     fill: true,
@@ -566,7 +683,7 @@ async function loadKratosDailyLoginsChart() {
                 },
                 {
                     label: 'Total Sessions',
-                    data: sortedData.map(d => d.total_sessions),
+                    data: series.total_sessions,
                     borderColor: colors.info,
                     backgroundColor: colors.info + '33',
                     fill: false,
@@ -591,10 +708,9 @@ async function loadKratosDailyLoginsChart() {
                     callbacks: {
                         afterLabel: function(context) {
                             const index = context.dataIndex;
-                            const item = sortedData[index];
                             return [
-                                `Avg Session: ${item.avg_session_minutes} min`,
-                                `MFA Rate: ${item.mfa_session_rate}%`
+                                `Avg Session: ${series.avg_session_minutes[index]} min`,
+                                `MFA Rate: ${series.mfa_session_rate[index]}%`
                             ];
                         }
                     }
@@ -680,20 +796,19 @@ async function loadKratosLoginFrequencyChart() {
 }
 
 async function loadKratosActivationFunnelChart() {
-    const data = await fetchData('kratos/activation-funnel');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('kratos/activation-funnel');
+    if (!series || series.signup_week.length === 0) return;
     
     const ctx = document.getElementById('kratosActivationFunnelChart').getContext('2d');
-    const sortedData = [...data].reverse();
     
     new Chart(ctx, {
         type: 'line',
         data: {
-            labels: sortedData.map(d => formatDate(d.signup_week)),
+            labels: series.signup_week.map(formatDate),
             datasets: [
                 {
                     label: 'Day 1 Activation %',
-                    data: sortedData.map(d => parseFloat(d.day1_activation_rate) || 0),
+                    data: series.day1_activation_rate.map(v => parseFloat(v) || 0),
                     borderColor: colors.success,
                     backgroundColor: colors.success + '33',
                     fill: false,
@@ -701,7 +816,7 @@ async function loadKratosActivationFunnelChart() {
                 },
                 {
                     label: 'Week 1 Activation %',
-                    data: sortedData.map(d => parseFloat(d.week1_activation_rate) || 0),
+                    data: series.week1_activation_rate.map(v => parseFloat(v) || 0),
                     borderColor: colors.primary,
                     backgroundColor: colors.primary + '33',
                     fill: false,
@@ -709,7 +824,7 @@ async function loadKratosActivationFunnelChart() {
                 },
                 {
                     label: 'Month 1 Activation %',
-                    data: sortedData.map(d => parseFloat(d.month1_activation_rate) || 0),
+                    data: series.month1_activation_rate.map(v => parseFloat(v) || 0),
                     borderColor: colors.info,
                     backgroundColor: colors.info + '33',
                     fill: false,
@@ -735,8 +850,7 @@ async function loadKratosActivationFunnelChart() {
                             return context.dataset.label + ': ' + context.parsed.y.toFixed(1) + '%';
                         },
                         afterLabel: function(context) {
-                            const item = sortedData[context.dataIndex];
-                            return `New Signups: ${item.new_identities}`;
+                            return `New Signups: ${series.new_identities[context.dataIndex]}`;
                         }
                     }
                 }
@@ -746,30 +860,29 @@ async function loadKratosActivationFunnelChart() {
 }
 
 async function loadKratosMfaAdoptionChart() {
-    const data = await fetchData('kratos/mfa-adoption');
-    if (!data || data.length === 0) return;
+    const series = await fetchSeries('kratos/mfa-adoption');
+    if (!series || series.metric_month.length === 0) return;
     
     const ctx = document.getElementById('kratosMfaAdoptionChart').getContext('2d');
-    const sortedData = [...data].reverse();
     
     new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: sortedData.map(d => formatMonth(d.metric_month)),
+            labels: series.metric_month.map(formatMonth),
             datasets: [
                 {
                     label: 'TOTP Users',
-                    data: sortedData.map(d => d.totp_users),
+                    data: series.totp_users,
                     backgroundColor: colors.success
                 },
                 {
                     label: 'WebAuthn Users',
-                    data: sortedData.map(d => d.webauthn_users),
+                    data: series.webauthn_users,
                     backgroundColor: colors.primary
                 },
                 {
                     label: 'Password Only',
-                    data: sortedData.map(d => d.password_only_users),
+                    data: series.password_only_users,
                     backgroundColor: colors.warning
                 }
             ]
@@ -785,8 +898,7 @@ async function loadKratosMfaAdoptionChart() {
                     callbacks: {
                         footer: function(tooltipItems) {
                             const index = tooltipItems[0].dataIndex;
-                            const item = sortedData[index];
-                            return `MFA Adoption Rate: ${parseFloat(item.mfa_adoption_rate).toFixed(1)}%`;
+                            return `MFA Adoption Rate: ${parseFloat(series.mfa_adoption_rate[index]).toFixed(1)}%`;
                         }
                     }
                 }
@@ -0,0 +1,140 @@
+"""
+Shared in-memory windows over the time-series aggregates tables.
+
+Several routes read overlapping rows of the same table: the daily charts,
+the weekly rollups and the summary cards all scan the recent end of
+aggregates.daily_metrics. A TableWindow loads the recent rows of a table
+once per data version, newest first, into parallel column lists, and those
+routes become projections and rollups over it with no SQL of their own.
+
+Date filters relative to CURRENT_DATE are applied per request against the
+database's date (see DataWatermark.current_date), not the date the window
+was loaded on. The window is anchored on the newest row instead, so it stays
+valid across midnight until the ETL writes again.
+"""
+
+import re
+from datetime import date, timedelta
+
+from memory_index import WatermarkedIndex
+from rollups import SeriesFrame
+
+
+class WindowRows:
+    """Columns of a table window as parallel lists, newest row first"""
+
+    __slots__ = ('columns', 'dates', 'length', 'complete_since', '_frame')
+
+    def __init__(self, columns, date_column, days=None):
+        self.columns = columns
+        self.dates = columns[date_column]
+        self.length = len(self.dates)
+        # Every row of the table dated on or after this is held (None: all rows)
+        self.complete_since = None
+        if days is not None and self.length:
+            newest = date.fromisoformat(self.dates[0][:10])
+            self.complete_since = (newest - timedelta(days=days)).isoformat()
+        self._frame = None
+
+    @property
+    def frame(self):
+        """The rows as a rollups.SeriesFrame, built on first use"""
+        if self._frame is None:
+            self._frame = SeriesFrame(self.dates, self.columns)
+        return self._frame
+
+    def since(self, days, today):
+        """Number of leading rows dated on or after `today` minus `days` (ISO dates)"""
+        cutoff = (date.fromisoformat(today) - timedelta(days=days)).isoformat()
+        count = 0
+        # ISO dates compare correctly as strings
+        while count < self.length and self.dates[count] >= cutoff:
+            count += 1
+        return count
+
+    def between(self, start=None, end=None):
+        """(first, stop) positions of the rows dated start to end inclusive
+        (ISO dates, None for open-ended), or None when rows before start may
+        be missing from the window"""
+        if self.complete_since is not None and (start is None or start < self.complete_since):
+            return None
+        first = 0
+        if end is not None:
+            while first < self.length and self.dates[first] > end:
+                first += 1
+        stop = first
+        while stop < self.length and (start is None or self.dates[stop] >= start):
+            stop += 1
+        return first, stop
+
+    def project(self, columns, rows=None, renames=None, start=0):
+        """{name: values} for columns, limited to the newest `rows`.
+
+        renames maps a column to the name it is returned under (SQL "AS").
+        With start, rows start to `rows` are returned instead.
+        """
+        end = self.length if rows is None else min(rows, self.length)
+        renames = renames or {}
+        return {renames.get(column, column): self.columns[column][start:end]
+                for column in columns}
+
+    def latest(self, column):
+        return self.columns[column][0] if self.length else None
+
+    def aggregate(self, function, column, rows=None):
+        """SQL-style aggregate over the newest `rows` values (NULLs ignored)"""
+        end = self.length if rows is None else min(rows, self.length)
+        return AGGREGATES[function]([v for v in self.columns[column][:end] if v is not None])
+
+    def rollup(self, grain, aggregates, groups=None, key=None, rows=None):
+        """Newest `groups` buckets of the grain (see rollups.SeriesFrame.rollup),
+        over the (first, stop) positions `rows` if given"""
+        start, stop = rows or (0, None)
+        return self.frame.rollup(grain, aggregates, groups=groups, key=key, start=start,
+                                 stop=stop)
+
+
+def _sum(values):
+    return sum(values) if values else None
+
+
+def _max(values):
+    return max(values) if values else None
+
+
+def _avg(values):
+    return sum(values) / len(values) if values else None
+
+
+AGGREGATES = {'sum': _sum, 'max': _max, 'avg': _avg}
+
+
+class TableWindow(WatermarkedIndex):
+    """
+    The newest `days` of a table (all of it when days is None), columnar.
+
+    table, date_column and columns are trusted identifiers or expressions
+    from the route definitions; columns may use "expression AS alias".
+    """
+
+    def __init__(self, execute, watermark, table, date_column, columns, days=None,
+                 max_rows=None):
+        super().__init__(execute, watermark, max_rows)
+        self.name = table.split('.')[-1] + '_window'
+        self.sources = (table,)
+        self.date_column = date_column
+        self.days = days
+        self.columns = (date_column,) + tuple(
+            re.split(r'\s+AS\s+', column, flags=re.IGNORECASE)[-1] for column in columns)
+        window = (f'WHERE {date_column} >= (SELECT MAX({date_column}) FROM {table}) - {int(days)}'
+                  if days is not None else '')
+        self.query = f"""
+            SELECT {', '.join((date_column,) + tuple(columns))}
+            FROM {table}
+            {window}
+            ORDER BY {date_column} DESC
+            LIMIT %s;
+        """
+
+    def build(self, columns):
+        return WindowRows(columns, self.date_column, self.days)